@@ -91,32 +91,27 @@ if __name__ == '__main__':
         for process in xmlParser.physicsProcesses:
 	    if process.name=='Zee':
                 out_file.write("\nCutflow for {0}\n".format(process.name))
-                selection = cut_none
-                n_last_selection = 100
+                tmp_weight = None
+                if not process.isData:
+                    tmp_weight = weight_expression
+                    if process.name=='Zee' or process.name=='Zmumu' or process.name=='Ztautau':
+                        tmp_weight = weight_expression+'*SF_dilepton_pt_vect'
                 for region in regions:
                     for prong in prongs:
                         for pt in pts:
-                            cuts = base_cuts
-                            cuts.append( region )
-                            cuts.append( prong )
-                            cuts.append( pt )
-                            for new_cut in cuts:
-                                selection = selection & new_cut
-                                if process.isData:
-                                    h_tmp = process.getHistogram( var, process.title, luminosity=lumi, cut=selection ); sys.stdout.write('.'); sys.stdout.flush()
-                                else:
-                                    tmp_weight = weight_expression
-                                    if process.name=='Zee' or process.name=='Zmumu' or process.name=='Ztautau':
-                                        tmp_weight = weight_expression+'*SF_dilepton_pt_vect'
-                                    h_tmp = process.getHistogram( var, process.title, luminosity=lumi, cut=selection, weightExpression=tmp_weight); sys.stdout.write('.'); sys.stdout.flush()
-                                n_events = h_tmp.Integral()
+                            # all cuts of the flow are evaluated in a single pass
+                            cuts = base_cuts + [ region, prong, pt ]
+                            yields = process.getCutFlow( cuts, luminosity=lumi, weightExpression=tmp_weight )['cumulative']
+                            sys.stdout.write('.'); sys.stdout.flush()
+                            n_last_selection = 100
+                            for new_cut, (n_events, error) in zip( cuts, yields ):
                                 if n_last_selection > 0:
                                     percentage = 100 * ( 1 - ( n_events / n_last_selection ) )
                                 else:
                                     percentage = 0
                                 n_last_selection = n_events
                                 out_file.write("{0} left\t({1:.2f}% lost)\tafter application of: {2}\n".format( n_events, percentage, new_cut.name ))
-                                sys.stdout.write(' '); sys.stdout.flush() # Got all histograms for this process
+                            sys.stdout.write(' '); sys.stdout.flush() # Got all histograms for this process
 
         out_file.write("\n\n")
     print "everything is done!"
@@ -210,6 +210,9 @@ if __name__ == '__main__':
     #sel_base = sel_lep & sel_tau & sel_tag & cut_quark_enriched
     #sel_base = sel_lep & sel_tau & sel_tag & cut_gluon_enriched
     sel_noWin = sel_lep & sel_tau
+    # refinements of the base selection are only evaluated on the entries passing it
+    for process in xmlParser.physicsProcesses:
+        process.addSelectionCache( sel_base )
     # applied only to MC FR from Zee sample (propagates to SF)
     truth_match = cut_none
     # truth_match = cut_tau0_jetmatch_q	# use only in combination with process_MC !
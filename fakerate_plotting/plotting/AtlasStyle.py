@@ -11,6 +11,12 @@ import copy
 ## parse the ROOT macro only once
 appliedAtlasStyle = False
 
+## ROOT colour, line and marker constants (see Rtypes.h, TAttLine and TAttMarker).
+#  Defined here so that the default styles can be created without importing ROOT.
+kBlack, kRed, kBlue, kGreen, kOrange = 1, 632, 600, 416, 800
+kSolid, kDashed, kDotted, kDashDotted = 1, 2, 3, 4
+kFullCircle, kFullSquare, kFullTriangleUp, kFullTriangleDown = 20, 21, 22, 23
+
 def loadRootMacro( path ):
     ## Helper method to execute a ROOT C macro
     if os.path.exists( path ) and os.path.isfile( path ):
@@ -50,6 +56,7 @@ def setPalette( name='palette', ncontours=999 ):
     
 def applyAtlasStyle( path=os.environ.get('ATLAS_STYLE_MACRO') ):
     ## Helper method to load the ATLAS style ROOT C macro
+    #  Called automatically the first time a BasicPlot is drawn
     global appliedAtlasStyle
     if appliedAtlasStyle:
         return
@@ -61,12 +68,6 @@ def applyAtlasStyle( path=os.environ.get('ATLAS_STYLE_MACRO') ):
     setPalette()
     ROOT.TGaxis.SetMaxDigits( 4 )
 
-
-# Load the ATLAS style
-applyAtlasStyle()
-
-
-
         
 class Style:
     ## Simple container for style definitions
@@ -165,7 +166,6 @@ class FilledStyle( Style ):
         #  @param markerStyle   the marker type (see TAttMarker)
         #  @param fillStyle     the fill style (see TAttFill)
         Style.__init__( self, color, lineStyle, markerStyle, fillStyle )
-        from ROOT import kBlack
         self.lineColor = kBlack
         self.lineWidth = 2
 
@@ -201,7 +201,6 @@ class ColorStyles:
     ## Container for defining sequence of color styles
     #  Used to map a set of styles to a unique index
     
-    from ROOT import kBlack, kRed, kBlue, kGreen
     def __init__( self, colors=[kBlack, kRed, kBlue, kGreen] ):
         # Default constructor
         #  @param colors            list of ROOT color indices
@@ -226,7 +225,6 @@ class LineStyles:
     ## Container for defining sequence of line styles
     #  Used to map a set of styles to a unique index
     
-    from ROOT import kSolid, kDashed, kDotted, kDashDotted
     def __init__( self, styles=[kSolid, kDashed, kDotted, kDashDotted], width=None ):
         ## Default cosntructor
         #  @param colors            list of ROOT line style indices (see TAttLine)
@@ -246,7 +244,6 @@ class MarkerStyles:
     ## Container for defining sequence of marker styles
     #  Used to map a set of styles to a unique index
     
-    from ROOT import kFullCircle, kFullSquare, kFullTriangleUp, kFullTriangleDown
     def __init__( self, styles=[kFullCircle, kFullSquare, kFullTriangleUp, kFullTriangleDown], size=None ):
         ## Default constructor
         #  @param colors            list of ROOT marker style indices (see TAttMarker)        
@@ -279,13 +276,11 @@ class FillStyles:
         obj.SetFillStyle( style )
 
 def dashedLineStyle( style ):
-    from ROOT import kDashed
     newStyle = copy.copy( style )
     newStyle.lineStyle = kDashed
     return newStyle
 
 def openMarkerStyle( style ):
-    from ROOT import kDashed
     newStyle = copy.copy( style )
     if newStyle.markerStyle in [20,21,22]:
         newStyle.markerStyle += 4
@@ -294,19 +289,18 @@ def openMarkerStyle( style ):
 #######################
 # some default styles #
 #######################
-import ROOT
-linesBW = DrawStyles( ColorStyles([ROOT.kBlack]), LineStyles(), MarkerStyles([0],0.), FillStyles([0]) )
-linesColor = DrawStyles( ColorStyles(), LineStyles([ROOT.kSolid]), MarkerStyles([0],0.), FillStyles([0]) )
+linesBW = DrawStyles( ColorStyles([kBlack]), LineStyles(), MarkerStyles([0],0.), FillStyles([0]) )
+linesColor = DrawStyles( ColorStyles(), LineStyles([kSolid]), MarkerStyles([0],0.), FillStyles([0]) )
 
 mcErrorStyle = Style( 1031, lineColor=0, lineWidth=0, markerStyle=0, fillStyle=3144 )
 mcErrorStyle.lineColor = 0
 mcErrorStyle.lineWidth = 0
-blackLine = Style( color=ROOT.kBlack, markerStyle=20 )
-redLine = Style( color=ROOT.kRed, markerStyle=20 )
-orangeLine = Style( color=ROOT.kOrange+1, markerStyle=20 )
-blueLine = Style( color=ROOT.kBlue, markerStyle=20 )
-greenLine = Style( color=ROOT.kGreen+1, markerStyle=20 )
+blackLine = Style( color=kBlack, markerStyle=20 )
+redLine = Style( color=kRed, markerStyle=20 )
+orangeLine = Style( color=kOrange+1, markerStyle=20 )
+blueLine = Style( color=kBlue, markerStyle=20 )
+greenLine = Style( color=kGreen+1, markerStyle=20 )
 
 lines = [ blackLine, redLine, blueLine, greenLine, orangeLine ]
-lineColors = [ ROOT.kBlack, ROOT.kRed, ROOT.kBlue, ROOT.kGreen+1, ROOT.kOrange+1 ]
+lineColors = [ kBlack, kRed, kBlue, kGreen+1, kOrange+1 ]
 
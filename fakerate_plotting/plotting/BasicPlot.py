@@ -6,7 +6,7 @@ Wrapper classes to generate beautiful ROOT plots
 
 from plotting.Variable import Variable, var_Entries, VariableBinning
 from plotting.PlotDecorator import TitleDecorator, LegendDecorator
-from plotting.AtlasStyle import applyAtlasStyle, Style
+from plotting.AtlasStyle import applyAtlasStyle, Style, kBlack
 from plotting.Tools import combineStatsAndSystematics
 import os, math, string, uuid, copy
 
@@ -21,7 +21,6 @@ def alphanumericString( s ):
 
 class TextElement:
     ## Container for text attributes used in TLatex
-    from ROOT import kBlack
     
     def __init__( self, text, size=0.05, font=42, color=kBlack, italics=False, bold=False, alignment=11, x=0., y=0. ):
         ## Default contructor
@@ -88,7 +87,6 @@ class BasicPlot( object ):
     ## Generic class holding histograms, functions and graphs.
     #  It takes care of drawing and styling.
     
-    applyAtlasStyle()
     defaultTitleDecorator = TitleDecorator()
     defaultLegendDecorator = LegendDecorator()
     
@@ -260,6 +258,8 @@ class BasicPlot( object ):
         
     def draw( self ):
         ## Method that does all the magic
+        # the ATLAS style is only loaded once, when the first plot is drawn
+        applyAtlasStyle()
         self.__initAction__()
         self.__mainAction__()
         if self.normalizeByBinWidth:
@@ -0,0 +1,116 @@
+"""@package ColumnCache
+Cache of evaluated expressions stored as columns of floats
+
+Each column holds the value of one expression for all (preselected) entries
+of a dataset tree. Columns are identified by the md5 of the dataset, the tree,
+its friend trees, the preselection and the canonical expression, so the same
+expression is only evaluated once by TTreeFormula no matter how many cuts and
+histograms use it.
+The cache keeps the most recently used columns in memory up to a byte budget.
+If a spill directory is set, evicted columns are written as .npy files and
+read back as memory mapped arrays, which also keeps them across sessions.
+"""
+from plotting.Cut import canonicalCut
+from collections import OrderedDict
+import hashlib, logging, os
+
+class ColumnCache( object ):
+    ## Least recently used cache of evaluated expression columns with a memory budget
+    defaultMaxBytes = 1024 * 1024 * 1024       # bytes kept in memory
+    defaultSpillDirectory = None               # directory for evicted columns, None discards them
+    defaultColumnsPerPass = 32                 # number of expressions evaluated together in one TTree::Draw
+    logger = logging.getLogger( __name__ + '.ColumnCache' )
+
+    def __init__( self, maxBytes=None, spillDirectory=None ):
+        ## Default constructor
+        #  @param maxBytes          maximum number of bytes of the columns kept in memory
+        #  @param spillDirectory    directory to write evicted columns to (optional)
+        self.maxBytes = maxBytes if maxBytes is not None else self.defaultMaxBytes
+        self.spillDirectory = spillDirectory if spillDirectory is not None else self.defaultSpillDirectory
+        self.columnsPerPass = self.defaultColumnsPerPass
+        self.columns = OrderedDict()
+        self.nBytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__( self ):
+        return 'ColumnCache(%d columns, %d/%d bytes)' % ( len(self.columns), self.nBytes, self.maxBytes )
+
+    def __contains__( self, key ):
+        return key in self.columns or ( self.spillDirectory is not None and os.path.exists( self._spillFileName( key ) ) )
+
+    def key( self, dataset, treeName, expression ):
+        ## Get the key identifying a column
+        #  @param dataset       the Dataset object
+        #  @param treeName      name of the tree
+        #  @param expression    the evaluated expression
+        #  @return the key (md5 hex digest)
+        md5 = hashlib.md5()
+        md5.update( dataset.md5 )
+        md5.update( treeName )
+        md5.update( dataset.friendTreesMd5( treeName ) )
+        md5.update( dataset.preselection.md5 )
+        md5.update( canonicalCut( expression ) )
+        return md5.hexdigest()
+
+    def get( self, key ):
+        ## Get a column from the cache
+        #  Spilled columns are returned as read-only memory mapped arrays.
+        #  @param key    the key of the column (see key())
+        #  @return array of values or None if the column is not cached
+        import numpy
+        column = self.columns.pop( key, None )
+        if column is not None:
+            # move to the end, i.e. mark as most recently used
+            self.columns[ key ] = column
+            self.hits += 1
+            return column
+        if self.spillDirectory is not None:
+            fileName = self._spillFileName( key )
+            if os.path.exists( fileName ):
+                self.hits += 1
+                return numpy.load( fileName, mmap_mode='r' )
+        self.misses += 1
+        return None
+
+    def put( self, key, column ):
+        ## Add a column to the cache, the least recently used columns are evicted if the budget is exceeded
+        #  @param key       the key of the column (see key())
+        #  @param column    array of values
+        if key in self.columns:
+            self.nBytes -= self.columns.pop( key ).nbytes
+        if column.nbytes > self.maxBytes:
+            # does not fit at all, only keep it on disk
+            self._spill( key, column )
+            return
+        self.columns[ key ] = column
+        self.nBytes += column.nbytes
+        while self.nBytes > self.maxBytes:
+            oldKey, oldColumn = self.columns.popitem( last=False )
+            self.nBytes -= oldColumn.nbytes
+            self._spill( oldKey, oldColumn )
+
+    def clear( self ):
+        ## Remove all columns from memory, spilled columns are kept on disk
+        self.columns.clear()
+        self.nBytes = 0
+
+    def _spillFileName( self, key ):
+        ## helper method to get the file name of a spilled column
+        return os.path.join( self.spillDirectory, key + '.npy' )
+
+    def _spill( self, key, column ):
+        ## helper method to write an evicted column to the spill directory
+        import numpy
+        if self.spillDirectory is None:
+            return
+        fileName = self._spillFileName( key )
+        if os.path.exists( fileName ):
+            return
+        if not os.path.exists( self.spillDirectory ):
+            os.makedirs( self.spillDirectory )
+        # write to a temporary file first, the file is only replaced when complete
+        tmpFileName = fileName[:-len('.npy')] + '.tmp.npy'
+        numpy.save( tmpFileName, column )
+        os.rename( tmpFileName, fileName )
+        self.logger.debug( '_spill(): wrote %d bytes to %s' % ( column.nbytes, fileName ) )
@@ -22,9 +22,44 @@ class CombinedVariable( Variable ):
         Variable.__init__( self, name, None, title, unit, binning, defaultCut )
         self.variables = variables
         
+    @property
+    def expressions( self ):
+        ## Get all expressions needed to fill this variable, i.e. the commands and default cuts of all contained variables
+        expressions = []
+        for variable in self.variables:
+            for expression in ( variable.command, variable.defaultCut.cut ):
+                if expression and expression not in expressions:
+                    expressions.append( expression )
+        return expressions
+    
+    @property
+    def isSinglePass( self ):
+        ## Check if all contained variables can be filled from the same evaluation of the expressions
+        return bool( self.variables ) and not any( getattr( variable, 'variables', None ) for variable in self.variables )
+    
+    def combineValues( self, columns, weights ):
+        ## Concatenate the values of all contained variables, each one only for the entries passing its default cut
+        #  @param columns    dictionary of expression to array of values, one value per entry (see expressions)
+        #  @param weights    array of weights of the entries
+        #  @return array of values, array of weights
+        import numpy
+        values = []
+        combinedWeights = []
+        for variable in self.variables:
+            column = columns[ variable.command ]
+            if variable.defaultCut.cut:
+                passed = columns[ variable.defaultCut.cut ] != 0
+                values.append( column[ passed ] )
+                combinedWeights.append( weights[ passed ] )
+            else:
+                values.append( column )
+                combinedWeights.append( weights )
+        return numpy.concatenate( values ), numpy.concatenate( combinedWeights )
+    
     def createHistogramFromTree( self, tree, title='', cut=None, weight=None, drawOption='', style=None ):
         ## Create a histogram from a TTree
-        #  Returns the sum of histogram of all contained variables
+        #  Returns the sum of histogram of all contained variables. If possible all variables are
+        #  evaluated in a single TTree::Draw and filled together.
         #  @ param tree             TTree object used to create the histogram
         #  @ param title            the histogram title
         #  @ param cut              Cut object (optional)
@@ -36,14 +71,54 @@ class CombinedVariable( Variable ):
         hist = self.createHistogram( title, 'prof' in drawOption )
         if not hist.GetSumw2N():
             hist.Sumw2()
-        for variable in self.variables:
-            h = variable.createHistogramFromTree( tree, title, cut, weight, drawOption )
-            if h:
-                hist.Add( h )
+        filled = False
+        if self.isSinglePass and 'prof' not in drawOption and self.binning.low is not None and self.binning.up is not None:
+            filled = self._fillFromTree( hist, tree, cut, weight )
+        if not filled:
+            for variable in self.variables:
+                h = variable.createHistogramFromTree( tree, title, cut, weight, drawOption )
+                if h:
+                    hist.Add( h )
         if hist and style:
             style.apply( hist )
         return hist
     
+    def _isScalar( self, tree, expression ):
+        ## helper method to check if an expression has exactly one value per entry
+        #  Arrays, also with an explicit index, can have no value in an entry, which drops the whole row in TTree::Draw.
+        from ROOT import TTreeFormula
+        import warnings
+        warnings.filterwarnings( action='ignore', category=RuntimeWarning, message='creating converter.*' )
+        formula = TTreeFormula( 'isScalar', expression, tree )
+        isScalar = formula.GetNdim() > 0 and formula.GetMultiplicity() == 0
+        del formula
+        return isScalar
+    
+    def _fillFromTree( self, hist, tree, cut, weight ):
+        ## helper method to fill all contained variables from a single TTree::Draw
+        #  @return False if the expressions do not have exactly one value per entry
+        import numpy
+        from plotting.TreePlot import getColumnsFromTree
+        selection = cut * weight if weight else cut
+        expressions = self.expressions
+        # the formulas need a loaded tree, also for TChains
+        if tree.LoadTree( 0 ) < 0 or not all( self._isScalar( tree, expression ) for expression in expressions ):
+            self.logger.debug( '_fillFromTree(): %r are not all scalar, filling variables separately' % expressions )
+            return False
+        # all selected rows are read from the buffers of TTree::Draw
+        if tree.GetEstimate() < tree.GetEntries() + 1:
+            tree.SetEstimate( tree.GetEntries() + 1 )
+        columns, weights = getColumnsFromTree( tree, ['Entry$'] + expressions, selection.cut )
+        # entry numbers are repeated for expressions with several values per entry
+        if ( numpy.diff( columns[0] ) <= 0 ).any():
+            self.logger.debug( '_fillFromTree(): %r do not have exactly one value per entry, filling variables separately' % expressions )
+            return False
+        values, weights = self.combineValues( dict( zip( expressions, columns[1:] ) ), weights )
+        if len( values ):
+            hist.FillN( len( values ), values, weights )
+        self.logger.debug( '_fillFromTree(): filled %d values of %d variables from a single pass' % ( len(values), len(self.variables) ) )
+        return True
+    
 if __name__ == '__main__':
     from plotting.BasicPlot import BasicPlot
     from plotting.AtlasStyle import blackLine, redLine, blueLine
@@ -3,9 +3,27 @@ Class to replace TCut with extended functionality
 
 @author Christian Grefe, Bonn University (christian.grefe@cern.ch)
 """
-import hashlib
+import hashlib, re, sys, weakref
 
-CUTS={}
+# all cuts by name, only weak references are kept so that temporary cuts created
+# by the operators are deleted as soon as they are no longer used
+CUTS=weakref.WeakValueDictionary()
+
+## intern tables for normalised and combined cut expressions, cleared when full
+maxInternedCuts = 100000
+_normalisedCuts = {}
+_combinedCuts = {}
+_canonicalCuts = {}
+_parenthesesPattern = re.compile( r'[()]' )
+_whiteSpacePattern = re.compile( r'\s+' )
+_numberPattern = re.compile( r'(?<![\w.$])(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?(?![\w.])' )
+_primaryPattern = re.compile( r'^!*(?:[\w.$:\[\]]|\(\))+$' )
+
+def isTCut( obj ):
+    ## checks if the given object is a ROOT TCut without importing ROOT.
+    #  If ROOT was not imported yet there can not be any TCut object.
+    ROOT = sys.modules.get( 'ROOT' )
+    return ROOT is not None and isinstance( obj, ROOT.TCut )
 
 def findAllOccurrences( expression, char ):
     ## finds all occurances of a given char in the given expression
@@ -13,20 +31,21 @@ def findAllOccurrences( expression, char ):
 
 def findMatchingParantheses( expression ):
     ## returns a list of tuples with the inidces of the corresponding
-    #  open and close parantheses positions.
-    result = []
-    openParentheses = findAllOccurrences( expression, '(' )
-    for i in openParentheses:
-        index = i
-        counter = 1
-        while counter > 0:
-            index += 1
-            if expression[index] == '(':
-                counter += 1
-            elif expression[index] == ')':
-                counter -= 1
-        result.append( (i, index) )
-    return result
+    #  open and close parantheses positions, ordered by the open parantheses.
+    #  Single pass over all parantheses keeping a stack of the open ones,
+    #  parantheses without a partner are ignored.
+    openParentheses = []
+    closeParentheses = []
+    stack = []
+    for match in _parenthesesPattern.finditer( expression ):
+        index = match.start()
+        if expression[index] == '(':
+            stack.append( len( openParentheses ) )
+            openParentheses.append( index )
+            closeParentheses.append( None )
+        elif stack:
+            closeParentheses[ stack.pop() ] = index
+    return [ parantheses for parantheses in zip( openParentheses, closeParentheses ) if parantheses[1] is not None ]
 
 def removeRedundantParantheses( expression ):
     ## removes all unnecessary parantheses from the given expression
@@ -41,12 +60,221 @@ def removeRedundantParantheses( expression ):
             indicesToRemove.extend( parantheses )
         previousParantheses = parantheses
     
-    # start with highest character and remove indices
-    indicesToRemove.sort( reverse=True )
+    if not indicesToRemove:
+        return expression
+    # join the pieces between the removed characters
+    indicesToRemove.sort()
+    pieces = []
+    start = 0
     for index in indicesToRemove:
-        expression = expression[:index] + expression[index+1:]
+        pieces.append( expression[start:index] )
+        start = index + 1
+    pieces.append( expression[start:] )
+    return ''.join( pieces )
+
+def normaliseCut( cut ):
+    ## removes white spaces and unnecessary parantheses from the given cut expression.
+    #  Results are memoised in an intern table, i.e. repeated combinations of
+    #  the same cuts do not parse the expression again.
+    #  @param cut    the raw cut expression
+    #  @return the normalised cut expression
+    try:
+        return _normalisedCuts[ cut ]
+    except KeyError:
+        pass
+    if len( _normalisedCuts ) >= maxInternedCuts:
+        _normalisedCuts.clear()
+    normalised = removeRedundantParantheses( cut.replace( ' ', '' ) )
+    if type( normalised ) is str:
+        normalised = intern( normalised )
+    _normalisedCuts[ cut ] = normalised
+    return normalised
+
+def combineCuts( pattern, *cuts ):
+    ## combines normalised cut expressions using the given pattern.
+    #  Returns the identical string object for repeated combinations, so
+    #  its hash is cached and the lookup in the intern table is cheap.
+    #  @param pattern    format string with one placeholder per cut, i.e. '(%s) && (%s)'
+    #  @param cuts       the cut expressions
+    #  @return the combined (raw) cut expression
+    key = ( pattern, ) + cuts
+    try:
+        return _combinedCuts[ key ]
+    except KeyError:
+        pass
+    if len( _combinedCuts ) >= maxInternedCuts:
+        _combinedCuts.clear()
+    combined = _combinedCuts[ key ] = pattern % cuts
+    return combined
+
+def _splitTopLevel( expression, operator ):
+    ## splits the expression at all occurrences of the operator outside of parantheses
+    parts = []
+    depth = 0
+    start = 0
+    index = 0
+    length = len( operator )
+    while index < len( expression ):
+        char = expression[index]
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif depth == 0 and expression.startswith( operator, index ):
+            parts.append( expression[start:index] )
+            index += length
+            start = index
+            continue
+        index += 1
+    parts.append( expression[start:] )
+    return parts
+
+def _topLevel( expression ):
+    ## returns the expression with the content of all parantheses removed
+    result = []
+    depth = 0
+    for char in expression:
+        if char == '(':
+            if depth == 0:
+                result.append( char )
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                result.append( char )
+        elif depth == 0:
+            result.append( char )
+    return ''.join( result )
+
+def _isPrimary( expression ):
+    ## checks if the expression is a single operand, i.e. a variable, a number,
+    #  a function call or an expression in parantheses (optionally negated)
+    return bool( _primaryPattern.match( _topLevel( expression ) ) )
+
+def _stripParantheses( expression ):
+    ## removes parantheses enclosing the full expression
+    while expression.startswith( '(' ) and expression.endswith( ')' ):
+        depth = 0
+        for index, char in enumerate( expression ):
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+                if depth == 0:
+                    break
+        if index != len( expression ) - 1:
+            break
+        expression = expression[1:-1]
     return expression
 
+def _formatNumber( match ):
+    ## writes numeric literals in a unique way, i.e. 65., 65.0 and 65 become 65
+    value = float( match.group( 0 ) )
+    if value.is_integer() and abs( value ) < 1e15:
+        return '%d' % value
+    return repr( value )
+
+def _canonicalLeaf( expression ):
+    ## canonical form of an expression without top level logical operators.
+    #  Expressions inside of parantheses (i.e. function arguments) are canonicalised recursively.
+    if expression.startswith( '!' ) and _isPrimary( expression[1:] ):
+        operand = _canonicalNode( expression[1:] )[1]
+        return '!' + ( operand if _isPrimary( operand ) else '(%s)' % operand )
+    result = []
+    depth = 0
+    start = 0
+    for index, char in enumerate( expression ):
+        if char == '(':
+            if depth == 0:
+                result.append( _numberPattern.sub( _formatNumber, expression[start:index+1] ) )
+                start = index + 1
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                arguments = [ _canonicalNode( argument )[1] for argument in _splitTopLevel( expression[start:index], ',' ) ]
+                result.append( ','.join( arguments ) )
+                start = index
+    result.append( _numberPattern.sub( _formatNumber, expression[start:] ) )
+    return ''.join( result )
+
+def _canonicalNode( expression ):
+    ## canonical form of the expression as tuple of the top level operator and the
+    #  canonical expression. Associative operators are flattened and the operands
+    #  of the commutative operators are sorted. Duplicates are removed for the
+    #  idempotent logical operators only, i.e. "a*a" is not the same as "a".
+    expression = _stripParantheses( expression )
+    for operator in ( '||', '&&', '*' ):
+        parts = _splitTopLevel( expression, operator )
+        if len( parts ) == 1:
+            continue
+        # multiplication binds stronger than comparisons, only split if all factors are single operands
+        if operator == '*' and not all( _isPrimary( part ) for part in parts ):
+            break
+        operands = []
+        for part in parts:
+            op, canonical = _canonicalNode( part )
+            if op == operator:
+                operands.extend( _splitTopLevel( canonical, operator ) )
+            else:
+                operands.append( canonical if _isPrimary( canonical ) else '(%s)' % canonical )
+        if operator != '*':
+            operands = list( set( operands ) )
+            if len( operands ) == 1:
+                # "a&&a" is the boolean of a, keep the cast to not mix it up with the value of a
+                op, canonical = _canonicalNode( operands.pop() )
+                if canonical.startswith( '!' ) and _isPrimary( canonical ):
+                    return op, canonical
+                return '', '!!' + ( canonical if _isPrimary( canonical ) else '(%s)' % canonical )
+        return operator, operator.join( sorted( operands ) )
+    return '', _canonicalLeaf( expression )
+
+def canonicalCut( cut ):
+    ## returns a canonical form of the cut expression which is identical for
+    #  equivalent expressions, i.e. "a && b" and "(b)&&a". AND, OR and
+    #  multiplications are flattened and their operands sorted, white spaces are
+    #  removed and numbers are written in a unique way. Results are memoised.
+    #  @param cut    the cut expression
+    #  @return the canonical cut expression
+    try:
+        return _canonicalCuts[ cut ]
+    except KeyError:
+        pass
+    if len( _canonicalCuts ) >= maxInternedCuts:
+        _canonicalCuts.clear()
+    canonical = _canonicalNode( _whiteSpacePattern.sub( '', cut ) )[1] if cut else cut
+    if type( canonical ) is str:
+        canonical = intern( canonical )
+    _canonicalCuts[ cut ] = canonical
+    return canonical
+
+def splitCanonicalCut( canonical ):
+    ## splits a canonical cut expression into its top level logical operator and the operands
+    #  @param canonical    the canonical cut expression (see canonicalCut)
+    #  @return tuple of operator ('||', '&&', '!' or '' if there is none) and list of canonical operands
+    expression = _stripParantheses( canonical )
+    for operator in ( '||', '&&' ):
+        parts = _splitTopLevel( expression, operator )
+        if len( parts ) > 1:
+            return operator, [ canonicalCut( _stripParantheses( part ) ) for part in parts ]
+    if expression.startswith( '!' ) and _isPrimary( expression[1:] ):
+        return '!', [ canonicalCut( _stripParantheses( expression[1:] ) ) ]
+    return '', [ expression ]
+
+def conjunctionTerms( cut ):
+    ## returns the set of canonical terms which are combined with AND in the given cut expression.
+    #  Terms that are always true ("1") are ignored.
+    #  @param cut    the cut expression
+    #  @return frozenset of canonical terms
+    canonical = canonicalCut( cut )
+    if not canonical:
+        return frozenset()
+    terms = _splitTopLevel( canonical, '&&' )
+    if len( terms ) == 1 and not _isPrimary( canonical ):
+        # single terms are wrapped in the same way as the operands of an AND
+        terms = [ '(%s)' % canonical ]
+    return frozenset( term for term in terms if term != '1' )
+
 class Cut( object ):
     ## Container class for named cuts including titles
     #  Provides intuitive implementation for logical combination of cuts.
@@ -62,8 +290,7 @@ class Cut( object ):
         #  @param name    name of the cut (used for file names etc.: avoid special characters)
         #  @param title   title of the cut (used for legend titles etc.: use TLatex)
         #  @param cut     the actual cut string (see TTree::Draw)
-        from ROOT import TCut
-        if isinstance( name, TCut ):
+        if not isinstance( name, basestring ) and isTCut( name ):
             self.name = name.GetName()
             self.title = name.GetName()
             self.cut = name.GetTitle()
@@ -96,8 +323,9 @@ class Cut( object ):
         cut = element.text.strip() if element.text else ''
         name = element.attrib['name'] if element.attrib.has_key( 'name' ) else cut
         title = element.attrib['title'] if element.attrib.has_key( 'title' ) else ''
-        if CUTS.has_key( name ):
-            return CUTS[ name ]
+        registered = CUTS.get( name )
+        if registered is not None:
+            return registered
         return cls(name, title, cut)
     
     @property
@@ -108,8 +336,8 @@ class Cut( object ):
     @cut.setter
     def cut( self, cut ):
         ## Set the cut expression
-        # remove white spaces
-        self.__cut = removeRedundantParantheses( cut.replace( ' ', '' ) )
+        # remove white spaces and redundant parantheses
+        self.__cut = normaliseCut( cut )
 
     def __repr__( self ):
         ## simple string representation
@@ -154,11 +382,28 @@ class Cut( object ):
             other = Cut( other )
         return Cut( '%s_WITHOUT_%s' % (self.name, other.name), '%s WITHOUT %s' % (self.title, other.title), self.cut.replace(other.cut, '1') )
     
+    @property
+    def conjunctionTerms( self ):
+        ## canonical terms that are combined with AND in this cut
+        return conjunctionTerms( self.cut )
+    
     def isSubset( self, other ):
-        pass
+        ## Check if this cut selects a subset of the events selected by the other cut.
+        #  The check is structural, i.e. this cut has to contain all AND terms of the other
+        #  cut. Returns False if that can not be decided.
+        #  @param other    the other cut
+        #  @return True if all events passing this cut also pass the other cut
+        if not isinstance( other, Cut ):
+            other = Cut( other )
+        return other.conjunctionTerms <= self.conjunctionTerms
     
     def isSuperset( self, other ):
-        pass
+        ## Check if this cut selects a superset of the events selected by the other cut.
+        #  @param other    the other cut
+        #  @return True if all events passing the other cut also pass this cut
+        if not isinstance( other, Cut ):
+            other = Cut( other )
+        return other.isSubset( self )
 
 
     ##########################################
@@ -205,22 +450,31 @@ class Cut( object ):
         ## implement == operator
         if not isinstance( other, Cut ):
             other = Cut( other )
-        return self.cut == other.cut
+        return self.canonical == other.canonical
+
+    def __ne__( self, other ):
+        ## implement != operator
+        return not self == other
 
     def __hash__( self ):
         ## implement hash function
-        return hash( self.cut )
+        return hash( self.canonical )
+    
+    @property
+    def canonical( self ):
+        ## canonical cut expression, identical for equivalent cuts
+        return canonicalCut( self.cut )
     
     @property
     def md5( self ):
-        ## calculate an md5 checksum
-        return hashlib.md5( self.cut ).hexdigest()
+        ## calculate an md5 checksum of the canonical cut expression
+        return hashlib.md5( self.canonical ).hexdigest()
 
     def __neg__( self ):
         ## implement -self operator: logical NOT
         if not self.cut:
             return self
-        return Cut( 'NOT_%s' % self.name, '%s%s' % (self.stringNOT, self.title), '!(%s)' % self.cut )
+        return Cut( 'NOT_%s' % self.name, '%s%s' % (self.stringNOT, self.title), combineCuts( '!(%s)', self.cut ) )
 
     def __and__( self, other ):
         ## implement & operator: logical AND
@@ -230,7 +484,7 @@ class Cut( object ):
             return self
         if not self.cut:
             return other
-        return Cut( '%s_AND_%s' % (self.name, other.name), '%s%s%s' % (self.title, self.stringAND, other.title), '(%s) && (%s)' % (self.cut, other.cut) )
+        return Cut( '%s_AND_%s' % (self.name, other.name), '%s%s%s' % (self.title, self.stringAND, other.title), combineCuts( '(%s) && (%s)', self.cut, other.cut ) )
     
     def __or__( self, other ):
         ## implement | operator: logical OR
@@ -240,7 +494,7 @@ class Cut( object ):
             return self
         if not self.cut:
             return other
-        return Cut( '%s_OR_%s' % (self.name, other.name), '%s%s%s' % (self.title, self.stringOR, other.title), '(%s) || (%s)' % (self.cut, other.cut) )
+        return Cut( '%s_OR_%s' % (self.name, other.name), '%s%s%s' % (self.title, self.stringOR, other.title), combineCuts( '(%s) || (%s)', self.cut, other.cut ) )
     
     def __mul__( self, other ):
         ## implement * operator: logical AND (with weights)
@@ -250,7 +504,7 @@ class Cut( object ):
             return self
         if not self.cut:
             return other
-        return Cut( '%s_X_%s' % (self.name, other.name), '%s%s%s' % (self.title, self.stringTIMES, other.title), '(%s) * (%s)' % (self.cut, other.cut) )
+        return Cut( '%s_X_%s' % (self.name, other.name), '%s%s%s' % (self.title, self.stringTIMES, other.title), combineCuts( '(%s) * (%s)', self.cut, other.cut ) )
     
     def __add__( self, other ):
         ## implement + operator: logical AND
@@ -336,3 +590,8 @@ if __name__ == '__main__':
     
     
     print Cut( 'a || b < 70' ) == '(b < 70) || a'
+    # multiplication is not idempotent, only logical operators drop duplicates
+    print canonicalCut( 'w*w' ), canonicalCut( 'a*b*a' ), canonicalCut( 'a && b && a' )
+    print Cut( 'x', 'x', 'w*w' ) != Cut( 'y', 'y', 'w' )
+    print canonicalCut( '(a) && (a)' ), canonicalCut( '(c)||(c)' ), canonicalCut( '(x>1)&&(x>1)' ), canonicalCut( '!a && !a' )
+    print Cut( 'a', 'a', 'a&&a' ) != Cut( 'b', 'b', 'a' )
@@ -0,0 +1,217 @@
+"""@package CutIndex
+Per-event results of cuts stored as packed bitsets
+
+The index evaluates each cut once for all (preselected) entries of a dataset
+tree and persists the results in a numpy .npz file. The file name contains
+the md5 of the dataset, its friend trees and the preselection, the arrays are
+stored by the md5 of the canonical cut expression. Logical combinations of
+indexed cuts are calculated with bitwise operations without reading the tree
+again.
+
+Only cuts that evaluate to 0 or 1 for every entry are indexed. Cuts carrying
+a factor, i.e. "(pt>20)*sf", are multiplied into the weight by TTree::Draw
+and can not be represented by a single bit per entry.
+"""
+from plotting.Cut import Cut, canonicalCut, splitCanonicalCut
+from plotting.TreePlot import getColumnsFromTree
+import hashlib, logging, os
+
+class CutIndex( object ):
+    ## Index of the per-event results of cuts for one tree of a dataset
+    defaultDirectory = 'cutIndex'
+    defaultColumnsPerPass = 32     # number of cuts evaluated together in one TTree::Draw
+    logger = logging.getLogger( __name__ + '.CutIndex' )
+
+    def __init__( self, dataset, treeName=None, directory=None ):
+        ## Default constructor
+        #  @param dataset      the Dataset object
+        #  @param treeName     name of the tree (default is the nominal tree of the dataset)
+        #  @param directory    directory to store the index files
+        self.dataset = dataset
+        self.treeName = treeName if treeName else dataset.nominalSystematics.treeName
+        self.directory = directory if directory else self.defaultDirectory
+        self.columnsPerPass = self.defaultColumnsPerPass
+        self.nEntries = None
+        self.entries = None
+        self.bits = {}
+        self.nonLogical = set()
+        self._loadedFileName = None
+
+    def __repr__( self ):
+        return 'CutIndex(%s, %s)' % ( self.dataset.name, self.treeName )
+
+    @property
+    def fileName( self ):
+        ## file name of the index, depends on the dataset, the tree, its friend trees and the preselection
+        md5 = hashlib.md5()
+        md5.update( self.dataset.md5 )
+        md5.update( self.treeName )
+        md5.update( self.dataset.friendTreesMd5( self.treeName ) )
+        md5.update( self.dataset.preselection.md5 )
+        return os.path.join( self.directory, '%s_%s_%s.npz' % ( self.dataset.name, self.treeName, md5.hexdigest() ) )
+
+    def load( self ):
+        ## Read the index from disk if it exists and belongs to the current state of the dataset
+        #  @return True if an index was read
+        import numpy
+        fileName = self.fileName
+        if fileName == self._loadedFileName:
+            return True
+        self.bits = {}
+        self.nonLogical = set()
+        self.entries = None
+        self.nEntries = None
+        self._loadedFileName = fileName
+        if not os.path.exists( fileName ):
+            return False
+        with numpy.load( fileName ) as f:
+            for key in f.files:
+                if key == 'entries':
+                    self.entries = f[ key ]
+                elif key == 'nonLogical':
+                    self.nonLogical = set( f[ key ] )
+                else:
+                    self.bits[ key ] = f[ key ]
+        if self.entries is not None:
+            self.nEntries = len( self.entries )
+        self.logger.debug( 'load(): read %d cuts for %d entries from %s' % ( len(self.bits), self.nEntries or 0, fileName ) )
+        return True
+
+    def save( self ):
+        ## Write the index to disk
+        import numpy
+        if self.entries is None:
+            return
+        fileName = self.fileName
+        if not os.path.exists( self.directory ):
+            os.makedirs( self.directory )
+        arrays = dict( self.bits )
+        arrays[ 'entries' ] = self.entries
+        arrays[ 'nonLogical' ] = numpy.array( sorted( self.nonLogical ), dtype=str )
+        # write to a temporary file first, the file is only replaced when complete
+        tmpFileName = fileName[:-len('.npz')] + '.tmp.npz'
+        numpy.savez( tmpFileName, **arrays )
+        os.rename( tmpFileName, fileName )
+        self._loadedFileName = fileName
+        self.logger.debug( 'save(): wrote %d cuts for %d entries to %s' % ( len(self.bits), self.nEntries, fileName ) )
+
+    def isIndexed( self, cut ):
+        ## Check if the result of the given cut can be calculated from the index
+        #  This evaluates the cut, use getMask or getBits directly and catch the KeyError if the result is needed anyway.
+        #  @param cut    Cut object or cut expression
+        #  @return True if all parts of the cut are indexed
+        self.load()
+        try:
+            self._evaluate( canonicalCut( self._cutExpression( cut ) ) )
+        except KeyError:
+            return False
+        return True
+
+    def build( self, cuts, save=True ):
+        ## Evaluate all cuts that are not yet in the index
+        #  Cuts with values other than 0 and 1 are remembered as not indexable and are not evaluated again.
+        #  @param cuts    list of Cut objects or cut expressions
+        #  @param save    write the index to disk afterwards
+        import numpy
+        self.load()
+        missing = {}
+        for cut in cuts:
+            expression = self._cutExpression( cut )
+            canonical = canonicalCut( expression )
+            if not canonical or canonical == '1':
+                continue
+            key = hashlib.md5( canonical ).hexdigest()
+            if key not in self.bits and key not in self.nonLogical:
+                missing[ key ] = expression
+        if not missing and self.entries is not None:
+            return
+        tree = self.dataset._open( self.treeName )
+        if not tree:
+            return
+        keys = missing.keys()
+        expressions = [ missing[ key ] for key in keys ]
+        if self.entries is None:
+            # the entry numbers are needed to align the results of later passes
+            keys.insert( 0, 'entries' )
+            expressions.insert( 0, 'Entry$' )
+        for start in xrange( 0, len( keys ), self.columnsPerPass ):
+            passKeys = keys[ start:start+self.columnsPerPass ]
+            passExpressions = expressions[ start:start+self.columnsPerPass ]
+            self.dataset._trainTreeCache( tree, passExpressions )
+            columns = getColumnsFromTree( tree, passExpressions )[0]
+            for key, column in zip( passKeys, columns ):
+                if key == 'entries':
+                    self.entries = column.astype( numpy.int64 )
+                    self.nEntries = len( self.entries )
+                elif len( column ) != self.nEntries:
+                    raise RuntimeError( 'build(): number of evaluated entries (%d) does not match the index (%d) in %r' % ( len(column), self.nEntries, self ) )
+                elif numpy.all( ( column == 0 ) | ( column == 1 ) ):
+                    self.bits[ key ] = numpy.packbits( column != 0 )
+                else:
+                    # the value of the cut is a weight, a boolean would change the result
+                    self.logger.debug( 'build(): %r is not a logical expression, it is not indexed' % missing[ key ] )
+                    self.nonLogical.add( key )
+        self.logger.info( 'build(): indexed %d cuts for %d entries in %r' % ( len(missing), self.nEntries, self ) )
+        if save:
+            self.save()
+
+    def getBits( self, cut ):
+        ## Get the packed per-event results of the given cut
+        #  Combinations of indexed cuts with AND, OR and NOT are resolved using bitwise operations.
+        #  Cuts that are not purely logical, i.e. products with weights, are never indexed.
+        #  @param cut    Cut object or cut expression
+        #  @return packed bits (see numpy.packbits), raises KeyError if the cut is not indexed
+        self.load()
+        return self._evaluate( canonicalCut( self._cutExpression( cut ) ) )
+
+    def getMask( self, cut ):
+        ## Get the per-event results of the given cut
+        #  @param cut    Cut object or cut expression
+        #  @return boolean array aligned with the entries of the index, raises KeyError if the cut is not indexed
+        import numpy
+        return numpy.unpackbits( self.getBits( cut ) )[ :self.nEntries ].astype( bool )
+
+    def getCount( self, cut ):
+        ## Get the number of entries passing the given cut
+        #  @param cut    Cut object or cut expression
+        #  @return number of entries
+        import numpy
+        # the padding bits are always zero
+        return int( numpy.unpackbits( self.getBits( cut ) ).sum() )
+
+    def getEntryNumbers( self, cut ):
+        ## Get the entry numbers in the tree of all entries passing the given cut
+        #  @param cut    Cut object or cut expression
+        #  @return array of entry numbers
+        return self.entries[ self.getMask( cut ) ]
+
+    def _cutExpression( self, cut ):
+        ## helper method to get the expression from Cut objects and strings
+        if isinstance( cut, Cut ):
+            return cut.cut
+        return cut if cut else ''
+
+    def _allBits( self ):
+        ## helper method to get the packed bits of a cut that passes all entries
+        import numpy
+        if self.nEntries is None:
+            raise KeyError( 'index not built' )
+        return numpy.packbits( numpy.ones( self.nEntries, dtype=bool ) )
+
+    def _evaluate( self, canonical ):
+        ## helper method to resolve a canonical cut expression from the indexed cuts
+        import numpy
+        if not canonical or canonical == '1':
+            return self._allBits()
+        key = hashlib.md5( canonical ).hexdigest()
+        if key in self.bits:
+            return self.bits[ key ]
+        operator, operands = splitCanonicalCut( canonical )
+        if not operator:
+            raise KeyError( canonical )
+        results = [ self._evaluate( operand ) for operand in operands ]
+        if operator == '!':
+            # invert and clear the padding bits again
+            return numpy.bitwise_and( numpy.invert( results[0] ), self._allBits() )
+        combine = numpy.bitwise_and if operator == '&&' else numpy.bitwise_or
+        return reduce( combine, results )
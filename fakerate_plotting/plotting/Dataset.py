@@ -5,18 +5,24 @@ Helper class to store datasets and related quantities
 """
 
 from plotting.BasicPlot import BasicPlot
-from plotting.TreePlot import getValuesFromTree, create2DHistogramFromTree
+from plotting.TreePlot import getValuesFromTree, getColumnsFromTree, create2DHistogramFromTree
 from plotting.AtlasStyle import Style
+from plotting.ColumnCache import ColumnCache
 from plotting.Cut import Cut
+from plotting.CutIndex import CutIndex
+from plotting.DerivedColumns import DerivedColumn
 from plotting.HistogramStore import HistogramStore
+from plotting.QuantileSketch import QuantileSketch
+from plotting.ResolutionGraph import fillResolutionGraph
 from plotting.Tools import string2bool, overflowIntoLastBins, progressBarInt
-from plotting.Variable import createCutFlowVariable, VariableBinning, var_Yield
+from plotting.Variable import Variable, createCutFlowVariable, VariableBinning, var_Yield
 from plotting.Systematics import SystematicsSet, TreeSystematicVariation
 from plotting.CrossSectionDB import CrossSectionDB
-from plotting import DistributionTools
+from plotting.Singleton import Singleton
+from plotting import DistributionTools, NumpyBridge
 import plotting.Tools as Tools
 from copy import copy
-import logging, re, os, uuid, math, hashlib
+import logging, re, os, uuid, math, hashlib, weakref
 
 def findAllFilesInPath( pattern ):
     ## helper method to resolve regular expressions in file names
@@ -96,6 +102,13 @@ def getDatasetHistogramBinContent( dataset, histogramName, binIndex ):
             rootFile.Close()
     return result
 
+def enableAsyncPrefetching():
+    ## Helper method to switch on the asynchronous prefetching of TTreeCache blocks
+    #  Only has an effect on files that are opened after this call
+    from ROOT import gEnv
+    if not gEnv.GetValue( 'TFile.AsyncPrefetching', 0 ):
+        gEnv.SetValue( 'TFile.AsyncPrefetching', 1 )
+
 class SumOfWeightsCalculator( object ):
     ## Helper class to wrap sum of weight calculation
     
@@ -134,58 +147,107 @@ class HistogramBasedSumOfWeightsCalculator( SumOfWeightsCalculator ):
         dataset.logger.debug( 'HistogramBasedSumOfWeightsCalculator(): metadatahist=%s , binIndex=%g, sum of weights= %g' % ( self.histogramName,self.binIndex,self.sumOfWeights ) )
         return self.sumOfWeights
     
+@Singleton
+class TreeHandlePool( object ):
+    ## Shared pool of opened TChains. Trees that are used by several datasets, i.e. friend trees,
+    #  are only opened once and stay open until they are explicitly released.
+    logger = logging.getLogger( __name__ + '.TreeHandlePool' )
+    
+    def __init__( self ):
+        ## Default constructor
+        self.chains = {}
+    
+    def open( self, treeName, fileNames, indexNames=None ):
+        ## Get the TChain for the given tree in the given files. The chain is opened if necessary.
+        #  @param treeName         name of the tree in the files
+        #  @param fileNames        list of file names (patterns are resolved)
+        #  @param indexNames       optional (major, minor) expressions used to build an index on the chain
+        #  @return the TChain or None if no file was found
+        key = ( treeName, tuple( fileNames ), tuple( indexNames ) if indexNames else () )
+        if self.chains.has_key( key ):
+            return self.chains[ key ]
+        from ROOT import TChain
+        tree = TChain( treeName )
+        nFiles = 0
+        for fileNamePattern in fileNames:
+            for fileName in findAllFilesInPath( fileNamePattern ):
+                nFiles += tree.Add( fileName )
+        if not nFiles:
+            self.logger.warning( 'open(): found no files for "%s" in %r' % ( treeName, fileNames ) )
+            return None
+        # update the estimate for this TChain, needed for proper use of GetSelectedRows
+        tree.SetEstimate( tree.GetEntries() + 1 )
+        if indexNames:
+            tree.BuildIndex( *indexNames )
+        self.logger.debug( 'open(): opened %d files with %d entries for "%s" from %r' % ( nFiles, tree.GetEntries(), treeName, fileNames ) )
+        self.chains[ key ] = tree
+        return tree
+    
+    def release( self, fileName=None ):
+        ## Release all chains reading from the given file, i.e. before the file is rewritten
+        #  @param fileName         name of the file, releases all chains if not set
+        for key in self.chains.keys():
+            if fileName is None or fileName in key[1]:
+                self.logger.debug( 'release(): releasing "%s" from %r' % ( key[0], key[1] ) )
+                del self.chains[ key ]
+    
 class FriendTree( object ):
     ## container class to store friend tree
     logger = logging.getLogger( __name__ + '.FriendTree' )
     
-    def __init__( self, treeName, fileNames, alias='', systematicVariations=[] ):
+    def __init__( self, treeName, fileNames, alias='', systematicVariations=[], indexNames=None, fingerprint=None ):
         ## Default constructor
         #  @param fileNames        list of fileNames
         #  @param treeName         name of the friend tree in the files
         #  @param alias            alias of the friend tree (use in case of clash with main tree)
         #  @systematicVariation    define for which tree systematics this friend tree should be used (empty list is used for all)
+        #  @param indexNames       optional (major, minor) names, i.e. ('run_number', 'event_number'), to align the friend by index instead of entry
+        #  @param fingerprint      optional fingerprint of the content, i.e. of generated decoration trees
         self.fileNames = fileNames
         self.treeName = treeName
         self.alias = alias
         self.systematicVariations = systematicVariations
+        self.indexNames = indexNames
+        self.fingerprint = fingerprint
         self.tree = None
+    
+    @property
+    def md5( self ):
+        ## hash value of the friend tree definition, changes if the friend tree or its content changes
+        md5 = hashlib.md5()
+        md5.update( self.treeName )
+        md5.update( self.alias )
+        for fileName in self.fileNames:
+            md5.update( fileName )
+        md5.update( str(self.indexNames) )
+        md5.update( str(self.fingerprint) )
+        return md5.hexdigest()
+    
+    def isUsedFor( self, treeName ):
+        ## Check if this friend tree should be added to the tree with the given name
+        if not self.systematicVariations:
+            return True
+        for variation in self.systematicVariations:
+            if treeName == variation.treeName:
+                return True
+        return False
         
     def _open( self ):
-        ## Helper method to open all files
- #       import os
- #       os.system("lsof | grep '/Users/Eric/runII/hadhad/plots/v17/170522_testZttDecor/decorationsZtt.root' | wc ")
- #       print "Opening friendTree", self.treeName,self.fileNames
-        from ROOT import TChain
-        self.tree = TChain( self.treeName )
-        nFiles = 0
-        for fileNamePattern in self.fileNames:
-            for fileName in findAllFilesInPath( fileNamePattern ):
-                nFiles += self.tree.Add( fileName )
-        if nFiles:
-            # update the estimate for this TChain, needed for proper use of GetSelectedRows
-            self.tree.SetEstimate( self.tree.GetEntries() + 1 )
-            self.logger.debug( '_open(): opened %d files with %d entries from %r' % ( nFiles, self.tree.GetEntries(), self.fileNames ) )
-        else:
+        ## Helper method to get the chain of all files from the shared TreeHandlePool
+        self.tree = TreeHandlePool.get().open( self.treeName, self.fileNames, self.indexNames )
+        if not self.tree:
             self.logger.warning( '_open(): found no files for %r in %r' % ( self, self.fileNames ) )
     
     def _close( self ):
-        ## Delete the link to the tree allowing the underlying file to be closed
-        #  The file might still open if other trees or other references to this tree are stored elsewhere
-        if self.tree:
-            del self.tree
+        ## Delete the link to the tree. The chain itself stays open in the TreeHandlePool
+        self.tree = None
     
     def addTo( self, tree ):
         ## Add this tree as a friend to the given tree
         treeName = tree.GetName()
         # check if this tree is a suitable friend for this systematic variation
-        if self.systematicVariations:
-            use = False
-            for variation in self.systematicVariations:
-                if treeName == variation.treeName:
-                    use = True
-                    break
-            if not use:
-                return
+        if not self.isUsedFor( treeName ):
+            return
         if not self.tree:
             self._open()
         if not self.tree:
@@ -193,8 +255,8 @@ class FriendTree( object ):
         self.logger.debug( '_addTo(): adding "%s" as friend tree to "%s"' % ( self.treeName, treeName ) )
         tree.AddFriend( self.tree, self.alias )
         
-# store all available datasets
-DATASETS={}   
+# store all available datasets, only weak references are kept to not prevent their deletion
+DATASETS=weakref.WeakValueDictionary()
 
 class Dataset( object ):
     ## Container class for a dataset and associated information. Datasets are opened as TChains
@@ -202,6 +264,11 @@ class Dataset( object ):
     defaultSumOfEventsCalculator = HistogramBasedSumOfWeightsCalculator( 'h_metadata', 7 )
     defaultSumOfWeightsCalculator = HistogramBasedSumOfWeightsCalculator( 'h_metadata', 8 )
     defaultSumOfWeightsSquaredCalculator = HistogramBasedSumOfWeightsCalculator( 'h_metadata', 9 )
+    defaultTreeCacheSize = 30 * 1024 * 1024     # bytes, use 0 to disable the TTreeCache
+    defaultAsyncPrefetching = True
+    defaultUseCutIndex = False                  # answer cutflows from the persisted CutIndex if all cuts are indexed
+    defaultColumnCache = None                   # ColumnCache shared by all datasets, i.e. ColumnCache( 2*1024**3, 'columnCache' )
+    defaultEntriesPerChunk = 1000000            # entries read per TTree::Draw when streaming values, i.e. into a QuantileSketch
     logger = logging.getLogger( __name__ + '.Dataset' )
     
     def __init__( self, name, title='',fileNames=[], treeName='NOMINAL', style=None, weightExpression='', crossSection=1., kFactor=1., isData=False, isSignal=False, isBSMSignal=False,titleLatex=''):
@@ -220,6 +287,13 @@ class Dataset( object ):
         self.openTrees = {}
         self.keepTreesInMemory = False
         self.treeEntryLists = {}
+        self.cachedSelections = []
+        self.selectionEntryLists = {}
+        self.cutIndices = {}
+        self.useCutIndex = self.defaultUseCutIndex
+        self.columnCache = self.defaultColumnCache
+        self.derivedColumns = {}
+        self.derivedTrees = {}
         self.name = name
         self.scaleFactors = {}
         self.scaleFactorsUncertainty = {}
@@ -239,6 +313,9 @@ class Dataset( object ):
         self.addCuts = []
         self.replaceVariables = {}
         self.histogramStore = self.defaultHistogramStore
+        self.treeCacheSize = self.defaultTreeCacheSize
+        self.entriesPerChunk = self.defaultEntriesPerChunk
+        self.asyncPrefetching = self.defaultAsyncPrefetching
         self.sumOfEventsCalculator = copy( self.defaultSumOfEventsCalculator )
         self.sumOfWeightsCalculator = copy( self.defaultSumOfWeightsCalculator )
         self.sumOfWeightsSquaredCalculator = copy( self.defaultSumOfWeightsSquaredCalculator )
@@ -250,6 +327,7 @@ class Dataset( object ):
         # internals
         self._dsid = 0
         self._hashFileNames = None
+        self._sharedValues = {}
         
     def copy( self, name, title):
         ## create a copy of this dataset with the given name and title
@@ -267,6 +345,8 @@ class Dataset( object ):
         dataset.ignoreCuts = copy(self.ignoreCuts)
         dataset.addCuts = copy(self.addCuts)
         dataset.systematicsSet = copy(self.systematicsSet)
+        dataset.derivedColumns = self.derivedColumns.copy()
+        dataset.derivedTrees = {}
         return dataset
 
     @classmethod
@@ -287,7 +367,7 @@ class Dataset( object ):
     @classmethod
     def fromXML( cls, element ):
         ## Constructor from an XML element
-        #  <Dataset name="" title="" treeName="" isData="" isSignal="" crossSection="" kFactor="" dsid="">
+        #  <Dataset name="" title="" treeName="" isData="" isSignal="" crossSection="" kFactor="" dsid="" treeCacheSize="">
         #    <Style color="5"/>
         #    <File> File1 </File>
         #    <File> File2 </File>
@@ -304,8 +384,9 @@ class Dataset( object ):
         #  @return the HistogramStore object
         attributes = element.attrib
         name = attributes[ 'name' ]
-        if DATASETS.has_key( name ):
-            return DATASETS[name]
+        dataset = DATASETS.get( name )
+        if dataset is not None:
+            return dataset
         dataset = cls( name )
         if attributes.has_key( 'title' ):
             dataset.title = attributes['title']
@@ -325,6 +406,8 @@ class Dataset( object ):
             dataset.weightExpression = attributes['weightExpression']
         if attributes.has_key( 'dsid' ):
             dataset.dsid = int( attributes['dsid'] )
+        if attributes.has_key( 'treeCacheSize' ):
+            dataset.treeCacheSize = int( attributes['treeCacheSize'] )
         dataset.style = Style.fromXML( element.find( 'Style' ) ) if element.find( 'Style' ) is not None else None
         for fileElement in element.findall( 'File' ):
             dataset.fileNames.append( fileElement.text.strip() )
@@ -379,12 +462,25 @@ class Dataset( object ):
             h.update( self.weightExpression )
         return h.hexdigest()
 
+    def friendTreesMd5( self, treeName ):
+        ## hash value of all friend trees added to the given tree
+        #  Cached columns and cut results depend on these as expressions can read friend branches.
+        #  @param treeName    name of the tree
+        #  @return md5 hex digest
+        md5 = hashlib.md5()
+        for friend in self.friendTrees:
+            if friend.isUsedFor( treeName ):
+                md5.update( friend.md5 )
+        return md5.hexdigest()
+
     def _open( self, treeName=None ):
         ## Read the files into the TChain. Automatically called when trying to create a histogram
         if not treeName:
             treeName = self.nominalSystematics.treeName
         if self.openTrees.has_key( treeName ):
             return self.openTrees[ treeName ]
+        if self.asyncPrefetching:
+            enableAsyncPrefetching()
         from ROOT import TChain
         tree = TChain( treeName )
         nFiles = 0
@@ -394,6 +490,9 @@ class Dataset( object ):
         if nFiles>0:
             # update the estimate for this TChain, needed for proper use of GetSelectedRows
             tree.SetEstimate( tree.GetEntries() + 1 )
+            # the cache is recreated by the TChain for every file but keeps size and trained branches
+            if self.treeCacheSize:
+                tree.SetCacheSize( self.treeCacheSize )
             if self.keepTreesInMemory:
                 self.openTrees[ treeName ] = tree
             self._applyPreselectionToTree( tree )
@@ -410,12 +509,47 @@ class Dataset( object ):
         if self.openTrees.has_key( treeName ):
             del self.openTrees[ treeName ]
         for fTree in self.friendTrees:
-          if fTree.tree:
-            fTree.tree.GetCurrentFile().Close()
-          fTree.tree=None
-          #del fTree
+            fTree._close()
 
         
+    def _trainTreeCache( self, tree, expressions ):
+        ## helper method to restrict the TTreeCache to the branches used in the given expressions
+        #  Without training the cache learns the used branches from the first entries read.
+        #  Derived columns used in the expressions are attached to the tree first.
+        #  @param tree           the TChain to configure
+        #  @param expressions    list of expressions (strings or Cut objects) evaluated in the next draw
+        if tree and self.derivedColumns:
+            self._attachDerivedColumns( tree, expressions )
+        if not tree or not self.treeCacheSize:
+            return
+        branchNames = set()
+        for expression in expressions:
+            expression = getattr( expression, 'cut', expression )
+            if not expression:
+                continue
+            for token in re.findall( r'[A-Za-z_]\w*(?:\.\w+)*', str(expression) ):
+                if token not in branchNames and token not in self.derivedColumns and tree.GetBranch( token ):
+                    branchNames.add( token )
+        if not branchNames:
+            return
+        for branchName in branchNames:
+            tree.AddBranchToCache( branchName, True )
+        tree.StopCacheLearningPhase()
+        self.logger.debug( '_trainTreeCache(): caching %d branches for %s in %r: %s' % ( len(branchNames), tree.GetName(), self, ', '.join( sorted( branchNames ) ) ) )
+
+    def _logTreeCacheStatistics( self, tree ):
+        ## helper method to report the TTreeCache performance of the current file in the given tree
+        if not tree or not self.treeCacheSize or not self.logger.isEnabledFor( logging.DEBUG ):
+            return
+        currentFile = tree.GetCurrentFile()
+        if not currentFile:
+            return
+        cache = tree.GetReadCache( currentFile )
+        if not cache:
+            self.logger.debug( '_logTreeCacheStatistics(): no TTreeCache attached to %s in %r' % ( tree.GetName(), self ) )
+            return
+        self.logger.debug( '_logTreeCacheStatistics(): %s in %r: efficiency=%.3f, relative efficiency=%.3f, read calls=%d, bytes read=%d from %s' % ( tree.GetName(), self, cache.GetEfficiency(), cache.GetEfficiencyRel(), currentFile.GetReadCalls(), currentFile.GetBytesRead(), currentFile.GetName() ) )
+
     def _applyPreselectionToTree( self, tree ):
         ## helper method to apply preselection using TEntryList
         treeName = tree.GetName()
@@ -439,6 +573,42 @@ class Dataset( object ):
         if entryList:
             tree.SetEntryList( entryList )
     
+    def _getSelectionEntryList( self, tree, selection ):
+        ## helper method to get the TEntryList of a cached selection, created on first use
+        #  The list is created on top of the preselection, i.e. it contains only preselected entries.
+        treeName = tree.GetName()
+        key = ( treeName, selection.md5 )
+        if self.selectionEntryLists.has_key( key ):
+            return self.selectionEntryLists[ key ]
+        listName = 'entryList_%s_%s_%s' % ( treeName, self.name, selection.md5 )
+        self._trainTreeCache( tree, [selection] )
+        tree.Draw( '>>' + listName, selection.cut, 'entrylist' )
+        from ROOT import gDirectory
+        entryList = gDirectory.Get( listName )
+        self.selectionEntryLists[ key ] = entryList
+        if entryList:
+            self.logger.debug( '_getSelectionEntryList(): cached %d entries passing %r for %s in %r' % ( entryList.GetN(), selection, treeName, self ) )
+        return entryList
+
+    def _applySelectionCacheToTree( self, tree, cut ):
+        ## helper method to restrict the tree to the entries of the tightest cached selection containing the given cut
+        #  Use _applyPreselectionToTree to restore the preselection afterwards.
+        #  @param tree    the TChain that is going to be drawn
+        #  @param cut     the Cut object that is going to be applied
+        #  @return True if an entry list of a cached selection was applied
+        if not tree or not self.cachedSelections:
+            return False
+        candidates = [ selection for selection in self.cachedSelections if cut.isSubset( selection ) ]
+        if not candidates:
+            return False
+        selection = max( candidates, key=lambda candidate: len( candidate.conjunctionTerms ) )
+        entryList = self._getSelectionEntryList( tree, selection )
+        if not entryList:
+            return False
+        self.logger.debug( '_applySelectionCacheToTree(): evaluating %r only on entries passing %r in %r' % ( cut, selection, self ) )
+        tree.SetEntryList( entryList )
+        return True
+
     def _determineVariable( self, variable ):
         ## helper method to determine the final variable to use
         if self.replaceVariables.has_key( variable ):
@@ -455,9 +625,9 @@ class Dataset( object ):
         return cut
     
     def _register( self, oldName='' ):
-        if oldName and DATASETS.has_key( oldName ) and DATASETS[ oldName ] == self:
+        if oldName and DATASETS.get( oldName ) is self:
             del DATASETS[ oldName ]
-        if DATASETS.has_key( self.name ) and  DATASETS[ self.name ] is not self:
+        if DATASETS.get( self.name, self ) is not self:
             self.logger.warning( 'name(): registering a Dataset with an already existing name: "%s"' % self.name )
         DATASETS[ self.name ] = self
     
@@ -578,6 +748,8 @@ class Dataset( object ):
         self._preselection = cut
         # remove all stored TEntryLists
         self.treeEntryLists.clear()
+        self.selectionEntryLists.clear()
+        self.derivedTrees.clear()
         # apply the preselection to all open trees
         for tree in self.openTrees.itervalues():
             self._applyPreselectionToTree( tree )
@@ -609,6 +781,183 @@ class Dataset( object ):
         except TypeError:
             self.systematicsSet.add( systematics )
             
+    def addSelectionCache( self, cut ):
+        ## Cache the entries passing the given selection in a TEntryList.
+        #  Any cut that is a refinement of this selection (see Cut.isSubset) is only evaluated on these entries.
+        #  @param cut    the Cut object to cache
+        if cut not in self.cachedSelections:
+            self.cachedSelections.append( cut )
+    
+    def clearSelectionCaches( self ):
+        ## Remove all cached selections and their TEntryLists
+        del self.cachedSelections[:]
+        self.selectionEntryLists.clear()
+    
+    def getCutIndex( self, treeName=None ):
+        ## Get the CutIndex storing the per-event results of cuts for the given tree
+        #  @param treeName    name of the tree (default is the nominal tree)
+        #  @return the CutIndex object
+        treeName = treeName if treeName else self.nominalSystematics.treeName
+        if not self.cutIndices.has_key( treeName ):
+            self.cutIndices[ treeName ] = CutIndex( self, treeName )
+        return self.cutIndices[ treeName ]
+    
+    def buildCutIndex( self, cuts, treeName=None ):
+        ## Evaluate the given cuts once and store the results in the CutIndex
+        #  @param cuts        list of Cut objects or cut expressions
+        #  @param treeName    name of the tree (default is the nominal tree)
+        self.getCutIndex( treeName ).build( cuts )
+
+    def getColumns( self, expressions, treeName=None ):
+        ## Get the values of the given expressions for all preselected entries of the given tree
+        #  Columns are taken from the ColumnCache if possible. All missing expressions are evaluated
+        #  together in as few passes over the tree as possible and added to the cache.
+        #  @param expressions    list of expressions
+        #  @param treeName       name of the tree (default is the nominal tree)
+        #  @return list of arrays (one per expression) or None if an expression does not have exactly one value per entry
+        import numpy
+        treeName = treeName if treeName else self.nominalSystematics.treeName
+        cache = self.columnCache if self.columnCache is not None else ColumnCache( 0 )
+        keys = dict( ( expression, cache.key( self, treeName, expression ) ) for expression in expressions )
+        columns = {}
+        missing = []
+        for expression in expressions:
+            if expression in columns or expression in missing:
+                continue
+            if expression in self.derivedColumns:
+                column = self._getDerivedColumn( self.derivedColumns[expression], treeName, cache )
+                if column is None:
+                    return None
+                columns[expression] = column
+                continue
+            column = cache.get( keys[expression] )
+            if column is None:
+                missing.append( expression )
+            else:
+                columns[expression] = column
+        if missing:
+            tree = self._open( treeName )
+            if not tree:
+                return None
+            nEntries = tree.GetEntryList().GetN() if tree.GetEntryList() else tree.GetEntries()
+            for start in xrange( 0, len( missing ), cache.columnsPerPass ):
+                passExpressions = missing[ start:start+cache.columnsPerPass ]
+                self._trainTreeCache( tree, passExpressions )
+                # the entry numbers reveal expressions with none or several values per entry
+                passColumns = getColumnsFromTree( tree, ['Entry$'] + passExpressions )[0]
+                entries = passColumns[0]
+                if len( entries ) != nEntries or ( numpy.diff( entries ) <= 0 ).any():
+                    self.logger.debug( 'getColumns(): %r do not have exactly one value per entry in %r' % ( passExpressions, self ) )
+                    self._close( treeName )
+                    return None
+                for expression, column in zip( passExpressions, passColumns[1:] ):
+                    columns[expression] = column
+                    cache.put( keys[expression], column )
+            self._logTreeCacheStatistics( tree )
+            self._close( treeName )
+            self.logger.debug( 'getColumns(): evaluated %d of %d expressions for %d entries of %s in %r' % ( len(missing), len(expressions), nEntries, treeName, self ) )
+        return [ columns[expression] for expression in expressions ]
+
+    def defineColumn( self, name, kernel, *inputs ):
+        ## Define a derived column calculated from other expressions with a vectorised kernel
+        #  The column can be used by name in Cut and Variable expressions like any branch, but not in the preselection.
+        #  It is calculated once for all preselected entries and stored in the ColumnCache.
+        #  @param name      name of the new column
+        #  @param kernel    function calculating the column from one array per input, see plotting.DerivedColumns
+        #  @param inputs    input expressions (or names of other derived columns) passed to the kernel
+        #  @return the DerivedColumn object
+        derivedColumn = DerivedColumn( name, kernel, inputs )
+        self.derivedColumns[ name ] = derivedColumn
+        # a redefined column has to be filled again
+        self.derivedTrees.clear()
+        return derivedColumn
+
+    def _getDerivedColumn( self, derivedColumn, treeName, cache ):
+        ## helper method to get the values of a derived column for all preselected entries
+        key = cache.key( self, treeName, derivedColumn.expression )
+        column = cache.get( key )
+        if column is None:
+            inputs = self.getColumns( derivedColumn.inputs, treeName )
+            if inputs is None:
+                self.logger.warning( '_getDerivedColumn(): inputs of %r do not have exactly one value per entry in %r' % ( derivedColumn, self ) )
+                return None
+            column = derivedColumn.evaluate( inputs )
+            cache.put( key, column )
+            self.logger.debug( '_getDerivedColumn(): calculated %s for %d entries of %s in %r' % ( derivedColumn.expression, len(column), treeName, self ) )
+        return column
+
+    def _attachDerivedColumns( self, tree, expressions ):
+        ## helper method to make the derived columns used in the given expressions available to TTree::Draw
+        #  The columns are filled into an in-memory tree which is added as friend. Entries outside of
+        #  the preselection are set to 0.
+        import numpy
+        treeName = tree.GetName()
+        names = set()
+        for expression in expressions:
+            expression = getattr( expression, 'cut', expression )
+            if expression:
+                names.update( token for token in re.findall( r'[A-Za-z_]\w*', str(expression) ) if token in self.derivedColumns )
+        if not names:
+            return
+        derivedTree = self.derivedTrees.get( treeName )
+        if not derivedTree:
+            from ROOT import TTree
+            derivedTree = TTree( 'derived_%s_%s' % ( treeName, self.name ), 'derived columns of %s' % self.name )
+            derivedTree.SetDirectory( 0 )
+            self.derivedTrees[ treeName ] = derivedTree
+        for name in names:
+            if derivedTree.GetBranch( name ):
+                continue
+            columns = self.getColumns( ['Entry$', name], treeName )
+            if columns is None:
+                continue
+            values = numpy.zeros( tree.GetEntries() )
+            values[ columns[0].astype( numpy.int64 ) ] = columns[1]
+            NumpyBridge.fillBranch( derivedTree, name, values )
+        friends = tree.GetListOfFriends()
+        if not friends or not friends.FindObject( derivedTree.GetName() ):
+            tree.AddFriend( derivedTree )
+
+    def _getSelectedColumns( self, expressions, cut, weightExpression, treeName ):
+        ## helper method to get the values of the given expressions and the weights for all entries passing the cut from the ColumnCache
+        #  Entries are selected like in TTree::Draw, i.e. the cut is multiplied with the weight and entries with zero weight are dropped.
+        #  The result of the cut is taken from the CutIndex if it is used and the cut is indexed.
+        #  @return list of arrays (one per expression), array of weights or None if the columns are not available
+        import numpy
+        if self.columnCache is None:
+            return None
+        cutExpression = cut.cut if cut else ''
+        weightExpression = getattr( weightExpression, 'cut', weightExpression )
+        mask = None
+        requested = list( expressions )
+        if cutExpression:
+            if self.useCutIndex:
+                cutIndex = self.getCutIndex( treeName )
+                try:
+                    mask = cutIndex.getMask( cutExpression )
+                except KeyError:
+                    # the cut is evaluated from the tree instead
+                    pass
+            if mask is None:
+                requested.append( cutExpression )
+        if weightExpression:
+            requested.append( weightExpression )
+        if not requested:
+            return None
+        columns = self.getColumns( requested, treeName )
+        if columns is None:
+            return None
+        weights = numpy.ones( len( columns[0] ) )
+        if mask is not None:
+            if len( mask ) != len( weights ):
+                self.logger.warning( '_getSelectedColumns(): %r does not match the entries of %r' % ( cutIndex, self ) )
+                return None
+            weights *= mask
+        for column in columns[len(expressions):]:
+            weights *= column
+        selected = weights != 0
+        return [ column[selected] for column in columns[:len(expressions)] ], weights[selected]
+
     def addFriendTree( self, friendTree ):
         ## Add a FriendTree object to this dataset
         self.friendTrees.append( friendTree )
@@ -750,12 +1099,14 @@ class Dataset( object ):
         systematicsSet = self.systematicsSet.union( systematicsSet ) if systematicsSet else self.systematicsSet
         if ignoreDataWeight and self.isData:
             weightExpression = self.weightExpression
+        appliedCut = cut if ignoreWeights else self._determineCut( cut )
         if ignoreWeights: 
-            selection = cut.cut
+            appliedWeight = Cut()
         elif ignoreSF:
-            selection = ( self._determineCut(cut) * weightExpression ).cut
+            appliedWeight = Cut() * weightExpression
         else: 
-            selection= ( self._determineCut(cut) * weightExpression * systematicsSet.totalWeight( systematicVariation ) ).cut
+            appliedWeight = Cut() * weightExpression * systematicsSet.totalWeight( systematicVariation )
+        selection = ( appliedCut * appliedWeight ).cut
         
         expression = selection
         if ignoreWeights or ignoreSF:
@@ -772,7 +1123,16 @@ class Dataset( object ):
                 return tree.GetEntryList().GetN() * scaleFactor
             return self.entries * scaleFactor
         
-        weights = getValuesFromTree( tree, expression, selection )[1]
+        selectedColumns = self._getSelectedColumns( [], appliedCut, appliedWeight, systematicVariation.treeName )
+        if selectedColumns:
+            weights = selectedColumns[1]
+        else:
+            restricted = self._applySelectionCacheToTree( tree, appliedCut )
+            self._trainTreeCache( tree, [expression] )
+            weights = getValuesFromTree( tree, expression, selection )[1]
+            self._logTreeCacheStatistics( tree )
+            if restricted:
+                self._applyPreselectionToTree( tree )
         # FIXME: this is actually not correct, need to treat it as efficiency
         totalYield, uncertainty = DistributionTools.sumOfWeights( weights )
         self.logger.debug( 'getYield(): total yield=%g, total SF=%g, sum of weights=%g, weightExpression= %s' % (totalYield, scaleFactor, self.sumOfWeights, self.weightExpression) )
@@ -798,16 +1158,89 @@ class Dataset( object ):
         #  @param systematicVariation  SytematicVariation object defining the tree name and potential additional weights
         #  @param systematicsSet       additional systematics that should be considered
         #  @return (values, weights)
+        result = self.getValuesOfVariables( [xVar], cut, weightExpression, luminosity, systematicVariation, systematicsSet )
+        if result is None:
+            return
+        return result[0][0], result[1]
+    
+    def getQuantileSketch( self, xVar, cut=None, weightExpression=None, luminosity=1., systematicVariation=None, systematicsSet=None, sketch=None ):
+        ## Fills the weighted values of a given variable and selection into a QuantileSketch
+        #  The tree is read in chunks of entriesPerChunk entries, i.e. the memory does not grow with the size of the dataset.
+        #  @param xVar                 Variable object defining which values should be calculated
+        #  @param cut                  Cut object that defines the applied cut
+        #  @param weightExpression     weight expression (overrides the default weight expression)
+        #  @param luminosity           global scale factor, i.e. integrated luminosity, not applied for data
+        #  @param systematicVariation  SytematicVariation object defining the tree name and potential additional weights
+        #  @param systematicsSet       additional systematics that should be considered
+        #  @param sketch               QuantileSketch to fill (default creates a new one)
+        #  @return the QuantileSketch or None if the selected entries have negative weights
         weightExpression = weightExpression if weightExpression else self.weightExpression
         systematicVariation = systematicVariation if systematicVariation else self.nominalSystematics
         systematicsSet = self.systematicsSet.union( systematicsSet ) if systematicsSet else self.systematicsSet
-        cut = self._determineCut( cut ) * weightExpression * systematicsSet.totalWeight( systematicVariation ).cut
+        sketch = sketch if sketch is not None else QuantileSketch()
+        selection = self._determineCut( cut )
+        weight = Cut() * weightExpression * systematicsSet.totalWeight( systematicVariation )
+        cut = selection * weight
         xVar = self._determineVariable( xVar )
-        self.logger.debug( 'getValues(): getting values for %r with cut=%r and sytematics=%r from %r' % (xVar, cut, systematicVariation, self) )
+        self.logger.debug( 'getQuantileSketch(): filling values for %r with cut=%r and sytematics=%r from %r' % (xVar, cut, systematicVariation, self) )
+        sF = self.combinedScaleFactors * systematicsSet.totalScaleFactor( systematicVariation, cut )
+        if not self.isData:
+            sF *= luminosity
+        selectedColumns = self._getSelectedColumns( [xVar.command], selection, weight, systematicVariation.treeName )
+        if selectedColumns:
+            try:
+                sketch.add( selectedColumns[0][0], selectedColumns[1] * sF )
+            except ValueError as error:
+                self.logger.error( 'getQuantileSketch(): unable to fill %r from %r: %s' % ( xVar, self, error ) )
+                return None
+            return sketch
         tree = self._open( systematicVariation.treeName )
         if not tree:
-            return
-        values, weights = getValuesFromTree( tree, xVar.command, cut.cut )
+            return sketch
+        restricted = self._applySelectionCacheToTree( tree, selection )
+        self._trainTreeCache( tree, [xVar.command, cut] )
+        try:
+            for firstEntry in xrange( 0, tree.GetEntries(), self.entriesPerChunk ):
+                values, weights = getValuesFromTree( tree, xVar.command, cut.cut, self.entriesPerChunk, firstEntry )
+                sketch.add( values, weights * sF )
+        except ValueError as error:
+            self.logger.error( 'getQuantileSketch(): unable to fill %r from %r: %s' % ( xVar, self, error ) )
+            sketch = None
+        self._logTreeCacheStatistics( tree )
+        if restricted:
+            self._applyPreselectionToTree( tree )
+        return sketch
+    
+    def getValuesOfVariables( self, xVars, cut=None, weightExpression=None, luminosity=1., systematicVariation=None, systematicsSet=None ):
+        ## Gets the values of several variables and the weights for a given selection in a single pass
+        #  @param xVars                list of Variable objects defining which values should be calculated
+        #  @param cut                  Cut object that defines the applied cut
+        #  @param weightExpression     weight expression (overrides the default weight expression)
+        #  @param luminosity           global scale factor, i.e. integrated luminosity, not applied for data
+        #  @param systematicVariation  SytematicVariation object defining the tree name and potential additional weights
+        #  @param systematicsSet       additional systematics that should be considered
+        #  @return (list of values, weights), the values are ordered like xVars
+        weightExpression = weightExpression if weightExpression else self.weightExpression
+        systematicVariation = systematicVariation if systematicVariation else self.nominalSystematics
+        systematicsSet = self.systematicsSet.union( systematicsSet ) if systematicsSet else self.systematicsSet
+        selection = self._determineCut( cut )
+        weight = Cut() * weightExpression * systematicsSet.totalWeight( systematicVariation )
+        cut = selection * weight
+        commands = [ self._determineVariable( xVar ).command for xVar in xVars ]
+        self.logger.debug( 'getValuesOfVariables(): getting values for %r with cut=%r and sytematics=%r from %r' % (xVars, cut, systematicVariation, self) )
+        selectedColumns = self._getSelectedColumns( commands, selection, weight, systematicVariation.treeName )
+        if selectedColumns:
+            values, weights = selectedColumns
+        else:
+            tree = self._open( systematicVariation.treeName )
+            if not tree:
+                return
+            restricted = self._applySelectionCacheToTree( tree, selection )
+            self._trainTreeCache( tree, commands + [cut] )
+            values, weights = getColumnsFromTree( tree, commands, cut.cut )
+            self._logTreeCacheStatistics( tree )
+            if restricted:
+                self._applyPreselectionToTree( tree )
         sF = self.combinedScaleFactors * systematicsSet.totalScaleFactor( systematicVariation, cut )
         if not self.isData:
             sF *= luminosity
@@ -835,23 +1268,12 @@ class Dataset( object ):
         self.logger.debug( 'getHistogram(): creating histogram for var=%r with cut=%r and syst=%r from %r' % (xVar, cut, systematicVariation, self) )
         title = title if title else self.title
         style = style if style else self.style
-        weightExpression = weightExpression if weightExpression else self.weightExpression
-        if ignoreDataWeight and self.isData:
-            weightExpression = self.weightExpression
-        
-        cut = self._determineCut( cut )
+        cut, weightExpression, systematicVariation, systematicsSet, storeSystematicVariation = self._resolveWeightAndSystematics( cut, weightExpression, systematicVariation,
+                                                                                                                               systematicsSet, ignoreDataWeight )
         xVar = self._determineVariable( xVar )
         
-        systematicVariation = systematicVariation if systematicVariation else self.nominalSystematics
-        systematicsSet = self.systematicsSet.union( systematicsSet ) if systematicsSet else self.systematicsSet
-        systematics = systematicVariation.systematics
-        if not systematics or systematics not in systematicsSet:
-            systematicVariation = self.nominalSystematics
-        
         # try to get the histogram from the store
         hist = None
-
-        storeSystematicVariation = systematicVariation if systematicVariation.isShapeSystematics else self.nominalSystematics
         if self.histogramStore:
             hist = self.histogramStore.getHistogram( self, storeSystematicVariation, xVar, cut )
             if hist:
@@ -860,12 +1282,17 @@ class Dataset( object ):
         
         # create the histogram if necessary
         if not hist or recreate:
-            tree = self._open( systematicVariation.treeName )
-            if not tree:
-                return
-            # include the weights from systematics
-            weightExpression *= systematicsSet.totalWeight( systematicVariation, cut)
-            hist = xVar.createHistogramFromTree( tree, title, cut, weightExpression, drawOption, style )
+            hist = self._createHistogramFromColumns( xVar, title, cut, weightExpression, drawOption, style, systematicVariation.treeName )
+            if hist is None:
+                tree = self._open( systematicVariation.treeName )
+                if not tree:
+                    return
+                restricted = self._applySelectionCacheToTree( tree, cut )
+                self._trainTreeCache( tree, [xVar.command, xVar.defaultCut, cut, weightExpression] + getattr( xVar, 'expressions', [] ) )
+                hist = xVar.createHistogramFromTree( tree, title, cut, weightExpression, drawOption, style )
+                self._logTreeCacheStatistics( tree )
+                if restricted:
+                    self._applyPreselectionToTree( tree )
             #print self.name, hist.Integral()
             if hist and self.sumOfWeights and hist.Integral(0, hist.GetNbinsX()+1) and not self.isData:
                 hist.Scale( 1. / self.sumOfWeights )
@@ -895,6 +1322,126 @@ class Dataset( object ):
         self._close(systematicVariation.treeName)
         return hist
     
+    def getHistograms( self, xVars, title=None, cut=None, weightExpression=None, drawOption='', style=None, luminosity=1., recreate=False,
+                       systematicVariation=None, includeOverflowBins=False, ignoreDataWeight=False, systematicsSet=None, forceBinning=False ):
+        ## Create the histograms of several variables for the same selection
+        #  Variables sharing the same command and default cut, i.e. the same quantity with different binnings, are
+        #  filled from a single evaluation of the values instead of one TTree::Draw each. Every histogram is filled
+        #  from the unbinned values in the original order, so the bin contents are identical to those from getHistogram.
+        #  @param xVars                list of Variable objects
+        #  all other parameters see getHistogram
+        #  @return list of histograms in the order of xVars
+        determinedCut, weight, determinedVariation, allSystematics, storeSystematicVariation = self._resolveWeightAndSystematics( cut, weightExpression, systematicVariation,
+                                                                                                                                 systematicsSet, ignoreDataWeight )
+        treeName = determinedVariation.treeName
+        
+        # group the variables that need to be filled by their values
+        groups = {}
+        for xVar in xVars:
+            xVar = self._determineVariable( xVar )
+            if not self._isFilledFromValues( xVar, drawOption ) or getattr( xVar, 'variables', None ):
+                continue
+            if not recreate and self.histogramStore and self.histogramStore.getHistogram( self, storeSystematicVariation, xVar, determinedCut ):
+                continue
+            groups.setdefault( self._sharedValuesKey( treeName, xVar.command, determinedCut + xVar.defaultCut, weight ), [] ).append( xVar )
+        for key, group in groups.iteritems():
+            if len( group ) < 2:
+                continue
+            values = self._getValuesForFill( group[0].command, determinedCut + group[0].defaultCut, weight, treeName )
+            if values is not None:
+                self.logger.debug( 'getHistograms(): filling %d variables from %d values of "%s" in %r' % ( len(group), len(values[0]), group[0].command, self ) )
+                self._sharedValues[ key ] = values
+        try:
+            return [ self.getHistogram( xVar, title, cut, weightExpression, drawOption, style, luminosity, recreate, systematicVariation,
+                                        includeOverflowBins, ignoreDataWeight, systematicsSet, forceBinning ) for xVar in xVars ]
+        finally:
+            self._sharedValues.clear()
+
+    def _resolveWeightAndSystematics( self, cut, weightExpression, systematicVariation, systematicsSet, ignoreDataWeight ):
+        ## helper method to determine the cut, the total weight and the systematics of a histogram
+        #  Used by getHistogram and getHistograms, so the values shared between them are found with the same key.
+        #  @return (cut, weight including the systematics weights, systematicVariation, systematicsSet, systematicVariation used in the HistogramStore)
+        weightExpression = weightExpression if weightExpression else self.weightExpression
+        if ignoreDataWeight and self.isData:
+            weightExpression = self.weightExpression
+        cut = self._determineCut( cut )
+        systematicVariation = systematicVariation if systematicVariation else self.nominalSystematics
+        systematicsSet = self.systematicsSet.union( systematicsSet ) if systematicsSet else self.systematicsSet
+        systematics = systematicVariation.systematics
+        if not systematics or systematics not in systematicsSet:
+            systematicVariation = self.nominalSystematics
+        storeSystematicVariation = systematicVariation if systematicVariation.isShapeSystematics else self.nominalSystematics
+        weight = Cut() * weightExpression * systematicsSet.totalWeight( systematicVariation, cut )
+        return cut, weight, systematicVariation, systematicsSet, storeSystematicVariation
+
+    def _sharedValuesKey( self, treeName, command, selection, weightExpression ):
+        ## helper method to build the key of the values shared between the histograms of getHistograms
+        return ( treeName, command, selection.cut, getattr( weightExpression, 'cut', weightExpression ) )
+
+    def _isFilledFromValues( self, xVar, drawOption ):
+        ## helper method to check if a histogram of the given variable can be filled from an array of values
+        #  Only variables (or combinations of plain variables) with a fixed range are supported.
+        if 'prof' in drawOption or not isinstance( xVar, Variable ):
+            return False
+        if getattr( xVar, 'variables', None ) is not None and not xVar.isSinglePass:
+            return False
+        return xVar.binning.low is not None and xVar.binning.up is not None
+
+    def _getValuesForFill( self, command, cut, weightExpression, treeName ):
+        ## helper method to get the values and weights to fill a histogram, like TTree::Draw does
+        #  @return values, weights or None if the tree is not available
+        selectedColumns = self._getSelectedColumns( [command], cut, weightExpression, treeName )
+        if selectedColumns:
+            return selectedColumns[0][0], selectedColumns[1]
+        tree = self._open( treeName )
+        if not tree:
+            return None
+        selection = cut * weightExpression
+        restricted = self._applySelectionCacheToTree( tree, cut )
+        self._trainTreeCache( tree, [command, selection] )
+        values, weights = getValuesFromTree( tree, command, selection.cut )
+        self._logTreeCacheStatistics( tree )
+        if restricted:
+            self._applyPreselectionToTree( tree )
+        # the buffers of the tree are overwritten by the next draw
+        return values.copy(), weights.copy()
+
+    def _createHistogramFromColumns( self, xVar, title, cut, weightExpression, drawOption, style, treeName ):
+        ## helper method to fill a histogram from values shared with other variables (see getHistograms)
+        #  or from the columns in the ColumnCache instead of using TTree::Draw
+        #  @return the histogram or None if the values are not available
+        if not self._isFilledFromValues( xVar, drawOption ):
+            return None
+        selection = cut + xVar.defaultCut
+        key = self._sharedValuesKey( treeName, xVar.command, selection, weightExpression )
+        if getattr( xVar, 'variables', None ):
+            # combined variables are filled from the commands and default cuts of all contained variables
+            if self.columnCache is None:
+                return None
+            expressions = xVar.expressions
+            selectedColumns = self._getSelectedColumns( expressions, selection, weightExpression, treeName )
+            if selectedColumns is None:
+                return None
+            values, weights = xVar.combineValues( dict( zip( expressions, selectedColumns[0] ) ), selectedColumns[1] )
+        elif key in self._sharedValues:
+            values, weights = self._sharedValues[ key ]
+        elif self.columnCache is None:
+            return None
+        else:
+            selectedColumns = self._getSelectedColumns( [xVar.command], selection, weightExpression, treeName )
+            if selectedColumns is None:
+                return None
+            values, weights = selectedColumns[0][0], selectedColumns[1]
+        hist = xVar.createHistogram( title )
+        if not hist.GetSumw2N():
+            hist.Sumw2()
+        if len( values ):
+            hist.FillN( len( values ), values, weights )
+        if style:
+            style.apply( hist )
+        self.logger.debug( '_createHistogramFromColumns(): filled %d entries with an integral of %g' % ( len(values), hist.Integral() ) )
+        return hist
+
     def getHistogram2D( self, xVar, yVar, title=None, cut=None, weightExpression=None, style=None, luminosity=1., recreate=False, systematicVariation=None, profile=False, systematicsSet=None ):
         ## Wrapper for TTree::Draw on the TChain object
         #  If a HistogramStore is defined it will first try to find the histogram in the store. If it does not exist the histogram will be
@@ -933,7 +1480,12 @@ class Dataset( object ):
         tree = self._open( systematicVariation.treeName )
         if not tree:
             return
+        restricted = self._applySelectionCacheToTree( tree, cut )
+        self._trainTreeCache( tree, [xVar.command, yVar.command, xVar.defaultCut, yVar.defaultCut, cut, weightExpression] )
         hist = create2DHistogramFromTree( tree, xVar, yVar, title, cut, weightExpression, profile )
+        self._logTreeCacheStatistics( tree )
+        if restricted:
+            self._applyPreselectionToTree( tree )
         if hist and self.sumOfWeights and hist.Integral() and not self.isData:
             hist.Scale( 1. / self.sumOfWeights )
             self.logger.debug( 'getHistogram2D(): dividing by sum of weights %g, yield=%g' % (self.sumOfWeights, hist.Integral()) )
@@ -969,7 +1521,6 @@ class Dataset( object ):
         #  @return the filled graph
         self.logger.debug( 'getResolutionGraph(): creating resolution graph for yVar=%r, xVar=%r with cut=%r and syst=%r from %r' % (yVar, xVar, cut, systematicVariation, self) )
         
-        bins = xVar.binning.bins
         title = '%s vs %s' % (yVar.title, xVar.title) if title is None else title
         name = 'g%s_%s' % ( title.replace(' ', '_').replace('(', '').replace(')',''), uuid.uuid1() )
         style = style if style else self.style
@@ -980,43 +1531,156 @@ class Dataset( object ):
         graph = TGraphAsymmErrors( xVar.binning.nBins )
         graph.SetNameTitle( name, title )
         
-        yMean, yErrLow, yErrUp = (0., 0., 0.)
-        for iBin in xrange( xVar.binning.nBins ):
-            low = bins[iBin]
-            up = bins[iBin+1]
-            xMean = low + 0.5 * (up - low)
-            xErr = xMean - low
-            myCut = Cut( '%s >= %s && %s < %s' % (xVar.command, low, xVar.command, up) ) + cut + yVar.defaultCut
-            values, weights = self.getValues( yVar, myCut, weightExpression, luminosity, systematicVariation, systematicsSet )
-            if measure:
-                yMean, yErrLow, yErrUp = measure.calculateFromValues( values, weights )
-            else:
-                yMean, yErrLow, yErrUp = ( 0., 0., 0. )
-            graph.SetPoint( iBin, xMean, yMean )
-            graph.SetPointError( iBin, xErr, xErr, yErrLow, yErrUp )
+        # x and y are read once for all bins and split into the x bins afterwards
+        result = self.getValuesOfVariables( [ xVar, yVar ], Cut() + cut + yVar.defaultCut, weightExpression, luminosity, systematicVariation, systematicsSet )
+        if result is None:
+            self.logger.warning( 'getResolutionGraph(): unable to read the values for xVar=%r, yVar=%r from %r' % ( xVar, yVar, self ) )
+            return None
+        ( xValues, yValues ), weights = result
+        fillResolutionGraph( graph, xVar.binning, xValues, yValues, weights, measure )
         
         if graph and style:
             style.apply( graph )
         return graph
 
-    def getCutFlowYields( self, cuts, luminosity=None, ignoreWeights=False, systematicVariation=None, accumulateCuts=True, systematicsSet=None, recreate=False ):
+    def getCutFlow( self, cuts, luminosity=1., ignoreWeights=False, systematicVariation=None, systematicsSet=None, weightExpression=None ):
+        ## Calculate all yields of a cutflow in a single pass over the tree
+        #  Every cut is evaluated once as a per-event column. The cumulative, individual and N-1 selections
+        #  are combined from these columns, the values of cuts carrying a factor are multiplied into the weights.
+        #  Uncertainties are calculated from the sum of squared weights.
+        #  @param cuts                 list of cuts that define the cutflow
+        #  @param luminosity           global scale factor, i.e. integrated luminosity, not applied for data
+        #  @param ignoreWeights        ignore the weights and any other scale factors including luminosity
+        #  @param systematicVariation  SytematicVariation object defining the tree name and potential additional weights
+        #  @param systematicsSet       additional systematics that should be considered
+        #  @param weightExpression     weight expression (overrides the default weight expression)
+        #  @return dictionary of 'cumulative', 'individual' and 'nMinusOne' to lists of (yield, uncertainty) for each cut
+        import numpy
+        systematicVariation = systematicVariation if systematicVariation else self.nominalSystematics
+        systematicsSet = self.systematicsSet.union( systematicsSet ) if systematicsSet else self.systematicsSet
+        weightExpression = weightExpression if weightExpression else self.weightExpression
+        cuts = [ self._determineCut( cut ) for cut in cuts ]
+        selections = { 'individual' : cuts, 'cumulative' : [], 'nMinusOne' : [] }
+        cumulativeCut = Cut()
+        for index, cut in enumerate( cuts ):
+            cumulativeCut = cumulativeCut & cut
+            selections['cumulative'].append( cumulativeCut )
+            nMinusOneCut = Cut()
+            for otherCut in cuts[:index] + cuts[index+1:]:
+                nMinusOneCut = nMinusOneCut & otherCut
+            selections['nMinusOne'].append( nMinusOneCut )
+        
+        # weights and scale factors depend on the region, evaluate each distinct weight expression once
+        weightExpressions = []
+        weightIndices = {}
+        scaleFactors = {}
+        for key, keyCuts in selections.iteritems():
+            weightIndices[key] = []
+            scaleFactors[key] = []
+            for cut in keyCuts:
+                if ignoreWeights:
+                    expression = '1'
+                    scaleFactor = 1.
+                else:
+                    expression = ( Cut() * weightExpression * systematicsSet.totalWeight( systematicVariation, cut ) ).cut or '1'
+                    scaleFactor = self.combinedScaleFactors * systematicsSet.totalScaleFactor( systematicVariation, cut )
+                    if luminosity and not self.isData:
+                        scaleFactor *= luminosity
+                    if self.sumOfWeights and not self.isData:
+                        scaleFactor /= self.sumOfWeights
+                if expression not in weightExpressions:
+                    weightExpressions.append( expression )
+                weightIndices[key].append( weightExpressions.index( expression ) )
+                scaleFactors[key].append( scaleFactor )
+        
+        result = dict( (key, []) for key in selections )
+        if not cuts:
+            return result
+        values = None
+        weightColumns = None
+        if self.useCutIndex:
+            values, weightColumns = self._getCutFlowColumnsFromIndex( cuts, weightExpressions, systematicVariation.treeName )
+        if values is None:
+            tree = self._open( systematicVariation.treeName )
+            if not tree:
+                return
+            expressions = [ cut.cut if cut.cut else '1' for cut in cuts ] + weightExpressions
+            self._trainTreeCache( tree, expressions )
+            columns = getColumnsFromTree( tree, expressions )[0]
+            self._logTreeCacheStatistics( tree )
+            self._close( systematicVariation.treeName )
+            values = numpy.array( columns[:len(cuts)] )
+            weightColumns = columns[len(cuts):]
+        for key, factors in DistributionTools.cutFlowFactors( values ).iteritems():
+            for factor, weightIndex, scaleFactor in zip( factors, weightIndices[key], scaleFactors[key] ):
+                mask = factor != 0
+                weights = weightColumns[weightIndex][mask]
+                if not ignoreWeights:
+                    weights = weights * factor[mask]
+                y, error = DistributionTools.sumOfWeights( weights )
+                result[key].append( ( y * scaleFactor, error * scaleFactor ) )
+        self.logger.debug( 'getCutFlow(): evaluated %d cuts on %d entries of %r' % ( len(cuts), values.shape[1], self ) )
+        return result
+
+    def _getCutFlowColumnsFromIndex( self, cuts, weightExpressions, treeName ):
+        ## helper method to get the per-event results of the cuts from the CutIndex
+        #  Only the weight expressions are read from the tree, nothing if all weights are trivial.
+        #  The index only contains logical cuts, i.e. the boolean results are the values of the cuts.
+        #  @return boolean array of cut results, list of weight columns or (None, None) if not all cuts are indexed
+        import numpy
+        cutIndex = self.getCutIndex( treeName )
+        try:
+            passed = numpy.array( [ cutIndex.getMask( cut ) for cut in cuts ] )
+        except KeyError:
+            # at least one part of the cuts is not indexed
+            return None, None
+        if weightExpressions == ['1']:
+            return passed, [ numpy.ones( cutIndex.nEntries ) ]
+        tree = self._open( treeName )
+        if not tree:
+            return None, None
+        self._trainTreeCache( tree, weightExpressions )
+        weightColumns = getColumnsFromTree( tree, weightExpressions )[0]
+        self._logTreeCacheStatistics( tree )
+        self._close( treeName )
+        if len( weightColumns[0] ) != cutIndex.nEntries:
+            self.logger.warning( '_getCutFlowColumnsFromIndex(): %r does not match the entries of %r, evaluating cuts from the tree' % ( cutIndex, self ) )
+            return None, None
+        return passed, weightColumns
+
+    def getCutFlowYields( self, cuts, luminosity=None, ignoreWeights=False, systematicVariation=None, accumulateCuts=True, systematicsSet=None, recreate=False, weightExpression=None ):
         ## Create a dictionary of cuts with their corresponding yields
+        #  If all yields are in the HistogramStore they are read from there (see getYield), otherwise all
+        #  cuts are evaluated in a single pass (see getCutFlow). Yields of the single pass are not stored.
         #  @param cuts                 list of cuts to apply
         #  @param luminosity           global scale factor
         #  @param ignoreWeights        ignore the weights and any other scale factors including luminosity
         #  @param systematicVariation  SytematicVariation object defining the tree name and potential additional weights
         #  @param accumulateCuts       decide if the cuts should be successively combined, ie. second cut applied in addition to first etc.
         #  @param systematicsSet       additional systematics that should be considered
+        #  @param recreate             do not read the yields from the HistogramStore
+        #  @param weightExpression     weight expression (overrides the default weight expression)
         #  @return dictionary of cut to yield
-        result = {}
-        myCut = Cut()
-        for cut in cuts:
-            if accumulateCuts:
-                myCut += cut
-            else:
-                myCut = cut
-            result[cut] = self.getYield( cut=myCut, luminosity=luminosity, ignoreWeights=ignoreWeights, systematicVariation=systematicVariation, systematicsSet=systematicsSet, recreate=recreate )
-        return result
+        if self.histogramStore and not recreate:
+            selections = []
+            selection = Cut()
+            for cut in cuts:
+                selection = selection + cut if accumulateCuts else cut
+                selections.append( selection )
+            if all( self._isYieldStored( selection, systematicVariation, systematicsSet ) for selection in selections ):
+                luminosity = luminosity if luminosity else 1.
+                return dict( ( cut, self.getYield( selection, weightExpression, luminosity, ignoreWeights, systematicVariation, systematicsSet=systematicsSet ) ) for cut, selection in zip( cuts, selections ) )
+        cutFlow = self.getCutFlow( cuts, luminosity, ignoreWeights, systematicVariation, systematicsSet, weightExpression )
+        if not cutFlow:
+            return {}
+        return dict( zip( cuts, cutFlow['cumulative' if accumulateCuts else 'individual'] ) )
+            
+    def _isYieldStored( self, cut, systematicVariation, systematicsSet ):
+        ## helper method to check if the yield of the given selection is in the HistogramStore (see getYield)
+        if not self.histogramStore:
+            return False
+        cut, weight, systematicVariation, systematicsSet, storeSystematicVariation = self._resolveWeightAndSystematics( cut, None, systematicVariation, systematicsSet, False )
+        return bool( self.histogramStore.getHistogram( self, storeSystematicVariation, var_Yield, cut ) )
             
     def getCutflowHistogram( self, cuts, luminosity=None, ignoreWeights=False, cutFlowVariable=None, systematicVariation=None, accumulateCuts=True, systematicsSet=None ):
         ## Create and fill a cutflow histogram for this dataset
@@ -1030,11 +1694,11 @@ class Dataset( object ):
         #  @return the filled histogram
         var = cutFlowVariable if cutFlowVariable else createCutFlowVariable( cuts=cuts )
         hist = var.createHistogram( self.title )
-        yields = self.getCutFlowYields( cuts, luminosity, ignoreWeights, systematicVariation, accumulateCuts, systematicsSet )
-        for index, cut in enumerate( cuts ):
-            y, error = yields[cut]
-            hist.SetBinContent( index+1, y )
-            hist.SetBinError( index+1, error )
+        cutFlow = self.getCutFlow( cuts, luminosity, ignoreWeights, systematicVariation, systematicsSet )
+        if cutFlow:
+            for index, (y, error) in enumerate( cutFlow['cumulative' if accumulateCuts else 'individual'] ):
+                hist.SetBinContent( index+1, y )
+                hist.SetBinError( index+1, error )
         if hist and self.style:
             self.style.apply( hist )
         return hist
@@ -1047,8 +1711,8 @@ class Dataset( object ):
         s = s.rstrip(', ')
         return s
     
-# store all defined processes
-PHYSICSPROCESSES={}
+# store all defined processes, only weak references are kept to not prevent their deletion
+PHYSICSPROCESSES=weakref.WeakValueDictionary()
     
 class PhysicsProcess( Dataset ):
     ## Container class for a set of datasets that should be treated together
@@ -1095,8 +1759,9 @@ class PhysicsProcess( Dataset ):
             datasetName = datasetString.strip()
             if not datasetName:
                 continue
-            if DATASETS.has_key( datasetName ):
-                datasets.append( DATASETS[ datasetName ] )
+            dataset = DATASETS.get( datasetName )
+            if dataset is not None:
+                datasets.append( dataset )
             else:
                 cls.logger.error( 'fromString(): Unknown dataset "%s"' % datasetName )
         return cls( name, title, Style(lineColor), kFactor, datasets )
@@ -1121,8 +1786,9 @@ class PhysicsProcess( Dataset ):
         #  @return the HistogramStore object
         attributes = element.attrib
         name = attributes[ 'name' ]
-        if PHYSICSPROCESSES.has_key( name ):
-            return PHYSICSPROCESSES[name]
+        process = PHYSICSPROCESSES.get( name )
+        if process is not None:
+            return process
         process = cls( name )
         if attributes.has_key( 'title' ):
             process.title = attributes['title']
@@ -1165,9 +1831,9 @@ class PhysicsProcess( Dataset ):
         pass
     
     def _register( self, oldName='' ):
-        if oldName and PHYSICSPROCESSES.has_key( oldName ) and PHYSICSPROCESSES[ oldName ] == self:
+        if oldName and PHYSICSPROCESSES.get( oldName ) is self:
             del PHYSICSPROCESSES[ oldName ]
-        if PHYSICSPROCESSES.has_key( self.name ) and PHYSICSPROCESSES[ self.name ] is not self:
+        if PHYSICSPROCESSES.get( self.name, self ) is not self:
             self.logger.warning( 'name(): registering a PhysicsProcess with an already existing name: "%s"' % self.name )
         PHYSICSPROCESSES[ self.name ] = self
     
@@ -1291,6 +1957,26 @@ class PhysicsProcess( Dataset ):
         for dataset in self.datasets:
             dataset.addFriendTreeToAllDaughters( friendTree )
     
+    def addSelectionCache( self, cut ):
+        ## Cache the entries passing the given selection in all contained datasets
+        for dataset in self.datasets:
+            dataset.addSelectionCache( cut )
+    
+    def clearSelectionCaches( self ):
+        ## Remove all cached selections from all contained datasets
+        for dataset in self.datasets:
+            dataset.clearSelectionCaches()
+    
+    def buildCutIndex( self, cuts, treeName=None ):
+        ## Build the CutIndex of all contained datasets
+        for dataset in self.datasets:
+            dataset.buildCutIndex( cuts, treeName )
+    
+    def defineColumn( self, name, kernel, *inputs ):
+        ## Define the derived column in all contained datasets
+        for dataset in self.datasets:
+            dataset.defineColumn( name, kernel, *inputs )
+    
     def save( self, directory='./', selection=None ):
         ## Stores all contained datasets in the given directory using the given preselection
         #  @param directory     name of the output directory. File names are "<dataset.name>.root"
@@ -1344,17 +2030,91 @@ class PhysicsProcess( Dataset ):
         #  @param systematicVariation  SytematicVariation object defining the tree name and potential additional weights
         #  @param ignoreDataWeight     used for fake-factor data-mc where weight is to be applied to data via self.weightExpression
         #  @param systematicsSet       additional systematics that should be considered
-        #  @return (values, weights)
-        systematicsSet = self.systematicsSet.union( systematicsSet ) if systematicsSet else self.systematicsSet
+        #  @return (values, weights) of all datasets, including those of nested physics processes
         import numpy
-        values = numpy.empty( [0.] )
-        weights = numpy.empty( [0.] )
+        chunks = self._getValueChunks( xVar, cut, weightExpression, luminosity, systematicVariation, systematicsSet )
+        # copy all values once into arrays of the final size
+        nValues = sum( len( values ) for values, weights, scaleFactor in chunks )
+        allValues = numpy.empty( nValues )
+        allWeights = numpy.empty( nValues )
+        position = 0
+        for values, weights, scaleFactor in chunks:
+            end = position + len( values )
+            allValues[ position:end ] = values
+            numpy.multiply( weights, scaleFactor, out=allWeights[ position:end ] )
+            position = end
+        return allValues, allWeights
+    
+    def _getValueChunks( self, xVar, cut=None, weightExpression=None, luminosity=1., systematicVariation=None, systematicsSet=None, scaleFactor=1. ):
+        ## helper method to collect the values and weights of all datasets without combining them
+        #  Nested physics processes add their datasets to the same list, so the values are only copied once by getValues.
+        #  @return list of (values, weights, scale factor) for each dataset
+        systematicsSet = self.systematicsSet.union( systematicsSet ) if systematicsSet else self.systematicsSet
         cut = self._determineCut( cut )
         xVar = self._determineVariable( xVar )
+        scaleFactor *= self.combinedScaleFactors
+        chunks = []
         for dataset in self.datasets:
-            v, w = dataset.getValues( xVar, cut, weightExpression, luminosity, systematicVariation, systematicsSet )
-            values = numpy.append( values, v )
-            weights = numpy.append( weights, w )
+            if isinstance( dataset, PhysicsProcess ):
+                chunks += dataset._getValueChunks( xVar, cut, weightExpression, luminosity, systematicVariation, systematicsSet, scaleFactor )
+                continue
+            result = dataset.getValues( xVar, cut, weightExpression, luminosity, systematicVariation, systematicsSet )
+            if result is None:
+                self.logger.warning( '_getValueChunks(): no values for: dataset=%r, var=%r, cut=%r' % ( dataset, xVar, cut ) )
+                continue
+            values = result[0]
+            if values.base is not None:
+                # views, e.g. of a TTree buffer, are only valid until the next TTree::Draw
+                values = values.copy()
+            chunks.append( ( values, result[1], scaleFactor ) )
+        return chunks
+        
+    def getQuantileSketch( self, xVar, cut=None, weightExpression=None, luminosity=1., systematicVariation=None, systematicsSet=None, sketch=None ):
+        ## Fills the weighted values of a given variable and selection of all contained datasets into a QuantileSketch
+        #  @param xVar                 Variable object defining which values should be calculated
+        #  @param cut                  Cut object that defines the applied cut
+        #  @param weightExpression     weight expression (overrides the default weight expression)
+        #  @param luminosity           global scale factor, i.e. integrated luminosity
+        #  @param systematicVariation  SytematicVariation object defining the tree name and potential additional weights
+        #  @param systematicsSet       additional systematics that should be considered
+        #  @param sketch               QuantileSketch to fill (default creates a new one)
+        #  @return the QuantileSketch or None if the selected entries of any dataset have negative weights
+        systematicsSet = self.systematicsSet.union( systematicsSet ) if systematicsSet else self.systematicsSet
+        cut = self._determineCut( cut )
+        xVar = self._determineVariable( xVar )
+        # the scale factor of the process applies to all its values, it is applied to a separate sketch
+        processSketch = QuantileSketch( sketch.compression, sketch.bufferSize ) if sketch is not None else QuantileSketch()
+        for dataset in self.datasets:
+            if dataset.getQuantileSketch( xVar, cut, weightExpression, luminosity, systematicVariation, systematicsSet, processSketch ) is None:
+                return None
+        if self.combinedScaleFactors <= 0.:
+            self.logger.warning( 'getQuantileSketch(): the scale factor %g of %r can not be applied to a QuantileSketch' % ( self.combinedScaleFactors, self ) )
+        elif self.combinedScaleFactors != 1. and processSketch.sumOfWeights > 0:
+            processSketch.scale( self.combinedScaleFactors )
+        if sketch is None:
+            return processSketch
+        return sketch.merge( processSketch )
+    
+    def getValuesOfVariables( self, xVars, cut=None, weightExpression=None, luminosity=1., systematicVariation=None, systematicsSet=None ):
+        ## Gets the values of several variables and the weights for a given selection, combined from all contained datasets
+        #  @param xVars                list of Variable objects defining which values should be calculated
+        #  @param cut                  Cut object that defines the applied cut
+        #  @param weightExpression     weight expression (overrides the default weight expression)
+        #  @param luminosity           global scale factor, i.e. integrated luminosity
+        #  @param systematicVariation  SytematicVariation object defining the tree name and potential additional weights
+        #  @param systematicsSet       additional systematics that should be considered
+        #  @return (list of values, weights), the values are ordered like xVars
+        systematicsSet = self.systematicsSet.union( systematicsSet ) if systematicsSet else self.systematicsSet
+        import numpy
+        cut = self._determineCut( cut )
+        xVars = [ self._determineVariable( xVar ) for xVar in xVars ]
+        results = []
+        for dataset in self.datasets:
+            result = dataset.getValuesOfVariables( xVars, cut, weightExpression, luminosity, systematicVariation, systematicsSet )
+            if result is not None:
+                results.append( result )
+        values = [ numpy.concatenate( [ numpy.empty( 0 ) ] + [ result[0][index] for result in results ] ) for index in xrange( len( xVars ) ) ]
+        weights = numpy.concatenate( [ numpy.empty( 0 ) ] + [ result[1] for result in results ] )
         return values, weights * self.combinedScaleFactors
         
     def getHistogram( self, xVar, title=None, cut=None, weightExpression=None, drawOption='', style=None, luminosity=1., recreate=False, systematicVariation=None,
@@ -1396,6 +2156,38 @@ class PhysicsProcess( Dataset ):
             self.logger.debug( 'getHistogram(): scaling histogram by %g, total yield=%g' % (self.combinedScaleFactors, histogram.Integral()) )
         return histogram
     
+    def getHistograms( self, xVars, title=None, cut=None, weightExpression=None, drawOption='', style=None, luminosity=1., recreate=False, systematicVariation=None,
+                       includeOverflowBins=False, ignoreDataWeight=False, systematicsSet=None, forceBinning=False ):
+        ## Get the combined histograms of several variables for the same selection from all contained datasets
+        #  Variables sharing the same command are filled from a single evaluation per dataset (see Dataset.getHistograms).
+        #  @param xVars                list of Variable objects
+        #  all other parameters see getHistogram
+        #  @return list of histograms in the order of xVars
+        self.logger.debug( 'getHistograms(): creating histograms for vars=%r with cut=%r and syst=%r from %r' % (xVars, cut, systematicVariation, self) )
+        systematicsSet = self.systematicsSet.union( systematicsSet ) if systematicsSet else self.systematicsSet
+        title = title if title else self.title
+        style = style if style else self.style
+        cut = self._determineCut( cut )
+        xVars = [ self._determineVariable( xVar ) for xVar in xVars ]
+        histograms = [ None ] * len( xVars )
+        for dataset in self.datasets:
+            hists = dataset.getHistograms( xVars, title, cut, weightExpression, drawOption, style, luminosity, recreate, systematicVariation, includeOverflowBins, ignoreDataWeight, systematicsSet, forceBinning )
+            for index, h in enumerate( hists ):
+                if not h:
+                    self.logger.warning( 'getHistograms(): no histogram created for: dataset=%r, var=%r, cut=%r' % ( dataset, xVars[index], cut ) )
+                    continue
+                if not histograms[index]:
+                    histograms[index] = h
+                    h.SetTitle( title )
+                else:
+                    histograms[index].Add( h )
+        for histogram in histograms:
+            if histogram:
+                if style:
+                    style.apply( histogram )
+                histogram.Scale( self.combinedScaleFactors )
+        return histograms
+    
     def getHistogram2D( self, xVar, yVar, title=None, cut=None, weight=None, style=None, luminosity=1., recreate=False, systematicVariation=None, profile=False, systematicsSet=None ):
         ## Get the combined histogram of all contained datasets
         #  @param xVar                 Variable object that defines the variable expression for x used in draw and the binning
@@ -1434,6 +2226,40 @@ class PhysicsProcess( Dataset ):
             histogram.Scale( self.combinedScaleFactors )
         return histogram
     
+    def getCutFlow( self, cuts, luminosity=1., ignoreWeights=False, systematicVariation=None, systematicsSet=None, weightExpression=None ):
+        ## Calculate all yields of a cutflow as the sum of the contained datasets
+        #  @param cuts                 list of cuts that define the cutflow
+        #  @param luminosity           global scale factor, i.e. integrated luminosity, not applied for data
+        #  @param ignoreWeights        ignore the weights and any other scale factors including luminosity
+        #  @param systematicVariation  SytematicVariation object defining the tree name and potential additional weights
+        #  @param systematicsSet       additional systematics that should be considered
+        #  @param weightExpression     weight expression (overrides the default weight expression)
+        #  @return dictionary of 'cumulative', 'individual' and 'nMinusOne' to lists of (yield, uncertainty) for each cut
+        systematicsSet = self.systematicsSet.union( systematicsSet ) if systematicsSet else self.systematicsSet
+        cuts = [ self._determineCut( cut ) for cut in cuts ]
+        scaleFactor = 1. if ignoreWeights else self.combinedScaleFactors
+        result = None
+        for dataset in self.datasets:
+            cutFlow = dataset.getCutFlow( cuts, luminosity, ignoreWeights, systematicVariation, systematicsSet, weightExpression )
+            if not cutFlow:
+                self.logger.warning( 'getCutFlow(): no cutflow calculated for: dataset=%r' % dataset )
+                continue
+            if result is None:
+                result = dict( (key, [ (0., 0.) ] * len( cuts )) for key in cutFlow )
+            for key, yields in cutFlow.iteritems():
+                result[key] = [ (totalYield + y, math.sqrt( totalError**2 + error**2 )) for (totalYield, totalError), (y, error) in zip( result[key], yields ) ]
+        if result is None:
+            return
+        for key in result:
+            result[key] = [ (y * scaleFactor, error * scaleFactor) for y, error in result[key] ]
+        return result
+    
+    def _isYieldStored( self, cut, systematicVariation, systematicsSet ):
+        ## helper method to check if the yields of the given selection are stored for all contained datasets
+        systematicsSet = self.systematicsSet.union( systematicsSet ) if systematicsSet else self.systematicsSet
+        cut = self._determineCut( cut )
+        return bool( self.datasets ) and all( dataset._isYieldStored( cut, systematicVariation, systematicsSet ) for dataset in self.datasets )
+    
     def toString( self ):
         ## String representation used for persistency
         s = '%s; %s; %d; %g; ' % (self.name, self.title, self.style.lineColor, self.kFactor)
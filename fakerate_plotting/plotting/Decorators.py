@@ -26,6 +26,7 @@ import logging
 import ROOT
 from array import array
 from Dataset import PhysicsProcess
+from plotting import NumpyBridge
 
 
 #_____________________________________________________________________________
@@ -50,6 +51,11 @@ class DatasetDecorator( object ):
           If needed this can be added via TTreeFormula, which is ~trivial. 
 
 
+    Note: decorators implementing calc_array can be run in vectorised 
+          mode (vectorised = True). The input branches are then read 
+          into numpy arrays in a single pass, the decoration is 
+          calculated for all entries at once and written in bulk.
+
     @param branch - name of branch to decorate
     @param input_branches - list of branches needed by the caluclation 
                             (will optimise out unused branches)
@@ -60,6 +66,7 @@ class DatasetDecorator( object ):
         """initialisation"""
         self.branch_name = branch
         self.input_branches = input_branches
+        self.vectorised = False
 
     #____________________________________________________________
     def calc(self,tree): 
@@ -72,6 +79,19 @@ class DatasetDecorator( object ):
         """
         return 2.0
 
+    #____________________________________________________________
+    def calc_array(self, columns):
+        """Calculate the value of the decoration for all entries at once
+
+        Should be overridden in the derived class to support the 
+        vectorised mode
+
+        @param columns - list of numpy arrays, one per input branch
+        @return numpy array (one value per entry)
+        """
+        raise NotImplementedError("calc_array not implemented for %s" % \
+                (self.__class__.__name__))
+
     #____________________________________________________________
     def decorate(self, dataset, treeName=None):
         """Main decoration function
@@ -99,23 +119,23 @@ class DatasetDecorator( object ):
             tree.friend = friend
         friend = tree.friend 
 
-        # add new branch
-        first_branch = bool(friend.GetNbranches()==0)
-        value = array('f',[0.])
-        branch = friend.Branch(self.branch_name,value,"%s/F"%(self.branch_name))
-        
         # optimise out unused branches in primary tree
         if self.input_branches is not None:
             live_branches = self._get_live_branches_(tree)
             self._set_branches_(tree,self.input_branches,dataset.name)
 
         # decorate
-        for i in xrange(tree.GetEntries()):
-            tree.GetEntry(i)
-            friend.GetEntry(i)
-            value[0] = self.calc(tree)
-            if first_branch: friend.Fill()
-            else: branch.Fill()
+        if not self.vectorised or not self._decorate_vectorised_(tree,friend):
+            # add new branch
+            first_branch = bool(friend.GetNbranches()==0)
+            value = array('f',[0.])
+            branch = friend.Branch(self.branch_name,value,"%s/F"%(self.branch_name))
+            for i in xrange(tree.GetEntries()):
+                tree.GetEntry(i)
+                friend.GetEntry(i)
+                value[0] = self.calc(tree)
+                if first_branch: friend.Fill()
+                else: branch.Fill()
             
         # reset live branches
         if self.input_branches is not None:
@@ -125,6 +145,36 @@ class DatasetDecorator( object ):
         # segfault when it goes out of scope
         friend.ResetBranchAddresses()
 
+    #____________________________________________________________
+    def _decorate_vectorised_(self,tree,friend):
+        """Fill the decoration branch for all entries at once
+
+        Falls back to the event loop (returns False) if the inputs do 
+        not have exactly one value per entry, eg. for vector branches.
+
+        @param tree   - primary TTree
+        @param friend - friend TTree receiving the new branch
+        @return bool (True if the branch was filled)
+        """
+        import numpy
+        from plotting.TreePlot import getColumnsFromTree
+        # the friend is aligned by entry number, ie. all entries are 
+        # needed independent of the preselection
+        entry_list = tree.GetEntryList()
+        if entry_list: tree.SetEntryList(0)
+        try:
+            columns = getColumnsFromTree(tree,self.input_branches)[0]
+        finally:
+            if entry_list: tree.SetEntryList(entry_list)
+        if len(columns[0]) != tree.GetEntries():
+            logging.warning("Inputs of %s have %d values for %d entries, using the event loop"% \
+                    (self.branch_name,len(columns[0]),tree.GetEntries()))
+            return False
+        # same precision as the branch filled in the event loop
+        values = numpy.asarray(self.calc_array(columns),dtype=numpy.float32)
+        NumpyBridge.fillBranch(friend,self.branch_name,values)
+        return True
+
     #____________________________________________________________
     def _get_branches_(self,tree,live=None):
         """Return list of branches from tree
@@ -205,6 +255,7 @@ class HistogramDecorator1D(DatasetDecorator):
         self.var = var
         self.hist = hist
         self.defaultVal = 0.
+        self.vectorised = True
 
     #____________________________________________________________
     def calc(self, tree):
@@ -224,6 +275,24 @@ class HistogramDecorator1D(DatasetDecorator):
 
         # retrieve value and return
         return self.hist.GetBinContent(ibin)
+
+    #____________________________________________________________
+    def calc_array(self, columns):
+        """Derived calc_array function (returns fake-factors, same as calc)"""
+        import numpy
+        nbins = self.hist.GetNbinsX()
+        ibins = NumpyBridge.findBins(self.hist.GetXaxis(),columns[0])
+        # check if bins out of range (maybe should change to warning)
+        if (ibins <= 0).any(): 
+            logging.debug("Dependent variable in underflow!")
+        if (ibins > nbins).any(): 
+            logging.debug("Dependent variable in overflow!")
+
+        # force bins in range
+        ibins = numpy.clip(ibins,0,nbins)
+
+        # retrieve values and return
+        return NumpyBridge.contents(self.hist)[ibins]
     
 #_____________________________________________________________________________
 class HistogramDecorator2D(DatasetDecorator):
@@ -239,6 +308,7 @@ class HistogramDecorator2D(DatasetDecorator):
         self.xVar = xVar
         self.yVar = yVar
         self.hist = hist
+        self.vectorised = True
 
     #____________________________________________________________
     def calc(self, tree):
@@ -257,6 +327,23 @@ class HistogramDecorator2D(DatasetDecorator):
         # retrieve value and return
         return self.hist.GetBinContent(ibin)
 
+    #____________________________________________________________
+    def calc_array(self, columns):
+        """Derived calc_array function (returns fake-factors, same as calc)"""
+        xbins = NumpyBridge.findBins(self.hist.GetXaxis(),columns[0])
+        ybins = NumpyBridge.findBins(self.hist.GetYaxis(),columns[1])
+        # global bin number like TH2::GetBin
+        ibins = xbins + (self.hist.GetNbinsX()+2) * ybins
+
+        # check if bins out of range (maybe should change to warning)
+        if (ibins <= 0).any(): 
+            logging.debug("Dependent variable in underflow!")
+        if (ibins > self.hist.GetNbinsX()).any(): 
+            logging.debug("Dependent variable in overflow!")
+
+        # retrieve values and return
+        return NumpyBridge.contents(self.hist)[ibins]
+
 #_____________________________________________________________________________
 class BasicFakeFactorDecorator(HistogramDecorator1D):
     """Basic Fake-factor decoration
@@ -277,6 +364,14 @@ class BasicFakeFactorDecorator(HistogramDecorator1D):
         if ff > 1.0 or ff < 0.0: 
             print "ff: %f"%(ff)
         return ff
+
+    #____________________________________________________________
+    def calc_array(self, columns):
+        """Derived calc_array function (returns fake-factors)"""
+        ffs = HistogramDecorator1D.calc_array( self, columns )
+        for ff in ffs[(ffs > 1.0) | (ffs < 0.0)]:
+            print "ff: %f"%(ff)
+        return ffs
     
 
 ## EOF
@@ -23,11 +23,12 @@ from plotting import DistributionTools
 from copy import copy
 import logging, re, os, uuid, math
 """
-import logging
+import logging, hashlib, os
 import ROOT
 from array import array
 from Dataset import PhysicsProcess
 from plotting.Decorators import DatasetDecorator
+from plotting import NumpyBridge
 from ROOT import TH1D,TH2D
 
 #_____________________________________________________________________________
@@ -55,12 +56,33 @@ class MultiDecoratorContainer2D(object):
         self.name=branch
 #_____________________________________________________________________________
 class DatasetMultiDecorator( DatasetDecorator ):
+    """Decorates a dataset with several branches at once
+
+    The decorations are persisted as one friend tree per dataset and
+    systematics tree. Each friend tree carries a fingerprint of the 
+    parent dataset and of the decoration inputs (including the contents 
+    of the histograms) in its UserInfo, trees are only rebuilt if it 
+    does not match anymore. Every tree is written to its own shard file
+    next to decorFileName, the shards are merged into decorFileName 
+    whenever one of them was rebuilt. Use decorateTrees to decorate 
+    several systematics trees with a single merge.
+
+    @param dataset            - Dataset or PhysicsProcess to decorate
+    @param multiDecorContList - list of MultiDecoratorContainer(2D)
+    """
+    fingerprintName = 'DecorationFingerprint'
+
     def __init__(self,dataset,multiDecorContList):
         #DatasetDecorator.__init__(self,branch,input_branches = [var.command])
         self.decorationList=multiDecorContList
         self.decorFileName=None
         self.dataset = dataset
+        # force rebuilding of all decoration trees, even if they are up to date
         self.updateDecorFile = None
+        # optional (major, minor) branches to align the friend trees by index, ie. ('run_number', 'event_number')
+        self.indexNames = None
+        # systematics trees decorated so far, only their shards are merged
+        self.treeNames = []
        # self.var = var
        # self.hist = hist
         self.defaultVal = 0.
@@ -98,16 +120,185 @@ class DatasetMultiDecorator( DatasetDecorator ):
     def decoratePhysicsProcess(self, treeName=None):
         """Main decoration function
 
+        Missing or stale decoration trees are (re)created before
+        they are added as friends.
+
         @treeName      - systematics tree to decorate
         """
-        if self.updateDecorFile:
-          self.createDecorationTree(self.dataset, treeName)
-        self.friendDecorationTree(self.dataset, treeName)
+        self.decorateTrees([treeName])
+
+    #____________________________________________________________
+    def decorateTrees(self, treeNames):
+        """Decorate several systematics trees at once
+
+        All missing or stale decoration trees are (re)created first,
+        decorFileName is merged at most once before they are added 
+        as friends.
+
+        @treeNames     - list of systematics trees to decorate
+        """
+        rebuilt = 0
+        for treeName in treeNames:
+          if treeName not in self.treeNames:
+            self.treeNames.append(treeName)
+          rebuilt += self.createDecorationTree(self.dataset, treeName)
+        if rebuilt or any(self.isDecorationFileStale(self.dataset, treeName) for treeName in treeNames):
+          self.mergeDecorationFiles()
+        for treeName in treeNames:
+          self.friendDecorationTree(self.dataset, treeName)
+
+    #____________________________________________________________
+    def shardDirectory(self):
+        """Directory holding the shard files of decorFileName
+
+        @return str
+        """
+        if not self.decorFileName:
+          raise ValueError("In shardDirectory: decorFileName not set")
+        return os.path.splitext(self.decorFileName)[0] + "_shards"
+
+    #____________________________________________________________
+    def shardFileName(self, dataset, treeName):
+        """File storing the decoration tree of a single dataset
+
+        @param dataset  - Dataset object
+        @param treeName - systematics tree
+        @return str
+        """
+        return os.path.join(self.shardDirectory(), "decor_%s_%s.root" % (treeName, dataset.name))
+
+    #____________________________________________________________
+    def decoratedDatasets(self, dataset):
+        """Datasets with their own decoration tree
+
+        2015 datasets share the decoration trees of 2016
+
+        @param dataset  - Dataset or PhysicsProcess object
+        @return list of Dataset objects
+        """
+        if isinstance(dataset,PhysicsProcess):
+          datasets = []
+          for d in dataset.datasets:
+            datasets += self.decoratedDatasets(d)
+          return datasets
+        if dataset.name.endswith("2015"):
+          return []
+        return [dataset]
+
+    #____________________________________________________________
+    def histogramHash(self, hist):
+        """Hash of the bin contents and bin boundaries of a histogram
+
+        @param hist - TH1 object (also TH2 and TH3)
+        @return str
+        """
+        md5 = hashlib.md5()
+        md5.update( NumpyBridge.contents(hist).tostring() )
+        for axis in (hist.GetXaxis(), hist.GetYaxis(), hist.GetZaxis()):
+          md5.update( NumpyBridge.edges(axis).tostring() )
+        return md5.hexdigest()
+
+    #____________________________________________________________
+    def fingerprint(self, dataset, treeName):
+        """Fingerprint of the decoration tree of a dataset
+
+        Combines the hash of the parent dataset, the decorated tree
+        and the decoration inputs (branches, variables, histograms)
+
+        @param dataset  - Dataset object
+        @param treeName - systematics tree
+        @return str
+        """
+        md5 = hashlib.md5()
+        md5.update( dataset.md5 )
+        md5.update( str(treeName) )
+        md5.update( str(self.indexNames) )
+        for decoration in self.decorationList:
+          md5.update( decoration.branch )
+          if isinstance(decoration,MultiDecoratorContainer2D):
+            md5.update( decoration.xvar.command )
+            md5.update( decoration.yvar.command )
+          else:
+            md5.update( decoration.var.command )
+          md5.update( self.histogramHash(decoration.hist) )
+        return md5.hexdigest()
+
+    #____________________________________________________________
+    def isDecorationTreeStale(self, dataset, treeName, fileName=None):
+        """Check if the stored decoration tree is missing or outdated
+
+        @param dataset  - Dataset object
+        @param treeName - systematics tree
+        @param fileName - file to check (default is the shard of the dataset)
+        @return bool
+        """
+        from ROOT import TFile, gSystem
+        if not self.decorFileName:
+          raise ValueError("In isDecorationTreeStale: decorFileName not set")
+        if fileName is None:
+          fileName = self.shardFileName(dataset, treeName)
+        # AccessPathName returns True if the file does NOT exist
+        if gSystem.AccessPathName(fileName):
+          return True
+        decorFile = TFile.Open( fileName, 'READ' )
+        if not decorFile or not decorFile.IsOpen():
+          return True
+        stale = True
+        decorTree = decorFile.Get("decor_"+treeName+"/DecorationFriend_"+dataset.name)
+        if decorTree:
+          stored = decorTree.GetUserInfo().FindObject(self.fingerprintName)
+          stale = not stored or stored.GetTitle() != self.fingerprint(dataset, treeName)
+          del decorTree
+        decorFile.Close()
+        return stale
+
+    #____________________________________________________________
+    def isDecorationFileStale(self, dataset, treeName):
+        """Check if the merged decorFileName misses the current decoration 
+        tree of any dataset, eg. after it was deleted or written by hand
+
+        @param dataset  - Dataset or PhysicsProcess object
+        @param treeName - systematics tree
+        @return bool
+        """
+        for d in self.decoratedDatasets(dataset):
+          if self.isDecorationTreeStale(d, treeName, self.decorFileName):
+            return True
+        return False
+
+    #____________________________________________________________
+    def mergeDecorationFiles(self, treeNames=None):
+        """Merge the shard files of the decorated datasets into decorFileName
+
+        Shards of other datasets or trees in the shard directory are ignored.
+
+        @param treeNames - systematics trees to merge (default are all trees decorated so far)
+        """
+        from ROOT import TFileMerger
+        from plotting.Dataset import TreeHandlePool
+        treeNames = treeNames if treeNames is not None else self.treeNames
+        shards = []
+        for treeName in treeNames:
+          for dataset in self.decoratedDatasets(self.dataset):
+            shard = self.shardFileName(dataset, treeName)
+            if os.path.exists(shard):
+              shards.append(shard)
+        # chains reading the old version of the file must not be reused
+        TreeHandlePool.get().release(self.decorFileName)
+        merger = TFileMerger(False)
+        if not merger.OutputFile(self.decorFileName, "RECREATE"):
+          raise Exception( 'mergeDecorationFiles(): unable to create output file "%s"' % self.decorFileName )
+        for shard in shards:
+          merger.AddFile(shard, False)
+        if not merger.Merge():
+          raise Exception( 'mergeDecorationFiles(): merging %d shards into "%s" failed' % (len(shards), self.decorFileName) )
+        logging.info("mergeDecorationFiles(): merged %d shards into %s" % (len(shards), self.decorFileName))
     
     def friendDecorationTree(self, dataset, treeName=None):
       from ROOT import TTree
       from ROOT import TMVA, TFile, TTree
       from plotting.Dataset import FriendTree
+      from plotting.Systematics import TreeSystematicVariation
       # recursive call on sub-datasets
       if isinstance(dataset,PhysicsProcess):
           for d in dataset.datasets: 
@@ -131,25 +322,36 @@ class DatasetMultiDecorator( DatasetDecorator ):
       if not decorTree:
         raise Exception( 'friendDecorarionTree(): could not open %s in file "%s"' %(dirName, friendTreeName ))
       del decorTree
-      #get dataset tree
-      dsTree=dataset._open(treeName)
-      friendtree=FriendTree(treeName=dirName+"/"+friendTreeName, fileNames=[self.decorFileName] ,alias=dataset.name+"_"+friendTreeName+"_Friend")
-      dataset.addFriendTree(friendtree)
-      logging.debug( 'friendDecorationTree(): Friended %s from %s to %s.' % (friendTreeName,decorFile,dsTree.GetName()))
       decorFile.Close()
-      del dsTree
+      alias=dataset.name+"_"+friendTreeName+"_Friend"
+      # the fingerprint keys cached columns reading the decoration branches
+      fingerprint=self.fingerprint(dataset, treeName)
+      for friendtree in dataset.friendTrees:
+        if friendtree.treeName == dirName+"/"+friendTreeName and friendtree.alias == alias:
+          logging.debug( 'friendDecorationTree(): %s already friended to %s.' % (friendTreeName,dataset.name))
+          friendtree.fingerprint=fingerprint
+          return
+      # the decoration tree is only valid for the systematics tree it was created from
+      variation=TreeSystematicVariation(treeName, treeName, treeName)
+      friendtree=FriendTree(treeName=dirName+"/"+friendTreeName, fileNames=[self.decorFileName] ,alias=alias, systematicVariations=[variation], indexNames=self.indexNames, fingerprint=fingerprint)
+      dataset.addFriendTree(friendtree)
+      logging.debug( 'friendDecorationTree(): Friended %s from %s to %s.' % (friendTreeName,self.decorFileName,dataset.name))
         
     def writeDecorationFile(self,friendTree, dataset, treeName):
-      from ROOT import TFile, TTree
+      from ROOT import TFile, TTree, TNamed, TObject
       if not self.decorFileName:
         raise ValueError("In writeDecorationFile: decorFileName not set")
-      outputFile = TFile.Open( self.decorFileName, 'UPDATE' )
-      outputFile.cd()
-      sysDir=outputFile.GetDirectory("decor_"+treeName)
-      if not sysDir:
-        sysDir=outputFile.mkdir("decor_"+treeName)
+      friendTree.GetUserInfo().Add( TNamed(self.fingerprintName, self.fingerprint(dataset, treeName)) )
+      # each tree goes into its own shard with the same layout as decorFileName
+      shardFileName = self.shardFileName(dataset, treeName)
+      if not os.path.isdir(os.path.dirname(shardFileName)):
+        os.makedirs(os.path.dirname(shardFileName))
+      outputFile = TFile.Open( shardFileName, 'RECREATE' )
+      if not outputFile or not outputFile.IsOpen():
+        raise Exception( 'writeDecorationFile(): unable to open output file "%s"' % shardFileName )
+      sysDir=outputFile.mkdir("decor_"+treeName)
       sysDir.cd()
-      friendTree.Write()
+      friendTree.Write("", TObject.kOverwrite)
       outputFile.Close()
    
     #____________________________________________________________
@@ -160,12 +362,17 @@ class DatasetMultiDecorator( DatasetDecorator ):
       # get primary tree
       # recursive call on sub-datasets
       if isinstance(dataset,PhysicsProcess):
+          rebuilt = 0
           for d in dataset.datasets: 
-              self.createDecorationTree(d, treeName)
-          return
+              rebuilt += self.createDecorationTree(d, treeName)
+          return rebuilt
       if dataset.name.endswith("2015"):
         print "Skipping DS %s to avoid duplicated MC tree in decor file for 2015/16 splitting"%dataset.name
-        return
+        return 0
+      if not self.updateDecorFile and not self.isDecorationTreeStale(dataset, treeName):
+        logging.info("createDecorationTree(): decoration of %s, tree:%s is up to date" % (dataset.name, treeName))
+        return 0
+      logging.info("createDecorationTree(): decorating %s, tree:%s" % (dataset.name, treeName))
       dsTree = dataset._open(treeName)
       friendTree = TTree("DecorationFriend_"+dataset.name, "DecorationFriend_"+dataset.name)
       
@@ -176,14 +383,20 @@ class DatasetMultiDecorator( DatasetDecorator ):
        # print "register values",values[i],hex(id(values[i]))
         branches[i] = friendTree.Branch(self.decorationList[i].branch,values[i],"%s/F"%(self.decorationList[i].branch))
        # print "register branches",branches[i],hex(id(branches[i]))
+      # copy the index branches to allow alignment by (major, minor) instead of entry number
+      indexValues={}
+      for name in (self.indexNames or []):
+        indexValues[name] = array('l',[0])
+        friendTree.Branch(name,indexValues[name],"%s/L"%(name))
 
       # decorate
       for i in dsTree:
           for j in range(0,len(self.decorationList)):
             values[j][0] = self.calc(dsTree,j)
+          for name in indexValues:
+            indexValues[name][0] = long(getattr(dsTree,name))
           friendTree.Fill()
-          for j in range(0,len(self.decorationList)):
-            val=branches[j].GetLeaf(self.decorationList[j].branch).GetValue()
-        #    print "getting branch val:", j, val
       
       self.writeDecorationFile(friendTree,dataset,treeName)
+      friendTree.ResetBranchAddresses()
+      return 1
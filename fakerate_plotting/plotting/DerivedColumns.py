@@ -0,0 +1,95 @@
+"""@package DerivedColumns
+Columns calculated from other expressions with vectorised numpy kernels
+
+A DerivedColumn combines the values of its input expressions for all
+entries at once instead of evaluating a formula event by event. Derived
+columns are defined on a Dataset (see Dataset.defineColumn) and can be used
+by name in Cut and Variable expressions like any branch of the tree.
+"""
+import math
+
+def deltaPhi( phi1, phi2 ):
+    ## Difference in phi wrapped into [-pi, pi)
+    #  @param phi1    array of azimuthal angles
+    #  @param phi2    array of azimuthal angles
+    #  @return array of phi1 - phi2
+    import numpy
+    return numpy.mod( phi1 - phi2 + math.pi, 2*math.pi ) - math.pi
+
+def deltaR( eta1, phi1, eta2, phi2 ):
+    ## Distance in the eta-phi plane taking the periodicity of phi into account
+    #  @return array of sqrt( deltaEta^2 + deltaPhi^2 )
+    import numpy
+    return numpy.hypot( eta1 - eta2, deltaPhi( phi1, phi2 ) )
+
+def invariantMass( pt1, eta1, phi1, m1, pt2, eta2, phi2, m2 ):
+    ## Invariant mass of two objects given by transverse momentum, pseudorapidity, azimuthal angle and mass
+    #  @return array of invariant masses
+    import numpy
+    px = pt1 * numpy.cos( phi1 ) + pt2 * numpy.cos( phi2 )
+    py = pt1 * numpy.sin( phi1 ) + pt2 * numpy.sin( phi2 )
+    pz = pt1 * numpy.sinh( eta1 ) + pt2 * numpy.sinh( eta2 )
+    e = numpy.sqrt( ( pt1 * numpy.cosh( eta1 ) )**2 + m1**2 ) + numpy.sqrt( ( pt2 * numpy.cosh( eta2 ) )**2 + m2**2 )
+    # protect against small negative values from rounding
+    return numpy.sqrt( numpy.maximum( e**2 - px**2 - py**2 - pz**2, 0. ) )
+
+def productOf( *columns ):
+    ## Product of all columns, equivalent to a * b * c
+    import operator
+    return reduce( operator.mul, columns )
+
+def sumOf( *columns ):
+    ## Sum of all columns, equivalent to a + b + c
+    import operator
+    return reduce( operator.add, columns )
+
+class DerivedColumn( object ):
+    ## Definition of a column calculated from input expressions with a vectorised kernel
+    defaultChunkSize = 1000000     # number of entries passed to the kernel at once
+
+    def __init__( self, name, kernel, inputs ):
+        ## Default constructor
+        #  @param name      name used to refer to the column in expressions
+        #  @param kernel    function calculating the column from one array per input
+        #  @param inputs    list of input expressions (or names of other derived columns)
+        self.name = name
+        self.kernel = kernel
+        self.inputs = list( inputs )
+        self.chunkSize = self.defaultChunkSize
+
+    def __repr__( self ):
+        return 'DerivedColumn(%s)' % self.name
+
+    @property
+    def kernelHash( self ):
+        ## hash of the module and the code of the kernel, changes whenever the calculation changes
+        import hashlib
+        md5 = hashlib.md5()
+        md5.update( str( getattr( self.kernel, '__module__', '' ) ) )
+        code = getattr( self.kernel, '__code__', None )
+        if code is not None:
+            md5.update( code.co_code )
+            md5.update( repr( code.co_consts ) )
+        else:
+            # builtin functions and numpy ufuncs have no python code
+            md5.update( repr( self.kernel ) )
+        return md5.hexdigest()
+    
+    @property
+    def expression( self ):
+        ## expression identifying the calculation, i.e. used as key in the ColumnCache
+        #  Contains the name of the column and the hash of the kernel, lambdas all share the same __name__.
+        return '%s_%s(%s)' % ( self.name, self.kernelHash, ','.join( self.inputs ) )
+
+    def evaluate( self, columns ):
+        ## Calculate the column from the input columns
+        #  The kernel is applied chunk by chunk to limit the size of the temporary arrays.
+        #  @param columns    list of arrays, one per input expression
+        #  @return array of values
+        import numpy
+        nEntries = len( columns[0] ) if columns else 0
+        result = numpy.empty( nEntries )
+        for start in xrange( 0, nEntries, self.chunkSize ):
+            stop = start + self.chunkSize
+            result[ start:stop ] = self.kernel( *[ column[ start:stop ] for column in columns ] )
+        return result
@@ -4,6 +4,7 @@ Collection of helper methods to statistical values on distributions.
 @author: Christian Grefe, Bonn University (christian.grefe@cern.ch)
 '''
 import sys, math, numpy, logging, uuid
+from plotting import NumpyBridge
 
 logger = logging.getLogger( __name__ )
 
@@ -55,20 +56,11 @@ def histToArray( hist, includeOverflow=False ):
     #  @param hist             histogram object (1D)
     #  @param includeOverflow  decide if under- and overflow should be included as first and last bin
     #  @return (values, weights)
-    dataType = 'double'
-    from ROOT import TH1C, TH1S, TH1I, TH1F
-    if isinstance( hist, TH1F ):
-        dataType = 'float32'
-    elif isinstance( hist, TH1I ):
-        dataType = 'int32'
-    elif isinstance( hist, TH1S ):
-        dataType = 'int16'
-    elif isinstance( hist, TH1C ):
-        dataType = 'int8'
-    weights = numpy.frombuffer( hist.GetArray(), dataType, hist.fN )
-    values = numpy.empty( hist.fN )
-    for index in xrange( hist.fN ):
-        values[index] = hist.GetBinLowEdge( index )
+    weights = NumpyBridge.contents( hist )
+    # lower bin edges like TH1::GetBinLowEdge, the underflow bin starts one average bin width below the axis
+    edges = NumpyBridge.edges( hist.GetXaxis() )
+    width = ( edges[-1] - edges[0] ) / ( len( edges ) - 1 )
+    values = numpy.concatenate( ( [ edges[0] - width ], edges ) )
     if includeOverflow:
         return values, weights
     else:
@@ -76,20 +68,42 @@ def histToArray( hist, includeOverflow=False ):
     
 def arrayToHist( data, name=None, title=None, weights=None, nBins=100, low=None, up=None ):
     ## Fills the (weighted) values from an array into a histogram
+    #  The bin contents and errors are calculated with numpy and copied into the histogram at once.
     #  @param data          list of values
     #  @weights             list of weights (optional, needs to match length of data)
     #  @return 1D-histogram
-    from ROOT import TH1D
+    from ROOT import TH1, TH1D
+    from plotting.Variable import Binning
     name = name if name is not None else 'h_%d' % uuid.uuid1()
     title = title if title is not None else name
     if len(data) < 1:
         return TH1D( name, title, nBins, 0, 1 )
-    data, weights = sortDataAndWeights( data, weights )
-    low = low if low is not None else data[0]
-    up = up if up is not None else data[-1]
-    hist = TH1D( name, title, nBins, low, up ) 
-    for value, weight in zip( data, weights ):
-        hist.Fill( value, weight )
+    data = numpy.asarray( data, dtype=numpy.float64 )
+    if weights is None:
+        weights = numpy.ones( (len(data),) )
+    else:
+        weights = numpy.asarray( weights, dtype=numpy.float64 )
+    if len(data) != len(weights):
+        logger.error( 'arrayToHist(): length of data does not match length of weights' )
+    low = low if low is not None else numpy.nanmin( data )
+    up = up if up is not None else numpy.nanmax( data )
+    hist = TH1D( name, title, nBins, low, up )
+    if not low < up:
+        # ROOT determines the axis range from the filled values in this case
+        hist.FillN( len(data), data, weights )
+        return hist
+    bins = Binning( nBins, low, up ).findBins( data )
+    hist.Sumw2()
+    hist.SetContent( numpy.bincount( bins, weights, minlength=nBins+2 ) )
+    hist.GetSumw2().Set( nBins+2, numpy.bincount( bins, weights**2, minlength=nBins+2 ) )
+    # same statistics as accumulated by TH1::Fill
+    if not TH1.GetStatOverflows():
+        inside = (bins > 0) & (bins <= nBins)
+        data = data[inside]
+        weights = weights[inside]
+    stats = numpy.array( [ weights.sum(), (weights**2).sum(), (weights*data).sum(), (weights*data**2).sum() ] )
+    hist.PutStats( stats )
+    hist.SetEntries( len(bins) )
     return hist
 
 def percentiles( data, percentiles, weights=None ):
@@ -110,6 +124,30 @@ def percentiles( data, percentiles, weights=None ):
     cumulativeWeights = numpy.cumsum( weights )
     return numpy.interp( numpy.array( percentiles ) * sumOfWeights, cumulativeWeights, data )
 
+def groupedPercentiles( data, weights, boundaries, percentiles ):
+    ## Calculates the percentiles of several groups of data points at once, like percentiles() for each group
+    #  The data is sorted only once for all groups. The cumulative weights are summed per group with the same
+    #  arithmetic as percentiles(), i.e. values on the interpolation knots are identical to the per group results.
+    #  @param data          array of values, sorted by group and by value within each group
+    #  @param weights       array of non-negative weights (needs to match length of data)
+    #  @param boundaries    array of nGroups+1 indices, group i consists of the entries from boundaries[i] to boundaries[i+1]
+    #  @param percentiles   list of percentiles used for all groups or array with one row of percentiles per group
+    #  @return array with one row per group and one column per percentile, NaN for empty groups
+    data = numpy.asarray( data, dtype=numpy.float64 )
+    weights = numpy.asarray( weights, dtype=numpy.float64 )
+    boundaries = numpy.asarray( boundaries )
+    nGroups = len( boundaries ) - 1
+    percentiles = numpy.asarray( percentiles, dtype=numpy.float64 )
+    if percentiles.ndim == 1:
+        percentiles = numpy.tile( percentiles, ( nGroups, 1 ) )
+    result = numpy.full( percentiles.shape, numpy.nan )
+    for iGroup in xrange( nGroups ):
+        start, stop = boundaries[iGroup], boundaries[iGroup+1]
+        if stop > start:
+            groupWeights = weights[start:stop]
+            result[iGroup] = numpy.interp( percentiles[iGroup] * groupWeights.sum(), numpy.cumsum( groupWeights ), data[start:stop] )
+    return result
+
 def truncatedInterval( data, fraction=OneSigmaFraction, weights=None ):
     ## Calculates the central interval boundaries on the given array containing the given fraction of entries
     #  Entries are trimmed symmetrically
@@ -150,6 +188,41 @@ def truncatedMean( data, fraction=OneSigmaFraction, weights=None ):
 
 def smallestInterval( data, fraction=OneSigmaFraction, weights=None ):
     ## Finds the smallest interval within the given values conatining the given fraction of entries
+    #  For each start value the first end value with enough weight in between is found with a binary
+    #  search on the cumulative sum of the weights, i.e. the complexity is O(n log n).
+    #  @param data      list of values
+    #  @param fraction  fraction of (weighted) entries contained in the interval
+    #  @param weights   list of weights, length needs to match array
+    #  @return (lower, upper) boundaries
+    # sorting the array minimizes the number of possible intervals to consider
+    data, weights = sortDataAndWeights( data, weights )
+    if (weights < 0).any():
+        return _smallestIntervalLoop( data, fraction, weights )
+    nEntries = len( data )
+    totalSumOfWeights = weights.sum()
+    # target number of entries in the interval
+    targetSumOfWeights = fraction * totalSumOfWeights
+    cumulativeWeights = numpy.cumsum( weights )
+    # only start indices with a sufficient fraction of weights after them are considered
+    nStartIndices = numpy.count_nonzero( totalSumOfWeights - cumulativeWeights >= targetSumOfWeights )
+    if nStartIndices < 1:
+        return data[0], data[0]
+    # sum of the weights before each index, the interval [start, end) needs to exceed the target
+    weightsBefore = numpy.concatenate( ( [0.], cumulativeWeights ) )
+    startIndices = numpy.arange( nStartIndices )
+    endIndices = numpy.searchsorted( weightsBefore, weightsBefore[ startIndices ] + targetSumOfWeights, side='right' )
+    valid = endIndices < nEntries
+    if not valid.any():
+        return data[0], data[0]
+    startIndices = startIndices[ valid ]
+    endIndices = endIndices[ valid ]
+    # the first of several intervals with the same width is used
+    index = numpy.argmin( data[ endIndices ] - data[ startIndices ] )
+    return data[ startIndices[index] ], data[ endIndices[index] ]
+
+def _smallestIntervalLoop( data, fraction=OneSigmaFraction, weights=None ):
+    ## helper method to find the smallest interval by scanning all start indices
+    #  Only used for negative weights, where the cumulative sum is not monotonic.
     # sorting the array minimizes the number of possible intervals to consider
     data, weights = sortDataAndWeights( data, weights )
     totalSumOfWeights = weights.sum()
@@ -206,6 +279,30 @@ def sumOfWeights( weights ):
     variance = (weights**2).sum()
     return weights.sum(), math.sqrt( variance ) 
 
+def cutFlowFactors( values ):
+    ## Combines the per-event values of a list of cuts into the selections of a cutflow
+    #  The values of the cuts are multiplied like in TTree::Draw, i.e. cuts carrying a factor weight the events
+    #  of every selection they are part of. Events with a factor of zero are not selected.
+    #  @param values    array with one row per cut and one column per event
+    #  @return dictionary of 'individual', 'cumulative' and 'nMinusOne' to the list of event factors for each cut
+    values = numpy.asarray( values, dtype=float )
+    nCuts = len( values )
+    cumulative = numpy.multiply.accumulate( values, axis=0 )
+    # product of all cuts from the given one to the last one
+    following = numpy.multiply.accumulate( values[::-1], axis=0 )[::-1]
+    nMinusOne = []
+    for index in xrange( nCuts ):
+        if nCuts == 1:
+            factor = numpy.ones( values.shape[1] )
+        elif index == 0:
+            factor = following[1]
+        elif index == nCuts - 1:
+            factor = cumulative[index-1]
+        else:
+            factor = cumulative[index-1] * following[index+1]
+        nMinusOne.append( factor )
+    return { 'individual' : list( values ), 'cumulative' : list( cumulative ), 'nMinusOne' : nMinusOne }
+
 if __name__ == '__main__':
     # fill some dummy values
     import ROOT
@@ -237,5 +334,29 @@ if __name__ == '__main__':
     print 'sumOfWeights():', sumOfWeights( w )
     print 'Unweighted poisson mean and variance:', len(w), math.sqrt( len(w) )
     
+    # compare smallestInterval() to the reference loop and check the scaling
+    import time
+    for nEntries in [ 10**3, 10**4, 10**5, 10**6, 10**7 ]:
+        values = numpy.random.normal( mean, sigma, nEntries )
+        valueWeights = numpy.abs( numpy.random.normal( weightMean, weightSigma, nEntries ) )
+        startTime = time.time()
+        result = smallestInterval( values, weights=valueWeights )
+        duration = time.time() - startTime
+        if nEntries <= 10**4:
+            reference = _smallestIntervalLoop( values, weights=valueWeights )
+            print 'smallestInterval(%d): %s in %.3fs, loop result %s' % ( nEntries, result, duration, reference )
+        else:
+            print 'smallestInterval(%d): %s in %.3fs' % ( nEntries, result, duration )
+    
+    # compare groupedPercentiles() to percentiles() of each group, including values on the knots
+    groups = numpy.random.randint( 0, 20, 10**5 )
+    values = numpy.round( numpy.random.normal( mean, sigma, len(groups) ), 1 )
+    valueWeights = numpy.ones( len(groups) )
+    order = numpy.lexsort( ( values, groups ) )
+    boundaries = numpy.searchsorted( groups[order], numpy.arange( 21 ) )
+    grouped = groupedPercentiles( values[order], valueWeights[order], boundaries, [0.16, 0.5, 0.84] )
+    reference = numpy.array( [ percentiles( values[groups == iGroup], [0.16, 0.5, 0.84], valueWeights[groups == iGroup] ) for iGroup in xrange( 20 ) ] )
+    print 'groupedPercentiles(): identical to percentiles() per group:', numpy.array_equal( grouped, reference )
+    
     x = raw_input( 'Continue?' )
     
\ No newline at end of file
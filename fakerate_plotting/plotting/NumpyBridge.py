@@ -0,0 +1,184 @@
+"""@package NumpyBridge
+Helpers to move numpy arrays into ROOT objects without loops in python
+
+The loops run in small C++ functions which are compiled by the ROOT
+interpreter the first time they are needed. Histogram contents and sums of
+squared weights are accessed as numpy views of the internal TH1 buffers and
+written back with single calls instead of one SetBinContent per bin.
+"""
+import logging, math
+
+logger = logging.getLogger( __name__ )
+
+_code = '''
+#include "TTree.h"
+#include "TBranch.h"
+#include <string>
+
+namespace NumpyBridge {
+    template <typename T>
+    void fillBranch( TTree* tree, const char* name, const char* type, const T* values, Long64_t n ) {
+        T value = 0;
+        TBranch* branch = tree->Branch( name, &value, ( std::string( name ) + "/" + type ).c_str() );
+        for ( Long64_t i = 0; i < n; ++i ) {
+            value = values[i];
+            branch->Fill();
+        }
+        // the address points to a local variable
+        branch->ResetAddress();
+        tree->SetEntries( n );
+    }
+    void fillBranchD( TTree* tree, const char* name, const Double_t* values, Long64_t n ) { fillBranch<Double_t>( tree, name, "D", values, n ); }
+    void fillBranchF( TTree* tree, const char* name, const Float_t* values, Long64_t n ) { fillBranch<Float_t>( tree, name, "F", values, n ); }
+}
+'''
+_declared = False
+
+def _declare():
+    ## helper method to compile the C++ helpers once
+    global _declared
+    if _declared:
+        return
+    from ROOT import gInterpreter
+    if not gInterpreter.Declare( _code ):
+        raise RuntimeError( '_declare(): unable to compile the NumpyBridge helpers' )
+    _declared = True
+
+def fillBranch( tree, name, values ):
+    ## Add a new branch with the given values to a tree
+    #  Existing entries of the tree are kept, the tree is resized to the number of values.
+    #  Float arrays are stored as Float_t, everything else as Double_t.
+    #  @param tree      TTree object, usually an in-memory tree used as friend
+    #  @param name      name of the new branch
+    #  @param values    array with one value per entry of the tree
+    import numpy
+    import ROOT
+    _declare()
+    if values.dtype == numpy.float32:
+        values = numpy.ascontiguousarray( values )
+        ROOT.NumpyBridge.fillBranchF( tree, name, values, len( values ) )
+    else:
+        values = numpy.ascontiguousarray( values, dtype=numpy.float64 )
+        ROOT.NumpyBridge.fillBranchD( tree, name, values, len( values ) )
+    logger.debug( 'fillBranch(): filled %d entries into "%s" of %s' % ( len(values), name, tree.GetName() ) )
+
+# numpy types of the bin contents by the array class the histogram inherits from (also for 2D and 3D), everything else uses double
+_contentTypes = [ ( 'TArrayF', 'float32' ), ( 'TArrayI', 'int32' ), ( 'TArrayS', 'int16' ), ( 'TArrayC', 'int8' ) ]
+# bin boundaries of axes with fixed bin width by ( nBins, low, up )
+_fixedEdges = {}
+maxCachedEdges = 10000
+
+def isProfile( hist ):
+    ## Check if the histogram is a profile, its buffer holds the weighted sums and not the bin contents
+    #  @param hist    TH1 object
+    #  @return bool
+    import ROOT
+    return isinstance( hist, ( ROOT.TProfile, ROOT.TProfile2D, ROOT.TProfile3D ) )
+
+def contents( hist ):
+    ## Get the bin contents of a histogram including under- and overflow bins
+    #  The array is a view of the histogram buffer, i.e. no values are copied. Use setContents to modify the histogram.
+    #  Profiles store sums of weighted values, their bin contents (the means) are copied bin by bin instead.
+    #  @param hist    TH1 object (also works for 2D and 3D histograms using the global bin numbers)
+    #  @return array of bin contents
+    import numpy
+    import ROOT
+    if isProfile( hist ):
+        return numpy.array( [ hist.GetBinContent( iBin ) for iBin in xrange( hist.fN ) ] )
+    dataType = 'float64'
+    for className, contentType in _contentTypes:
+        if isinstance( hist, getattr( ROOT, className ) ):
+            dataType = contentType
+            break
+    return numpy.frombuffer( hist.GetArray(), dataType, hist.fN )
+
+def sumw2( hist ):
+    ## Get the sums of squared weights of a histogram including under- and overflow bins
+    #  The array is a view of the histogram buffer, i.e. no values are copied.
+    #  @param hist    TH1 object
+    #  @return array of sums of squared weights or None if the histogram does not store them
+    import numpy
+    array = hist.GetSumw2()
+    if not array.fN:
+        return None
+    return numpy.frombuffer( array.GetArray(), 'float64', array.fN )
+
+def squaredErrors( hist ):
+    ## Get the squared bin errors of a histogram including under- and overflow bins like TH1::GetBinError
+    #  Without stored sums of squared weights the errors are the square root of the contents.
+    #  The errors of profiles are calculated by ROOT bin by bin.
+    #  @param hist    TH1 object
+    #  @return array of squared errors
+    import numpy
+    if isProfile( hist ):
+        return numpy.array( [ hist.GetBinError( iBin ) for iBin in xrange( hist.fN ) ] )**2
+    values = sumw2( hist )
+    if values is None:
+        return numpy.abs( contents( hist ) ).astype( numpy.float64 )
+    return values
+
+def edges( axis ):
+    ## Get the bin boundaries of a TAxis as numpy array
+    #  Boundaries of axes with fixed bin width are cached. The array must not be modified.
+    #  @param axis    TAxis object
+    #  @return array of bin boundaries
+    import numpy
+    xBins = axis.GetXbins()
+    if xBins.GetSize():
+        values = numpy.frombuffer( xBins.GetArray(), dtype='double', count=xBins.GetSize() ).copy()
+        values.flags.writeable = False
+        return values
+    key = ( axis.GetNbins(), axis.GetXmin(), axis.GetXmax() )
+    values = _fixedEdges.get( key )
+    if values is None:
+        if len( _fixedEdges ) >= maxCachedEdges:
+            _fixedEdges.clear()
+        values = numpy.linspace( key[1], key[2], key[0]+1 )
+        values.flags.writeable = False
+        _fixedEdges[ key ] = values
+    return values
+
+def findBins( axis, values ):
+    ## Find the bin numbers for an array of values like TAxis::FindFixBin
+    #  Variable bins are found by a binary search in the cached bin boundaries, fixed bins with the same arithmetic as ROOT.
+    #  Values below the range end up in the underflow bin 0, values above the range (and NaN) in the overflow bin nBins+1.
+    #  @param axis      TAxis object
+    #  @param values    array of values
+    #  @return array of bin numbers
+    import numpy
+    if axis.GetXbins().GetSize():
+        return numpy.searchsorted( edges( axis ), values, side='right' )
+    from plotting.Variable import Binning
+    return Binning( axis.GetNbins(), axis.GetXmin(), axis.GetXmax() ).findBins( values )
+
+def setContents( hist, values, squaredWeights=None ):
+    ## Replace all bin contents of a histogram including under- and overflow bins
+    #  The number of entries is kept, the statistics are recalculated from the new contents by ROOT.
+    #  Profiles are set bin by bin with SetBinContent and SetBinError, only for the modified bins.
+    #  @param hist              TH1 object
+    #  @param values            array of bin contents, one per global bin
+    #  @param squaredWeights    array of sums of squared weights (optional), the histogram stores them afterwards
+    import numpy
+    if len( values ) != hist.fN:
+        raise ValueError( 'setContents(): %d values do not match the %d bins of %s' % ( len(values), hist.fN, hist.GetName() ) )
+    if squaredWeights is not None and len( squaredWeights ) != hist.fN:
+        raise ValueError( 'setContents(): %d squared weights do not match the %d bins of %s' % ( len(squaredWeights), hist.fN, hist.GetName() ) )
+    entries = hist.GetEntries()
+    if isProfile( hist ):
+        # setting a profile bin to its own content changes it, only modified bins are written
+        changed = numpy.asarray( values ) != contents( hist )
+        if squaredWeights is not None:
+            changed |= numpy.asarray( squaredWeights ) != squaredErrors( hist )
+        for iBin in numpy.flatnonzero( changed ):
+            hist.SetBinContent( int( iBin ), float( values[iBin] ) )
+            if squaredWeights is not None:
+                hist.SetBinError( int( iBin ), math.sqrt( squaredWeights[iBin] ) )
+        hist.SetEntries( entries )
+        return
+    hist.SetContent( numpy.ascontiguousarray( values, dtype=numpy.float64 ) )
+    if squaredWeights is not None:
+        if not hist.GetSumw2N():
+            hist.Sumw2()
+        hist.GetSumw2().Set( len( squaredWeights ), numpy.ascontiguousarray( squaredWeights, dtype=numpy.float64 ) )
+    # TH1::SetContent counts every bin as an entry
+    hist.SetEntries( entries )
@@ -0,0 +1,230 @@
+"""@package QuantileSketch
+Streaming and mergeable sketch of a weighted distribution to estimate percentiles
+
+The sketch is a merging t-digest (T. Dunning, O. Ertl, "Computing Extremely
+Accurate Quantiles Using t-Digests"). Weighted values are buffered and merged
+into a bounded number of centroids (mean and weight). The size of the centroids
+is limited by the scale function k1(q) = compression / (2 pi) * asin(2q - 1):
+every centroid made from more than one value spans at most one unit in k1, i.e.
+a range in q of about 2 pi sqrt(q(1-q)) / compression. Interpolating between the
+centroids therefore estimates the percentile q with an error in q of at most
+
+    |dq| <= pi * sqrt( q (1-q) ) / compression
+
+which is smaller at the tails than in the center of the distribution. The
+bound assumes that no single weight exceeds the budget of a centroid, i.e.
+w / sum(w) < 2 pi sqrt( q (1-q) ) / compression around q: a single value is
+never split, so heavy-tailed weights can give larger errors. The memory is
+bounded by the buffer size plus about compression/2 centroids, independent of
+the number of values. Sketches filled from different chunks, datasets or
+processes can be merged with the same bound.
+
+Only non-negative weights can be represented. Adding negative weights, i.e.
+from NLO generators, raises a ValueError instead of biasing the percentiles.
+"""
+from plotting.DistributionTools import OneSigmaFraction
+import logging, math
+
+class QuantileSketch( object ):
+    ## Merging t-digest of weighted values
+    defaultCompression = 200       # scale parameter of the k1 scale function, the sketch keeps about compression/2 centroids
+    defaultBufferSize = 100000     # number of values collected before merging them into the centroids
+    logger = logging.getLogger( __name__ + '.QuantileSketch' )
+
+    def __init__( self, compression=None, bufferSize=None ):
+        ## Default constructor
+        #  @param compression    scale parameter, larger values increase the accuracy and the memory
+        #  @param bufferSize     number of values collected before merging
+        import numpy
+        self.compression = compression if compression is not None else self.defaultCompression
+        self.bufferSize = bufferSize if bufferSize is not None else self.defaultBufferSize
+        self.means = numpy.empty( 0 )
+        self.weights = numpy.empty( 0 )
+        self.minimum = numpy.inf
+        self.maximum = -numpy.inf
+        self._buffer = []
+        self._nBuffered = 0
+
+    def __repr__( self ):
+        self._merge()
+        return 'QuantileSketch(%d centroids, sumOfWeights=%g)' % ( len(self.means), self.weights.sum() )
+
+    @property
+    def sumOfWeights( self ):
+        ## total weight of all values added to the sketch
+        self._merge()
+        return self.weights.sum()
+
+    def accuracy( self, q ):
+        ## Maximum error in q of the estimate of the percentile q, see the module documentation
+        #  Only valid if no single weight exceeds the weight budget of a centroid around q.
+        #  @param q    percentile (between 0 and 1)
+        #  @return bound on the error in q
+        return math.pi * math.sqrt( q * (1-q) ) / self.compression
+
+    def add( self, values, weights=None ):
+        ## Add a chunk of weighted values to the sketch
+        #  Entries with zero weight do not contribute and entries with NaN values are skipped.
+        #  Negative weights can not be represented, a ValueError is raised and nothing is added.
+        #  The values are copied, i.e. the passed arrays can be modified afterwards.
+        #  @param values     array of values
+        #  @param weights    array of weights (optional, needs to match length of values)
+        import numpy
+        # the arrays are buffered, i.e. copies are needed for views like the TTree buffers from getValuesFromTree
+        values = numpy.array( values, dtype=numpy.float64 ).ravel()
+        if weights is None:
+            weights = numpy.ones( len(values) )
+        else:
+            weights = numpy.array( weights, dtype=numpy.float64 ).ravel()
+        if len(values) != len(weights):
+            self.logger.error( 'add(): length of values (%d) does not match length of weights (%d)' % ( len(values), len(weights) ) )
+            return
+        negative = ( weights < 0 ).sum()
+        if negative:
+            raise ValueError( 'add(): %d entries with negative weight can not be represented in the sketch' % negative )
+        isNaN = numpy.isnan( values )
+        if isNaN.any():
+            self.logger.warning( 'add(): skipping %d entries with NaN value' % isNaN.sum() )
+        valid = ( weights > 0 ) & ~isNaN
+        if not valid.all():
+            values = values[valid]
+            weights = weights[valid]
+        if len(values) < 1:
+            return
+        self.minimum = min( self.minimum, values.min() )
+        self.maximum = max( self.maximum, values.max() )
+        self._buffer.append( ( values, weights ) )
+        self._nBuffered += len(values)
+        if self._nBuffered >= self.bufferSize:
+            self._merge()
+
+    def merge( self, other ):
+        ## Merge another sketch into this one, e.g. the result of a different chunk or worker process
+        #  @param other    QuantileSketch object
+        #  @return this sketch
+        other._merge()
+        if len( other.means ):
+            self.minimum = min( self.minimum, other.minimum )
+            self.maximum = max( self.maximum, other.maximum )
+            self._buffer.append( ( other.means, other.weights ) )
+            self._nBuffered += len( other.means )
+            self._merge()
+        return self
+
+    def scale( self, factor ):
+        ## Scale all weights, e.g. to apply a global scale factor (does not change any percentile)
+        #  @param factor    positive scale factor
+        if not factor > 0:
+            raise ValueError( 'scale(): only positive scale factors are supported, got %g' % factor )
+        self._merge()
+        self.weights = self.weights * factor
+
+    def percentiles( self, percentiles ):
+        ## Estimate the values of all requested percentiles, like DistributionTools.percentiles
+        #  @param percentiles    list of percentiles (each between 0 and 1)
+        #  @return array of percentile values (same order as the passed percentiles)
+        import numpy
+        self._merge()
+        percentiles = numpy.asarray( percentiles, dtype=numpy.float64 )
+        if len( self.means ) < 1:
+            self.logger.warning( 'percentiles(): empty sketch, unable to calculate percentile' )
+            return numpy.full( percentiles.shape, numpy.nan )
+        cumulativeWeights = numpy.cumsum( self.weights )
+        sumOfWeights = cumulativeWeights[-1]
+        # each centroid represents its mean at the center of its weight, the extreme values are exact
+        positions = numpy.concatenate( ( [0.], cumulativeWeights - 0.5 * self.weights, [sumOfWeights] ) )
+        values = numpy.concatenate( ( [self.minimum], self.means, [self.maximum] ) )
+        return numpy.interp( percentiles * sumOfWeights, positions, values )
+
+    def truncatedInterval( self, fraction=OneSigmaFraction ):
+        ## Estimate the central interval containing the given fraction of weights, like DistributionTools.truncatedInterval
+        #  @param fraction    fraction of (weighted) entries contained in the interval
+        #  @return (lower, upper) boundaries
+        low, up = self.percentiles( [ 0.5*(1-fraction), 1-0.5*(1-fraction) ] )
+        return low, up
+
+    def truncatedMean( self, fraction=OneSigmaFraction ):
+        ## Estimate the weighted mean of the central fraction of weights, like DistributionTools.truncatedMean
+        #  Centroids are used as a whole, i.e. the accuracy is limited by the size of the centroids at the boundaries.
+        #  @param fraction    fraction of (weighted) entries contained in the interval
+        #  @return weighted mean of the values within the fraction boundaries
+        import numpy
+        low, up = self.truncatedInterval( fraction )
+        mask = ( self.means >= low ) & ( self.means < up )
+        return numpy.average( self.means[mask], weights=self.weights[mask] )
+
+    def _kScale( self, q ):
+        ## helper method implementing the k1 scale function
+        import numpy
+        return self.compression / ( 2 * math.pi ) * numpy.arcsin( 2 * numpy.clip( q, 0., 1. ) - 1 )
+
+    def _inverseKScale( self, k ):
+        ## helper method implementing the inverse of the k1 scale function
+        import numpy
+        return 0.5 * ( numpy.sin( numpy.clip( k * 2 * math.pi / self.compression, -0.5*math.pi, 0.5*math.pi ) ) + 1 )
+
+    def _merge( self ):
+        ## helper method to merge the buffered values into the centroids
+        #  Neighbouring entries are combined as long as the centroid spans at most one unit in k, the boundaries
+        #  of each centroid are found with a binary search on the cumulative weights.
+        import numpy
+        if not self._buffer:
+            return
+        means = numpy.concatenate( [ self.means ] + [ values for values, weights in self._buffer ] )
+        weights = numpy.concatenate( [ self.weights ] + [ weights for values, weights in self._buffer ] )
+        self._buffer = []
+        self._nBuffered = 0
+        order = numpy.argsort( means, kind='mergesort' )
+        means = means[order]
+        weights = weights[order]
+        cumulativeWeights = numpy.cumsum( weights )
+        sumOfWeights = cumulativeWeights[-1]
+        starts = []
+        start = 0
+        weightBefore = 0.
+        while start < len( means ):
+            starts.append( start )
+            limit = self._inverseKScale( self._kScale( weightBefore / sumOfWeights ) + 1 ) * sumOfWeights
+            # at least one entry per centroid, large single weights can exceed the limit
+            stop = max( start + 1, numpy.searchsorted( cumulativeWeights, limit, side='right' ) )
+            weightBefore = cumulativeWeights[ stop - 1 ]
+            start = stop
+        self.weights = numpy.add.reduceat( weights, starts )
+        self.means = numpy.add.reduceat( weights * means, starts ) / self.weights
+        self.logger.debug( '_merge(): merged %d entries into %d centroids' % ( len(means), len(self.means) ) )
+
+def mergeSketches( sketches ):
+    ## Merge a list of sketches into a new sketch, e.g. the results of several worker processes
+    #  @param sketches    list of QuantileSketch objects
+    #  @return the merged QuantileSketch
+    result = None
+    for sketch in sketches:
+        if result is None:
+            result = QuantileSketch( sketch.compression, sketch.bufferSize )
+        result.merge( sketch )
+    return result if result is not None else QuantileSketch()
+
+if __name__ == '__main__':
+    # check the accuracy against the exact percentiles and the documented bound
+    import numpy, time
+    from plotting.DistributionTools import percentiles
+    quantiles = numpy.array( [ 0.001, 0.01, 0.025, 0.16, 0.5, 0.84, 0.975, 0.99, 0.999 ] )
+    values = numpy.random.lognormal( 0., 1., 10**7 )
+    weights = numpy.random.exponential( 1., 10**7 )
+    startTime = time.time()
+    sketches = []
+    for start in xrange( 0, len(values), 10**6 ):
+        sketch = QuantileSketch()
+        sketch.add( values[start:start+10**6], weights[start:start+10**6] )
+        sketches.append( sketch )
+    sketch = mergeSketches( sketches )
+    estimates = sketch.percentiles( quantiles )
+    print 'sketch: %d centroids filled in %.2fs' % ( len(sketch.means), time.time() - startTime )
+    exact = percentiles( values, quantiles, weights )
+    # error in q of the estimate, i.e. the weighted fraction of values below the estimate
+    order = numpy.argsort( values )
+    cumulativeWeights = numpy.cumsum( weights[order] ) / weights.sum()
+    for q, estimate, reference in zip( quantiles, estimates, exact ):
+        dq = abs( cumulativeWeights[ numpy.searchsorted( values[order], estimate ) ] - q )
+        bound = sketch.accuracy( q )
+        print 'q=%-6g sketch=%-12.6g exact=%-12.6g |dq|=%.2e bound=%.2e' % ( q, estimate, reference, dq, bound )
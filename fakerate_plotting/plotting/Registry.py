@@ -0,0 +1,189 @@
+"""@package Registry
+Registry of lazily created definitions, i.e. Variable and Cut objects
+
+Definitions are declared with their factory and the arguments only and the
+actual object is created on first use. Pickling a declaration (or a whole
+registry) stores the factory and arguments, so definitions can be handed to
+worker processes without importing and executing the definition modules.
+"""
+import operator
+
+def allOf( *objects ):
+    ## Combines all objects using the & operator, equivalent to a & b & c
+    #  @param objects    objects to combine, i.e. Cut objects
+    #  @return the combined object
+    return reduce( operator.and_, objects )
+
+def anyOf( *objects ):
+    ## Combines all objects using the | operator, equivalent to a | b | c
+    #  @param objects    objects to combine, i.e. Cut objects
+    #  @return the combined object
+    return reduce( operator.or_, objects )
+
+def _createLazyDefinition( factory, args, kwargs ):
+    ## Helper to recreate a LazyDefinition from its pickled declaration
+    return LazyDefinition( factory, *args, **kwargs )
+
+def _forward( name ):
+    ## Creates a method that forwards the call to the materialised object
+    def method( self, *args ):
+        return getattr( self.materialise(), name )( *args )
+    method.__name__ = name
+    return method
+
+class LazyDefinition( object ):
+    ## Proxy for an object that is created only when it is used for the first time.
+    #  Attribute access and operators are forwarded to the created object and
+    #  isinstance checks see the class of the created object.
+    __slots__ = ( '_factory', '_args', '_kwargs', '_object' )
+
+    def __init__( self, factory, *args, **kwargs ):
+        ## Default constructor
+        #  @param factory    callable that creates the object, i.e. the class
+        #  @param args       positional arguments passed to the factory
+        #  @param kwargs     keyword arguments passed to the factory
+        object.__setattr__( self, '_factory', factory )
+        object.__setattr__( self, '_args', args )
+        object.__setattr__( self, '_kwargs', kwargs )
+        object.__setattr__( self, '_object', None )
+
+    @property
+    def isMaterialised( self ):
+        ## Check if the object has already been created
+        return object.__getattribute__( self, '_object' ) is not None
+
+    def materialise( self ):
+        ## Create the object if necessary
+        #  @return the created object
+        obj = object.__getattribute__( self, '_object' )
+        if obj is None:
+            factory = object.__getattribute__( self, '_factory' )
+            args = [ arg.materialise() if type( arg ) is LazyDefinition else arg for arg in object.__getattribute__( self, '_args' ) ]
+            obj = factory( *args, **object.__getattribute__( self, '_kwargs' ) )
+            object.__setattr__( self, '_object', obj )
+        return obj
+
+    @property
+    def __class__( self ):
+        ## Let isinstance see the class of the created object
+        return self.materialise().__class__
+
+    def __getattr__( self, name ):
+        ## Only called for attributes not defined by the proxy itself
+        return getattr( self.materialise(), name )
+
+    def __setattr__( self, name, value ):
+        setattr( self.materialise(), name, value )
+
+    def __delattr__( self, name ):
+        delattr( self.materialise(), name )
+
+    def __reduce__( self ):
+        ## Pickle the declaration instead of the created object
+        return ( _createLazyDefinition, ( object.__getattribute__( self, '_factory' ), object.__getattribute__( self, '_args' ), object.__getattribute__( self, '_kwargs' ) ) )
+
+    def __reduce_ex__( self, protocol ):
+        # object.__reduce_ex__ would consult __class__, i.e. the created object
+        return self.__reduce__()
+
+    def __copy__( self ):
+        import copy
+        return copy.copy( self.materialise() )
+
+    def __deepcopy__( self, memo ):
+        import copy
+        return copy.deepcopy( self.materialise(), memo )
+
+    def __nonzero__( self ):
+        return bool( self.materialise() )
+
+    def __dir__( self ):
+        return dir( self.materialise() )
+
+    def __call__( self, *args, **kwargs ):
+        return self.materialise()( *args, **kwargs )
+
+    def __lt__( self, other ):
+        return self.materialise() < other
+
+    def __le__( self, other ):
+        return self.materialise() <= other
+
+    def __gt__( self, other ):
+        return self.materialise() > other
+
+    def __ge__( self, other ):
+        return self.materialise() >= other
+
+    def __ne__( self, other ):
+        return self.materialise() != other
+
+    # special methods are looked up on the type, so they have to be forwarded explicitly
+    for _name in ( '__repr__', '__str__', '__hash__', '__eq__', '__len__', '__iter__', '__contains__', '__getitem__', '__setitem__',
+                   '__neg__', '__pos__', '__invert__',
+                   '__and__', '__or__', '__xor__', '__mul__', '__div__', '__truediv__', '__add__', '__sub__',
+                   '__rand__', '__ror__', '__rxor__', '__rmul__', '__rdiv__', '__rtruediv__', '__radd__', '__rsub__' ):
+        locals()[ _name ] = _forward( _name )
+    del _name
+
+class DefinitionRegistry( object ):
+    ## Ordered collection of named lazy definitions.
+    #  A registry can be pickled and passed to worker processes, only the
+    #  declarations are stored and nothing is created before it is used.
+
+    def __init__( self, name='' ):
+        ## Default constructor
+        #  @param name    name of the registry, i.e. the module it belongs to
+        from collections import OrderedDict
+        self.name = name
+        self.definitions = OrderedDict()
+
+    def __repr__( self ):
+        return 'DefinitionRegistry(%s)' % self.name
+
+    def declare( self, name, factory, *args, **kwargs ):
+        ## Declare a new definition without creating it
+        #  @param name       name under which the definition is registered
+        #  @param factory    callable that creates the object, i.e. the class
+        #  @param args       positional arguments passed to the factory
+        #  @param kwargs     keyword arguments passed to the factory
+        #  @return LazyDefinition proxy for the object
+        definition = LazyDefinition( factory, *args, **kwargs )
+        self.definitions[ name ] = definition
+        return definition
+
+    def alias( self, name, definition ):
+        ## Register an existing definition under an additional name
+        #  @param name          additional name
+        #  @param definition    the existing definition
+        #  @return the definition
+        self.definitions[ name ] = definition
+        return definition
+
+    def __getitem__( self, name ):
+        return self.definitions[ name ]
+
+    def __contains__( self, name ):
+        return name in self.definitions
+
+    def __iter__( self ):
+        return iter( self.definitions )
+
+    def __len__( self ):
+        return len( self.definitions )
+
+    def get( self, name ):
+        ## Get the created object for the given name
+        #  @param name    name of the definition
+        #  @return the object
+        return self.definitions[ name ].materialise()
+
+    def materialiseAll( self ):
+        ## Create all declared objects, i.e. before forking worker processes
+        for definition in self.definitions.itervalues():
+            definition.materialise()
+
+    def exportTo( self, namespace ):
+        ## Add all definitions to the given namespace, i.e. globals() of a worker
+        #  @param namespace    dictionary to update
+        namespace.update( self.definitions )
@@ -5,10 +5,12 @@ Collection of classes to created resolution graphs vs. some other observable.
 '''
 
 import uuid, math
-from plotting.DistributionTools import truncatedInterval,truncatedIntervalFromHist, percentiles, histToArray, arrayToHist, meanAndStd,filterDataAndWeights
+from plotting.DistributionTools import truncatedInterval,truncatedIntervalFromHist, percentiles, groupedPercentiles, histToArray, arrayToHist, meanAndStd,filterDataAndWeights
 from plotting.Cut import Cut
-from plotting.TreePlot import getValuesFromTree
+from plotting.TreePlot import getColumnsFromTree
+from plotting.Tools import findBins
 from plotting.BasicPlot import BasicPlot
+from plotting import NumpyBridge
 
 class Selection( object ):
     ## Helper class encapsulating a selection logic.
@@ -39,6 +41,36 @@ class Selection( object ):
         self.up = max(values) 
         return self.low, self.up
     
+    def intervalsFromGroups( self, values, weights, boundaries ):
+        ## Calculates the selected intervals for several groups of weighted values at once
+        #  No selection, the first and last value of each group are used.
+        #  Derived classes should implement this method, _intervalsFromEachGroup can be used as fallback.
+        #  @param values        array of values sorted by group and by value within each group
+        #  @param weights       array of weights (should match length of values)
+        #  @param boundaries    array of nGroups+1 indices, group i consists of the entries from boundaries[i] to boundaries[i+1]
+        #  @result (lower, upper) arrays of boundaries, NaN for empty groups
+        import numpy
+        self._reset()
+        filled = boundaries[1:] > boundaries[:-1]
+        self.low = numpy.full( len(boundaries)-1, numpy.nan )
+        self.up = numpy.full( len(boundaries)-1, numpy.nan )
+        self.low[filled] = values[ boundaries[:-1][filled] ]
+        self.up[filled] = values[ boundaries[1:][filled] - 1 ]
+        return self.low, self.up
+    
+    def _intervalsFromEachGroup( self, values, weights, boundaries ):
+        ## helper method to calculate the intervals of several groups one by one using intervalFromValues
+        import numpy
+        nGroups = len( boundaries ) - 1
+        results = numpy.full( ( 6, nGroups ), numpy.nan )
+        for iGroup in xrange( nGroups ):
+            start, stop = boundaries[iGroup], boundaries[iGroup+1]
+            if stop > start:
+                self.intervalFromValues( values[start:stop], weights[start:stop] )
+                results[:, iGroup] = [ self.low, self.up, self.lowLow, self.lowUp, self.upLow, self.upUp ]
+        self.low, self.up, self.lowLow, self.lowUp, self.upLow, self.upUp = results
+        return self.low, self.up
+    
     def intervalFromHist( self, hist ):
         ## Calculates the selected interval from a histogram
         #  No selection, simple determination of lowest and highest bin with entries
@@ -90,6 +122,37 @@ class Truncate( Selection ):
                                                                       weights )
         return self.low, self.up
     
+    def intervalsFromGroups( self, values, weights, boundaries ):
+        ## Calculates the selected intervals for several groups of weighted values at once
+        #  Same as intervalFromValues for each group, the percentiles of all groups are calculated together.
+        #  @param values        array of values sorted by group and by value within each group
+        #  @param weights       array of weights (should match length of values)
+        #  @param boundaries    array of nGroups+1 indices, group i consists of the entries from boundaries[i] to boundaries[i+1]
+        #  @result (lower, upper) arrays of boundaries, NaN for empty groups
+        import numpy
+        if (weights < 0).any():
+            # the cumulative weights are not monotonic, evaluate each group on its own
+            return self._intervalsFromEachGroup( values, weights, boundaries )
+        self._reset()
+        from ROOT import TEfficiency
+        nGroups = len( boundaries ) - 1
+        self.low, self.up = groupedPercentiles( values, weights, boundaries, [ 0.5*(1-self.fraction), 1-0.5*(1-self.fraction) ] ).T
+        groups = numpy.repeat( numpy.arange( nGroups ), numpy.diff( boundaries ) )
+        nTotal = numpy.diff( boundaries )
+        with numpy.errstate( invalid='ignore' ):
+            nLow = numpy.bincount( groups, values <= self.low[groups], minlength=nGroups )
+            nUp = numpy.bincount( groups, values < self.up[groups], minlength=nGroups )
+        # interpret entries below and above as counting experiment, see intervalFromValues
+        fractions = numpy.zeros( ( nGroups, 4 ) )
+        for iGroup in xrange( nGroups ):
+            n, k, l = int( nTotal[iGroup] ), int( nLow[iGroup] ), int( nUp[iGroup] )
+            fractions[iGroup] = [ TEfficiency.ClopperPearson( n, k, 0.68, False ),
+                                  TEfficiency.ClopperPearson( n, k, 0.68, True ),
+                                  TEfficiency.ClopperPearson( n, l, 0.68, False ),
+                                  TEfficiency.ClopperPearson( n, l, 0.68, True ) ]
+        self.lowLow, self.lowUp, self.upLow, self.upUp = groupedPercentiles( values, weights, boundaries, fractions ).T
+        return self.low, self.up
+    
     def intervalFromHist( self, hist ):
         ## Calculates the selected interval from a histogram
         #  Symmetrically removes entries on both side until the desired fraction
@@ -130,7 +193,7 @@ class Measure( object ):
         #  @param low        lower limit
         #  @param up         upper limit
         #  @returns (result, errLow, errUp)
-        hist = arrayToHist( values, weights )
+        hist = arrayToHist( values, weights=weights )
         return self.__calculateFromHist__( hist, low, up )
     
     def __calculateFromHist__( self, hist, low, up ):
@@ -153,12 +216,52 @@ class Measure( object ):
         low, up = self.selection.intervalFromValues( values, weights )
         return self.__calculateFromValues__( values, weights, low, up )
     
+    def __calculateFromGroups__( self, values, weights, boundaries ):
+        ## Helper method to calculate the measure for several groups of weighted values
+        #  This default method calls calculateFromValues for each group.
+        #  @param values        array of values sorted by group and by value within each group
+        #  @param weights       array of weights (needs to match length of values)
+        #  @param boundaries    array of nGroups+1 indices, group i consists of the entries from boundaries[i] to boundaries[i+1]
+        #  @returns array with the rows result, errLow and errUp and one column per group
+        import numpy
+        results = numpy.zeros( ( 3, len(boundaries)-1 ) )
+        for iGroup in xrange( len(boundaries)-1 ):
+            start, stop = boundaries[iGroup], boundaries[iGroup+1]
+            if stop > start:
+                results[:, iGroup] = self.calculateFromValues( values[start:stop], weights[start:stop] )
+        return results
+    
+    def calculateFromGroups( self, values, weights, groups, nGroups=None ):
+        ## Calculate the measure for several groups of weighted values at once
+        #  The values are sorted only once by group and value. Results of empty groups
+        #  and undefined results are set to 0.
+        #  @param values     list of values
+        #  @param weights    list of weights (needs to match length of values), None for unit weights
+        #  @param groups     list of group numbers from 0 to nGroups-1 (needs to match length of values)
+        #  @param nGroups    number of groups (default is the largest group number + 1)
+        #  @returns (results, errLow, errUp) arrays with one entry per group
+        import numpy
+        values = numpy.asarray( values, dtype=numpy.float64 )
+        weights = numpy.ones( len(values) ) if weights is None else numpy.asarray( weights, dtype=numpy.float64 )
+        groups = numpy.asarray( groups, dtype=numpy.int64 )
+        if nGroups is None:
+            nGroups = groups.max() + 1 if len(groups) else 0
+        order = numpy.lexsort( ( values, groups ) )
+        values = values[order]
+        weights = weights[order]
+        boundaries = numpy.searchsorted( groups[order], numpy.arange( nGroups+1 ) )
+        with numpy.errstate( divide='ignore', invalid='ignore' ):
+            results = self.__calculateFromGroups__( values, weights, boundaries )
+        results[ ~numpy.isfinite( results ) ] = 0.
+        results[ :, boundaries[1:] == boundaries[:-1] ] = 0.
+        return results[0], results[1], results[2]
+    
     def calculateFromHist( self, hist ):
         ## Calculate the measure from a histogram
         #  @param hist       1D histogram object
         #  @returns (result, errLow, errUp)
         low, up = self.selection.intervalFromHist( hist )
-        return self.__calculateFromValues__( hist, low, up )
+        return self.__calculateFromHist__( hist, low, up )
     
 class Mean( Measure ):
     ## Measures the weighted mean of the input
@@ -181,6 +284,17 @@ class Mean( Measure ):
         meanErr = std / math.sqrt( values.size )
         return mean, meanErr, meanErr
     
+    def __calculateFromGroups__( self, values, weights, boundaries ):
+        ## Helper method to calculate the measure for several groups of weighted values
+        #  @param values        array of values sorted by group and by value within each group
+        #  @param weights       array of weights (needs to match length of values)
+        #  @param boundaries    array of nGroups+1 indices, group i consists of the entries from boundaries[i] to boundaries[i+1]
+        #  @returns array with the rows result, errLow and errUp and one column per group
+        import numpy
+        mean, std, n = _groupedMeanAndStd( values, weights, boundaries, *self.selection.intervalsFromGroups( values, weights, boundaries ) )
+        meanErr = std / numpy.sqrt( n )
+        return numpy.array( [ mean, meanErr, meanErr ] )
+    
     def __calculateFromHist__( self, hist, low, up ):
         ## Helper method to calculate the measure from a histogram
         #  Can be limited by lower and upper boundaries.
@@ -217,6 +331,18 @@ class StandardDeviation( Measure ):
             stdErr = std / math.sqrt( 2*(values.size-1) )
         return std, stdErr, stdErr
     
+    def __calculateFromGroups__( self, values, weights, boundaries ):
+        ## Helper method to calculate the measure for several groups of weighted values
+        #  @param values        array of values sorted by group and by value within each group
+        #  @param weights       array of weights (needs to match length of values)
+        #  @param boundaries    array of nGroups+1 indices, group i consists of the entries from boundaries[i] to boundaries[i+1]
+        #  @returns array with the rows result, errLow and errUp and one column per group
+        import numpy
+        std, n = _groupedMeanAndStd( values, weights, boundaries, *self.selection.intervalsFromGroups( values, weights, boundaries ) )[1:]
+        # approximation only valid for large N. ROOT uses same.
+        stdErr = numpy.where( n > 0, std / numpy.sqrt( 2*(n-1) ), 0. )
+        return numpy.array( [ std, stdErr, stdErr ] )
+    
     def __calculateFromHist__( self, hist, low, up ):
         ## Helper method to calculate the measure from a histogram
         #  Can be limited by lower and upper boundaries.
@@ -229,16 +355,47 @@ class StandardDeviation( Measure ):
         error = hist.GetStdDevError()
         return value, error, error
     
-class GaussianSigma( Measure ):
-    ## Measures the Gaussian sigma from a fit
+class GaussianFit( Measure ):
+    ## Base class of the measures determined from a Gaussian fit
+    #  The fit is done with TH1::Fit or, if useRoot is disabled, with fitGaussian which only needs numpy.
+    #  Fits of several groups (see calculateFromGroups) can run in parallel worker processes.
+    defaultFitOptions = 'LMNQ'     # options passed to TH1::Fit, fitGaussian only uses the 'L' option
+    defaultUseRoot = True          # fit with ROOT, otherwise with fitGaussian
+    defaultNProcesses = 1          # number of processes used to fit several groups, 1 fits in the current process
+    defaultNBins = 100             # number of bins of the histograms filled from values
+    parameterIndex = 0             # index of the fitted parameter used as measure (0: constant, 1: mean, 2: sigma)
+    
     def __init__( self, selection=None ):
         ## Default constructor
         #  @param selection     selection object applied before measuring
         Measure.__init__( self, selection )
-        from ROOT import TF1
-        self.function = TF1( 'gaus', 'gaus' )
-        self.fitOptions = 'LMNQ'
-        self.label = '#sigma'
+        self.fitOptions = self.defaultFitOptions
+        self.useRoot = self.defaultUseRoot
+        self.nProcesses = self.defaultNProcesses
+        self.nBins = self.defaultNBins
+        self._function = None
+        self.label = 'Gaussian'
+    
+    @property
+    def function( self ):
+        ## TF1 object used to fit histograms with ROOT
+        if self._function is None:
+            from ROOT import TF1
+            self._function = TF1( 'gaus', 'gaus' )
+        return self._function
+    
+    def __calculateFromValues__( self, values, weights, low, up ):
+        ## Helper method to calculate the measure from a list of weighted values
+        #  Can be limited by lower and upper boundaries.
+        #  @param values     list of values
+        #  @param weights    list of weights (needs to match length of values)
+        #  @param low        lower limit
+        #  @param up         upper limit
+        #  @returns (result, errLow, errUp)
+        if self.useRoot:
+            return Measure.__calculateFromValues__( self, values, weights, low, up )
+        value, error = _fitHistogram( _histogramArrays( values, weights, self.nBins ) + ( low, up, False, self.fitOptions, self.parameterIndex ) )
+        return value, error, error
     
     def __calculateFromHist__( self, hist, low, up ):
         ## Helper method to calculate the measure from a histogram
@@ -247,33 +404,61 @@ class GaussianSigma( Measure ):
         #  @param low        lower limit
         #  @param up         upper limit
         #  @returns (result, errLow, errUp)
-        hist.Fit( self.function, self.fitOptions, '', low, up )
-        sigma = self.function.GetParameter( 2 )
-        sigmaErr = self.function.GetParError( 2 )
-        return sigma, sigmaErr, sigmaErr
+        if self.useRoot:
+            hist.Fit( self.function, self.fitOptions, '', low, up )
+            value = self.function.GetParameter( self.parameterIndex )
+            error = self.function.GetParError( self.parameterIndex )
+        else:
+            value, error = _fitHistogram( ( NumpyBridge.edges( hist.GetXaxis() ), NumpyBridge.contents( hist ), NumpyBridge.squaredErrors( hist ),
+                                            low, up, False, self.fitOptions, self.parameterIndex ) )
+        return value, error, error
+    
+    def __calculateFromGroups__( self, values, weights, boundaries ):
+        ## Helper method to calculate the measure for several groups of weighted values
+        #  The histograms of all groups are filled with numpy and fitted in nProcesses worker processes.
+        #  @param values        array of values sorted by group and by value within each group
+        #  @param weights       array of weights (needs to match length of values)
+        #  @param boundaries    array of nGroups+1 indices, group i consists of the entries from boundaries[i] to boundaries[i+1]
+        #  @returns array with the rows result, errLow and errUp and one column per group
+        import numpy
+        low, up = self.selection.intervalsFromGroups( values, weights, boundaries )
+        nGroups = len( boundaries ) - 1
+        tasks = []
+        filled = []
+        for iGroup in xrange( nGroups ):
+            start, stop = boundaries[iGroup], boundaries[iGroup+1]
+            if stop > start:
+                tasks.append( _histogramArrays( values[start:stop], weights[start:stop], self.nBins ) +
+                              ( low[iGroup], up[iGroup], self.useRoot, self.fitOptions, self.parameterIndex ) )
+                filled.append( iGroup )
+        results = numpy.zeros( ( 3, nGroups ) )
+        if tasks:
+            fits = numpy.array( _mapFits( tasks, self.nProcesses ) )
+            results[0, filled] = fits[:, 0]
+            results[1, filled] = fits[:, 1]
+            results[2, filled] = fits[:, 1]
+        return results
+    
+class GaussianSigma( GaussianFit ):
+    ## Measures the Gaussian sigma from a fit
+    parameterIndex = 2
+    
+    def __init__( self, selection=None ):
+        ## Default constructor
+        #  @param selection     selection object applied before measuring
+        GaussianFit.__init__( self, selection )
+        self.label = '#sigma'
         
-class GaussianMean( Measure ):
+class GaussianMean( GaussianFit ):
     ## Measures the Gaussian mean from a fit
+    parameterIndex = 1
+    
     def __init__( self, selection=None ):
         ## Default constructor
         #  @param selection     selection object applied before measuring
-        Measure.__init__( self, selection )
-        from ROOT import TF1
-        self.function = TF1( 'gaus', 'gaus' )
+        GaussianFit.__init__( self, selection )
         self.label = 'Mean'
     
-    def __calculateFromHist__( self, hist, low, up ):
-        ## Helper method to calculate the measure from a histogram
-        #  Can be limited by lower and upper boundaries.
-        #  @param hist       1D histogram object
-        #  @param low        lower limit
-        #  @param up         upper limit
-        #  @returns (result, errLow, errUp)
-        hist.Fit( self.function, 'LMNQ', '', low, up )
-        mean = self.function.GetParameter( 1 )
-        meanErr = self.function.GetParError( 1 )
-        return mean, meanErr, meanErr
-    
 class HalfWidth( Measure ):
     ## Measures the half width of the distribution
     def __init__( self, selection=None ):
@@ -298,10 +483,214 @@ class HalfWidth( Measure ):
         if self.selection.lowLow and self.selection.upUp:
             errUp = abs(0.5 * (self.selection.upUp - self.selection.lowLow) - value)
         return value, errLow, errUp
+    
+    def __calculateFromGroups__( self, values, weights, boundaries ):
+        ## Helper method to calculate the measure for several groups of weighted values
+        #  @param values        array of values sorted by group and by value within each group
+        #  @param weights       array of weights (needs to match length of values)
+        #  @param boundaries    array of nGroups+1 indices, group i consists of the entries from boundaries[i] to boundaries[i+1]
+        #  @returns array with the rows result, errLow and errUp and one column per group
+        import numpy
+        low, up = self.selection.intervalsFromGroups( values, weights, boundaries )
+        value = 0.5 * (up - low)
+        errLow = numpy.zeros( len(value) )
+        errUp = numpy.zeros( len(value) )
+        selection = self.selection
+        if selection.lowUp is not None and selection.upLow is not None:
+            # same as the truth value test in __calculateFromValues__
+            valid = ( selection.lowUp != 0 ) & ( selection.upLow != 0 ) & ~numpy.isnan( selection.lowUp ) & ~numpy.isnan( selection.upLow )
+            errLow[valid] = numpy.abs( value - 0.5 * (selection.upLow - selection.lowUp) )[valid]
+        if selection.lowLow is not None and selection.upUp is not None:
+            valid = ( selection.lowLow != 0 ) & ( selection.upUp != 0 ) & ~numpy.isnan( selection.lowLow ) & ~numpy.isnan( selection.upUp )
+            errUp[valid] = numpy.abs( 0.5 * (selection.upUp - selection.lowLow) - value )[valid]
+        return numpy.array( [ value, errLow, errUp ] )
+
+
+def _groupedMeanAndStd( values, weights, boundaries, low, up ):
+    ## helper method to calculate the weighted mean and standard deviation of the values low <= value < up of each group
+    #  @return (mean, std, number of values) arrays with one entry per group
+    import numpy
+    nGroups = len( boundaries ) - 1
+    groups = numpy.repeat( numpy.arange( nGroups ), numpy.diff( boundaries ) )
+    with numpy.errstate( invalid='ignore' ):
+        selected = ( values >= low[groups] ) & ( values < up[groups] )
+    weights = numpy.where( selected, weights, 0. )
+    sumOfWeights = numpy.bincount( groups, weights, minlength=nGroups )
+    mean = numpy.bincount( groups, weights * values, minlength=nGroups ) / sumOfWeights
+    variance = numpy.bincount( groups, weights * (values - mean[groups])**2, minlength=nGroups ) / sumOfWeights
+    return mean, numpy.sqrt( variance ), numpy.bincount( groups, selected, minlength=nGroups )
 
+def _histogramArrays( values, weights, nBins ):
+    ## helper method to fill a histogram like arrayToHist without creating a ROOT object
+    #  @return (edges, contents, squared errors) arrays, contents and errors include under- and overflow bins
+    import numpy
+    from plotting.Variable import Binning
+    values = numpy.asarray( values, dtype=numpy.float64 )
+    weights = numpy.ones( len(values) ) if weights is None else numpy.asarray( weights, dtype=numpy.float64 )
+    low = numpy.nanmin( values )
+    up = numpy.nanmax( values )
+    if not low < up:
+        # all values are identical, center a bin of unit width around them
+        low, up = low - 0.5, low + 0.5
+    binning = Binning( nBins, low, up )
+    bins = binning.findBins( values )
+    return binning.edges, numpy.bincount( bins, weights, minlength=nBins+2 ), numpy.bincount( bins, weights**2, minlength=nBins+2 )
+
+_gaussian = None
+
+def _fitHistogram( task ):
+    ## helper method to fit a Gaussian to a histogram given as arrays, also used by the worker processes
+    #  @param task    tuple of (edges, contents, squared errors, low, up, useRoot, fitOptions, parameterIndex)
+    #  @return (parameter, error) of the requested parameter
+    global _gaussian
+    edges, contents, squaredErrors, low, up, useRoot, fitOptions, parameterIndex = task
+    if useRoot:
+        from ROOT import TH1D, TF1
+        import numpy
+        if _gaussian is None:
+            _gaussian = TF1( 'gaus_%s' % uuid.uuid1(), 'gaus' )
+        hist = TH1D( 'h_%s' % uuid.uuid1(), '', len(edges)-1, numpy.ascontiguousarray( edges, dtype=numpy.float64 ) )
+        NumpyBridge.setContents( hist, contents, squaredErrors )
+        hist.Fit( _gaussian, fitOptions, '', low, up )
+        return _gaussian.GetParameter( parameterIndex ), _gaussian.GetParError( parameterIndex )
+    # same bins as TH1::Fit, i.e. all bins with the center inside the fit range
+    centers = 0.5 * ( edges[1:] + edges[:-1] )
+    inside = ( centers >= low ) & ( centers <= up )
+    parameters, errors = fitGaussian( centers[inside], contents[1:-1][inside], squaredErrors[1:-1][inside], likelihood='L' in fitOptions.upper() )
+    return parameters[parameterIndex], errors[parameterIndex]
+
+def _mapFits( tasks, nProcesses ):
+    ## helper method to run _fitHistogram for all tasks, in a pool of worker processes if nProcesses is larger than 1
+    #  @return list of (parameter, error) in the order of the tasks
+    if nProcesses > 1 and len( tasks ) > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool( min( nProcesses, len( tasks ) ) )
+        try:
+            return pool.map( _fitHistogram, tasks )
+        finally:
+            pool.terminate()
+            pool.join()
+    return map( _fitHistogram, tasks )
+
+def _gaussianAndJacobian( x, parameters ):
+    ## helper method to evaluate constant * exp( -0.5 * ((x-mean)/sigma)^2 ) and its derivatives by the parameters
+    #  @return (function values, jacobian with one column per parameter)
+    import numpy
+    constant, mean, sigma = parameters
+    pull = ( x - mean ) / sigma
+    exponential = numpy.exp( -0.5 * pull**2 )
+    values = constant * exponential
+    return values, numpy.column_stack( ( exponential, values * pull / sigma, values * pull**2 / sigma ) )
+
+def _fitStatistic( y, values, fitWeights, likelihood ):
+    ## helper method to calculate the quantity minimised by fitGaussian
+    #  @return -2 log(L) (up to a constant) or chi2
+    import numpy
+    if likelihood:
+        return 2 * ( values - y * numpy.log( numpy.maximum( values, numpy.finfo( numpy.float64 ).tiny ) ) ).sum()
+    return ( fitWeights * ( y - values )**2 ).sum()
+
+def fitGaussian( x, y, squaredErrors=None, likelihood=True, maxIterations=100, tolerance=1e-9 ):
+    ## Fit a Gaussian constant * exp( -0.5 * ((x-mean)/sigma)^2 ) to binned values using only numpy
+    #  The start values are the moments of the distribution, the parameters are then optimised with the
+    #  Levenberg-Marquardt algorithm. Like TH1::Fit either the Poisson likelihood (option 'L') or the chi2
+    #  is used, the chi2 ignores bins without error. The errors are taken from the covariance matrix at the minimum.
+    #  @param x                array of bin centers
+    #  @param y                array of bin contents
+    #  @param squaredErrors    array of squared bin errors, only used by the chi2 (default uses the contents)
+    #  @param likelihood       maximise the Poisson likelihood instead of minimising the chi2
+    #  @param maxIterations    maximum number of iterations
+    #  @param tolerance        relative change of the minimised quantity below which the fit is converged
+    #  @return (parameters, errors) arrays of (constant, mean, sigma)
+    import numpy
+    x = numpy.asarray( x, dtype=numpy.float64 )
+    y = numpy.asarray( y, dtype=numpy.float64 )
+    fitWeights = None
+    if not likelihood:
+        squaredErrors = y if squaredErrors is None else numpy.asarray( squaredErrors, dtype=numpy.float64 )
+        selected = squaredErrors > 0
+        x = x[selected]
+        y = y[selected]
+        fitWeights = 1. / squaredErrors[selected]
+    # start values from the moments of the distribution
+    positive = numpy.maximum( y, 0. )
+    sumOfWeights = positive.sum()
+    if not sumOfWeights > 0:
+        return numpy.zeros( 3 ), numpy.zeros( 3 )
+    mean = ( positive * x ).sum() / sumOfWeights
+    sigma = math.sqrt( ( positive * ( x - mean )**2 ).sum() / sumOfWeights )
+    parameters = numpy.array( [ positive.max(), mean, sigma ] )
+    if numpy.count_nonzero( positive ) < 3 or not sigma > 0:
+        # not enough points to determine three parameters
+        return parameters, numpy.zeros( 3 )
+    values, jacobian = _gaussianAndJacobian( x, parameters )
+    current = _fitStatistic( y, values, fitWeights, likelihood )
+    damping = 1e-3
+    for iteration in xrange( maxIterations ):
+        if likelihood:
+            # the Fisher information of the Poisson likelihood is a chi2 with variance = expectation
+            fitWeights = 1. / numpy.maximum( values, numpy.finfo( numpy.float64 ).tiny )
+        curvature = numpy.dot( jacobian.T * fitWeights, jacobian )
+        gradient = numpy.dot( jacobian.T * fitWeights, y - values )
+        improved = False
+        while damping < 1e10:
+            try:
+                step = numpy.linalg.solve( curvature + damping * numpy.diag( numpy.diag( curvature ) ), gradient )
+            except numpy.linalg.LinAlgError:
+                damping *= 10
+                continue
+            candidate = parameters + step
+            candidateValues, candidateJacobian = _gaussianAndJacobian( x, candidate )
+            statistic = _fitStatistic( y, candidateValues, fitWeights, likelihood )
+            if statistic <= current:
+                improved = True
+                damping = max( damping / 10, 1e-12 )
+                break
+            damping *= 10
+        if not improved:
+            break
+        converged = current - statistic <= tolerance * ( abs( statistic ) + tolerance )
+        parameters, values, jacobian, current = candidate, candidateValues, candidateJacobian, statistic
+        if converged:
+            break
+    if likelihood:
+        fitWeights = 1. / numpy.maximum( values, numpy.finfo( numpy.float64 ).tiny )
+    covariance = numpy.linalg.pinv( numpy.dot( jacobian.T * fitWeights, jacobian ) )
+    parameters[2] = abs( parameters[2] )
+    return parameters, numpy.sqrt( numpy.abs( numpy.diag( covariance ) ) )
+
+def fillResolutionGraph( graph, binning, xValues, yValues, weights, measure ):
+    ## Fill the points of a resolution graph, i.e. the measure of y in bins of x
+    #  The measure is evaluated for all x bins at once instead of one selection per bin.
+    #  @param graph      TGraphAsymmErrors object with one point per bin
+    #  @param binning    Binning object defining the slicing in x
+    #  @param xValues    array of x values
+    #  @param yValues    array of y values
+    #  @param weights    array of weights
+    #  @param measure    Measure object to evaluate the resolution (all points are 0 if not set)
+    #  @return the graph
+    import numpy
+    bins = binning.edges
+    nBins = binning.nBins
+    # entries with lower edge <= x < upper edge end up in the same bin as with a cut on x
+    binNumbers = findBins( bins, xValues )
+    inside = ( binNumbers > 0 ) & ( binNumbers <= nBins )
+    if measure:
+        yMeans, yErrsLow, yErrsUp = measure.calculateFromGroups( numpy.asarray( yValues )[inside], numpy.asarray( weights )[inside], binNumbers[inside] - 1, nBins )
+    else:
+        yMeans = yErrsLow = yErrsUp = numpy.zeros( nBins )
+    for iBin in xrange( nBins ):
+        low = bins[iBin]
+        up = bins[iBin+1]
+        xMean = low + 0.5 * (up - low)
+        xErr = xMean - low
+        graph.SetPoint( iBin, xMean, yMeans[iBin] )
+        graph.SetPointError( iBin, xErr, xErr, yErrsLow[iBin], yErrsUp[iBin] )
+    return graph
 
 def resolutionGraph( tree, xVar, yVar, title, measure, cut='', weightExpression='' ):
     ## Create and fill a resolution graph for this dataset, i.e. resolution of y vs. x
+    #  x and y are read from the tree in a single pass for all bins.
     #  @ param tree              TTree object used to create the histogram
     #  @ param xVar              Variable object defining the xAxis and the draw command
     #  @ param yVar              Variable object defining the xAxis and the draw command
@@ -310,24 +699,14 @@ def resolutionGraph( tree, xVar, yVar, title, measure, cut='', weightExpression=
     #  @ param cut               Cut object (optional)
     #  @ param weightExpression  weight expression (optional)
     #  @ return the generated histogram
-    bins = xVar.binning.bins
     title = '%s vs %s' % (yVar.title, xVar.title) if not title else title
     name = 'h%s_%s' % ( title.replace(' ', '_').replace('(', '').replace(')',''), uuid.uuid1() )
     from ROOT import TGraphAsymmErrors
     graph = TGraphAsymmErrors( xVar.binning.nBins )
     graph.SetNameTitle( name, '%s;%s;%s' % (title, xVar.axisLabel, measure.getDecoratedLabel( yVar ) ) )
-    # create a histogram of y for each bin in x and evaluate measure
-    for iBin in xrange( xVar.binning.nBins ):
-        low = bins[iBin]
-        up = bins[iBin+1]
-        xMean = low + 0.5 * (up - low)
-        xErr = xMean - low
-        myCut = (Cut( '%s >= %s && %s < %s' % (xVar.command, low, xVar.command, up) ) + cut) * weightExpression
-        values, weights = getValuesFromTree( tree, yVar.command, myCut.cut )
-        yMean, yErrLow, yErrUp = measure.calculateFromValues( values, weights )
-        graph.SetPoint( iBin, xMean, yMean )
-        graph.SetPointError( iBin, xErr, xErr, yErrLow, yErrUp )        
-    return graph
+    myCut = ( Cut() + cut ) * weightExpression
+    ( xValues, yValues ), weights = getColumnsFromTree( tree, [ xVar.command, yVar.command ], myCut.cut )
+    return fillResolutionGraph( graph, xVar.binning, xValues, yValues, weights, measure )
 
 
 if __name__ == '__main__':
@@ -335,6 +714,34 @@ if __name__ == '__main__':
     from array import array
     from plotting.Variable import Variable, Binning
     from AtlasStyle import redLine, blueLine, greenLine
+    import numpy, time
+    
+    # compare the numpy fits with the ROOT fits, serial and in parallel processes
+    nGroups = 200
+    groups = numpy.random.randint( 0, nGroups, 10**6 )
+    values = numpy.random.normal( 0.1 * groups, 1. + 0.01 * groups )
+    weights = numpy.random.uniform( 0.5, 1.5, len(values) )
+    results = {}
+    for useRoot, nProcesses in [ ( True, 1 ), ( True, 4 ), ( False, 1 ), ( False, 4 ) ]:
+        measure = GaussianSigma( Truncate( 0.9 ) )
+        measure.useRoot = useRoot
+        measure.nProcesses = nProcesses
+        startTime = time.time()
+        results[ ( useRoot, nProcesses ) ] = measure.calculateFromGroups( values, weights, groups, nGroups )
+        print 'useRoot=%-5s nProcesses=%d: %d fits in %.2fs' % ( useRoot, nProcesses, nGroups, time.time() - startTime )
+    sigmaRoot, errorRoot = results[ ( True, 1 ) ][:2]
+    sigmaNumpy, errorNumpy = results[ ( False, 1 ) ][:2]
+    print 'largest difference numpy - ROOT: sigma %.2e (%.2e sigma errors), error %.2e (relative)' % ( numpy.abs( sigmaNumpy - sigmaRoot ).max(),
+                                                                                                     numpy.abs( ( sigmaNumpy - sigmaRoot ) / errorRoot ).max(),
+                                                                                                     numpy.abs( errorNumpy / errorRoot - 1 ).max() )
+    
+    # compare the grouped measures with calculateFromValues of each group, values on the knots are common for unit weights
+    values = numpy.round( values, 1 )
+    for measureClass in [ Mean, StandardDeviation, HalfWidth ]:
+        measure = measureClass( Truncate( 0.68 ) )
+        grouped = numpy.array( measure.calculateFromGroups( values, None, groups, nGroups ) )
+        reference = numpy.array( [ measure.calculateFromValues( values[groups == iGroup], numpy.ones( (groups == iGroup).sum() ) ) for iGroup in xrange( nGroups ) ] ).T
+        print '%s: largest difference grouped - per group %.2e' % ( measureClass.__name__, numpy.abs( grouped - reference ).max() )
     
     # create some dummy tree
     rndm = TRandom3()
@@ -4,8 +4,8 @@ Collection of helper methods.
 @author: Christian Grefe, Bonn University (christian.grefe@cern.ch)
 '''
 import sys, math, uuid, logging
-from plotting.AtlasStyle import Style
-from ROOT import kRed
+from plotting.AtlasStyle import Style, kRed
+from plotting import NumpyBridge
 
 logger = logging.getLogger( __name__ )
 
@@ -39,6 +39,16 @@ def wrapMethod( cls, baseCls, name ):
         return result
     setattr( cls, name, inner )
 
+def findBins( edges, values ):
+    ## Find the bin numbers for an array of values like TAxis::FindFixBin for variable bins
+    #  Values below the first edge end up in the underflow bin 0, values from the last edge on (and NaN)
+    #  in the overflow bin len(edges).
+    #  @param edges     sorted array of bin boundaries
+    #  @param values    array of values
+    #  @return array of bin numbers
+    import numpy
+    return numpy.searchsorted( edges, values, side='right' )
+
 def blindHistogram( histogram, low, high ):
     ## removes all entries from the histogram bins between low and high
     #  also removes entries from bins that fall only partially into the blinded region
@@ -46,11 +56,18 @@ def blindHistogram( histogram, low, high ):
     #  @param histogram    TH1 object to be blinded
     #  @param low          lower limit of the blinded region
     #  @return blinded histogram
-    xAxis = histogram.GetXaxis()
-    for iBin in range(1, histogram.GetNbinsX()+1 ):
-        if xAxis.GetBinUpEdge( iBin ) > low and xAxis.GetBinLowEdge( iBin ) < high:
-            histogram.SetBinContent( iBin, 0 )
-            histogram.SetBinError( iBin, 0.00001 )
+    import numpy
+    edges = NumpyBridge.edges( histogram.GetXaxis() )
+    # first bin with an upper edge above low and last bin with a lower edge below high
+    firstBin = max( 1, int( findBins( edges, low ) ) )
+    lastBin = min( histogram.GetNbinsX(), int( numpy.searchsorted( edges, high, side='left' ) ) )
+    if firstBin > lastBin:
+        return histogram
+    contents = NumpyBridge.contents( histogram ).astype( numpy.float64 )
+    squaredErrors = NumpyBridge.squaredErrors( histogram ).copy()
+    contents[ firstBin:lastBin+1 ] = 0
+    squaredErrors[ firstBin:lastBin+1 ] = 0.00001**2
+    NumpyBridge.setContents( histogram, contents, squaredErrors )
     return histogram
     
 def calculatePoissonErrors( n, confidenceInterval=0.6827 ):
@@ -71,27 +88,30 @@ def histToGraph( hist, name='', keepErrors=True, poissonErrors=True ):
     #  @keepErrors     decide if the y-errors should be propagated to the graph
     #  @poissonErrors  decide if the y-errors should be calculated as Poisson errors 
     #  @return graph
+    import numpy
     if not name:
         name = 'g%s' % ( hist.GetName() )
-    from ROOT import TGraphAsymmErrors
+    from ROOT import TGraphAsymmErrors, TH1
     nBins = hist.GetNbinsX()
-    graph = TGraphAsymmErrors( nBins )
+    edges = NumpyBridge.edges( hist.GetXaxis() )
+    xValues = 0.5 * ( edges[:-1] + edges[1:] )
+    yValues = NumpyBridge.contents( hist )[ 1:nBins+1 ].astype( numpy.float64 )
+    yErrorsLow = numpy.zeros( nBins )
+    yErrorsHigh = numpy.zeros( nBins )
+    if keepErrors:
+        if poissonErrors:
+            for i, yVal in enumerate( yValues ):
+                yErrorsLow[i], yErrorsHigh[i] = calculatePoissonErrors( yVal )
+        elif hist.GetBinErrorOption() == TH1.kNormal:
+            yErrorsLow = numpy.sqrt( NumpyBridge.squaredErrors( hist )[ 1:nBins+1 ] )
+            yErrorsHigh = yErrorsLow
+        else:
+            # asymmetric errors are calculated by ROOT
+            for i in xrange( nBins ):
+                yErrorsLow[i] = hist.GetBinErrorLow( i+1 )
+                yErrorsHigh[i] = hist.GetBinErrorUp( i+1 )
+    graph = TGraphAsymmErrors( nBins, xValues, yValues, numpy.abs( xValues - edges[:-1] ), numpy.abs( edges[1:] - xValues ), yErrorsLow, yErrorsHigh )
     graph.SetNameTitle( name, hist.GetTitle() )
-    xAxis = hist.GetXaxis()
-    for i in xrange( nBins ):
-        xVal = xAxis.GetBinCenter( i+1 )
-        yVal = hist.GetBinContent( i+1 )
-        graph.SetPoint( i, xVal, yVal )
-        graph.SetPointEXlow( i, abs(xVal - xAxis.GetBinLowEdge( i+1 )) )
-        graph.SetPointEXhigh( i, abs(xVal - xAxis.GetBinUpEdge( i+1 )) )
-        if keepErrors:
-            if poissonErrors:
-                lo, hi = calculatePoissonErrors( yVal )
-                graph.SetPointEYlow( i, lo )
-                graph.SetPointEYhigh( i, hi )
-            else:
-                graph.SetPointEYlow( i, hist.GetBinErrorLow( i+1 ) )
-                graph.SetPointEYhigh( i, hist.GetBinErrorUp( i+1 ) )
     # copy the style
     graph.SetMarkerStyle( hist.GetMarkerStyle() )
     graph.SetMarkerColor( hist.GetMarkerColor() )
@@ -106,11 +126,18 @@ def histToGraph( hist, name='', keepErrors=True, poissonErrors=True ):
 def forceBinning( hist, variable ):
     ## Helper method to create a new histogram with different binning.
     #  The original content is filled into the new histogram accordingly.
+    import numpy
     newHist = variable.createHistogram( hist.GetTitle() )
-    for oldBin in xrange( hist.GetNbinsX() + 2 ):
-        newBin = newHist.FindBin( hist.GetBinCenter( oldBin ) )
-        newHist.SetBinContent( newBin, newHist.GetBinContent( newBin ) + hist.GetBinContent( oldBin ) )
-        newHist.SetBinError( newBin, math.sqrt( hist.GetBinError( newBin )**2 + hist.GetBinError( oldBin )**2 ) )
+    # bin centers including under- and overflow bin, those use the average bin width like TAxis::GetBinCenter
+    edges = NumpyBridge.edges( hist.GetXaxis() )
+    width = ( edges[-1] - edges[0] ) / ( len( edges ) - 1 )
+    centers = numpy.concatenate( ( [ edges[0] - 0.5*width ], 0.5 * ( edges[:-1] + edges[1:] ), [ edges[-1] + 0.5*width ] ) )
+    newBins = variable.binning.findBins( centers )
+    # contents and squared errors of all old bins falling into the same new bin are added
+    nCells = newHist.fN
+    contents = numpy.bincount( newBins, NumpyBridge.contents( hist ), minlength=nCells )
+    squaredErrors = numpy.bincount( newBins, NumpyBridge.squaredErrors( hist ), minlength=nCells )
+    NumpyBridge.setContents( newHist, contents, squaredErrors )
     newHist.SetEntries( hist.GetEntries() )
     #overflowIntoLastBins( newHist )
     newHist.SetMarkerStyle( hist.GetMarkerStyle() )
@@ -250,14 +277,17 @@ def divideHistograms( histogram, otherHistogram, copy=False ):
     if copy:
         # generate a copy with a unique name
         histogram = histogram.Clone( '%s_%s' % (histogram.GetName(), uuid.uuid1()) )
-    for i in xrange( 0, histogram.GetNbinsX()+1):
-        y = otherHistogram.GetBinContent( i )
-        if y == 0.:
-            histogram.SetBinContent( i, 0. )
-            histogram.SetBinError( i, 0. )
-        else:
-            histogram.SetBinContent( i, histogram.GetBinContent( i ) / y )
-            histogram.SetBinError( i, histogram.GetBinError( i ) / y )
+    import numpy
+    # the overflow bin is not divided
+    nBins = histogram.GetNbinsX() + 1
+    denominators = NumpyBridge.contents( otherHistogram )[ :nBins ].astype( numpy.float64 )
+    contents = NumpyBridge.contents( histogram ).astype( numpy.float64 )
+    squaredErrors = NumpyBridge.squaredErrors( histogram ).copy()
+    nonZero = denominators != 0.
+    safeDenominators = numpy.where( nonZero, denominators, 1. )
+    contents[ :nBins ] = numpy.where( nonZero, contents[ :nBins ] / safeDenominators, 0. )
+    squaredErrors[ :nBins ] = numpy.where( nonZero, squaredErrors[ :nBins ] / safeDenominators**2, 0. )
+    NumpyBridge.setContents( histogram, contents, squaredErrors )
     return histogram 
 
 def overflowIntoLastBins( hist, copy=False ):
@@ -269,12 +299,15 @@ def overflowIntoLastBins( hist, copy=False ):
     if copy:
         # generate a copy with a unique name
         hist = hist.Clone( '%s_%s' % (hist.GetName(), uuid.uuid1()) )
+    import numpy
     nBins = hist.GetNbinsX()
-    for fromBin, toBin in ((0,1), (nBins+1,nBins)):
-        hist.SetBinContent( toBin, hist.GetBinContent(fromBin) + hist.GetBinContent(toBin) )
-        hist.SetBinError( toBin, math.sqrt(hist.GetBinError(fromBin)**2 + hist.GetBinError(toBin)**2) )
-        hist.SetBinContent( fromBin, 0. )
-        hist.SetBinError( fromBin, 0. )
+    contents = NumpyBridge.contents( hist ).astype( numpy.float64 )
+    squaredErrors = NumpyBridge.squaredErrors( hist ).copy()
+    for values in ( contents, squaredErrors ):
+        for fromBin, toBin in ((0,1), (nBins+1,nBins)):
+            values[toBin] += values[fromBin]
+            values[fromBin] = 0.
+    NumpyBridge.setContents( hist, contents, squaredErrors )
     return hist
 
 def createOutOfRangeArrows( obj, minimum, maximum, arrowSize=0.01, arrowLength=0.2, arrowStyle='|>', style=Style( kRed, lineWidth=2, fillStyle=1001 ) ):
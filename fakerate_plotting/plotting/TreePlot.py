@@ -26,16 +26,21 @@ class CutDefinition:
         self.tree = tree
         self.style = style
         
-def getValuesFromTree( tree, expression, selection ):
+def getValuesFromTree( tree, expression, selection, nEntries=None, firstEntry=0 ):
     ## Helper method to get an array of values and weights from a TTree
     #  IMPORTANT: values and weights are associated with the TTree buffer.
     #  They need to be copied in order to be persisted!
     #  @param tree              TTree object used to extract the results
     #  @param expression        string used as variable expression
     #  @param selection         string used as weight and cut expression
+    #  @param nEntries          number of entries to process (default is all entries)
+    #  @param firstEntry        first entry to process
     #  @return array of values, array of weights (two return values)
     logger.debug( 'getValuesFromTree(): calling TTree::Draw( "%s", "%s", "%s" )' % (expression, selection, 'goff') )
-    tree.Draw( expression, selection, 'goff' )
+    if nEntries is None:
+        tree.Draw( expression, selection, 'goff' )
+    else:
+        tree.Draw( expression, selection, 'goff', nEntries, firstEntry )
     entries = tree.GetSelectedRows()
     valueBuffer = tree.GetV1()
     weightBuffer = tree.GetW()
@@ -46,7 +51,27 @@ def getValuesFromTree( tree, expression, selection ):
         values = numpy.frombuffer( buffer=valueBuffer, dtype='double', count=entries )
         weights = numpy.frombuffer( buffer=weightBuffer, dtype='double', count=entries )
     return values, weights
-            
+
+def getColumnsFromTree( tree, expressions, selection='' ):
+    ## Helper method to evaluate several expressions in a single pass over a TTree
+    #  More than four expressions are drawn using the "para" option of TTree::Draw.
+    #  In contrast to getValuesFromTree the returned arrays are copies of the TTree buffers.
+    #  @param tree              TTree object used to extract the results
+    #  @param expressions       list of strings used as variable expressions
+    #  @param selection         string used as weight and cut expression
+    #  @return list of arrays of values (one per expression), array of weights (two return values)
+    import numpy
+    option = 'para goff' if len( expressions ) > 4 else 'goff'
+    command = ':'.join( '(%s)' % expression for expression in expressions )
+    logger.debug( 'getColumnsFromTree(): calling TTree::Draw( "%s", "%s", "%s" )' % (command, selection, option) )
+    tree.Draw( command, selection, option )
+    entries = tree.GetSelectedRows()
+    if entries <= 0:
+        return [ numpy.empty(0) for expression in expressions ], numpy.empty(0)
+    columns = [ numpy.frombuffer( buffer=tree.GetVal( index ), dtype='double', count=entries ).copy() for index in xrange( len( expressions ) ) ]
+    weights = numpy.frombuffer( buffer=tree.GetW(), dtype='double', count=entries ).copy()
+    return columns, weights
+
 def createHistogramFromTree( tree, xVar, title='', cut=None, weight=None, drawOption='', style=None ):
     ## Helper method to create a histogram from a TTree and apply a style
     #  @ param tree             TTree object used to create the histogram
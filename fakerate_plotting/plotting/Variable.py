@@ -6,11 +6,12 @@ Helper classes to store variables and related quantities
 
 from plotting.Cut import Cut
 from array import array
-import uuid, logging, hashlib
-from plotting.Tools import blindHistogram
+import uuid, logging, hashlib, weakref
+from plotting.Tools import blindHistogram, findBins
 
 # dictionary of all registered variables, allows look-up by name
-VARIABLES = {}
+# only weak references are kept so that temporary variables can be deleted
+VARIABLES = weakref.WeakValueDictionary()
 
 def addParantheses( s, checkFor ):
     ## helper method to check if any of the given characters is present
@@ -71,6 +72,8 @@ class Binning( Interval ):
         self.drawUnderflowBin = False
         self.drawOverflowBin = False
         self.nDivisions = 510
+        self._edges = None
+        self._edgesKey = None
     
     def setupAxis( self, axis ):
         ## Set the binning of the given axis
@@ -107,11 +110,38 @@ class Binning( Interval ):
         md5.update( str(self.up) )
         return md5.hexdigest()
     
+    @property
+    def edges( self ):
+        ## Get the bin boundaries as numpy array
+        #  The array is cached until nBins, low or up are changed and must not be modified.
+        import numpy
+        key = ( self.nBins, self.low, self.up )
+        if getattr( self, '_edgesKey', None ) != key:
+            self._edges = numpy.linspace( self.low, self.up , self.nBins+1 )
+            self._edges.flags.writeable = False
+            self._edgesKey = key
+        return self._edges
+    
     @property
     def bins( self ):
         ## Get the array of bin boundaries
+        return self.edges
+    
+    def findBins( self, values ):
+        ## Find the bin numbers for an array of values like TAxis::FindFixBin
+        #  Values below the range end up in the underflow bin 0, values above the range (and NaN) in the overflow bin nBins+1.
+        #  @param values    array of values
+        #  @return array of bin numbers
         import numpy
-        return numpy.linspace( self.low, self.up , self.nBins+1 )
+        values = numpy.asarray( values, dtype=numpy.float64 )
+        bins = numpy.full( values.shape, self.nBins+1, dtype=numpy.int64 )
+        # NaN is neither below nor inside the range
+        with numpy.errstate( invalid='ignore' ):
+            bins[ values < self.low ] = 0
+            inside = ( values >= self.low ) & ( values < self.up )
+        # same arithmetic as ROOT to get identical results at the bin edges
+        bins[ inside ] = 1 + ( self.nBins * ( values[ inside ] - self.low ) / ( self.up - self.low ) ).astype( numpy.int64 )
+        return bins
     
 class VariableBinning( Binning ):
     ## Container for variable binning
@@ -156,15 +186,30 @@ class VariableBinning( Binning ):
     @bins.setter
     def bins( self, bins ):
         ## Set the array of bin boundaries
+        import numpy
         if not bins:
             self.logger.error( 'Trying to set an empty list of bins' )
             return
         bins.sort()
         self.__bins = array( 'd', bins )
+        self.__edges = numpy.array( self.__bins )
+        self.__edges.flags.writeable = False
         self.nBins = len(self.__bins)-1
         self.low = self.__bins[0]
         self.up = self.__bins[-1]
     
+    @property
+    def edges( self ):
+        ## Get the bin boundaries as numpy array, must not be modified
+        return self.__edges
+    
+    def findBins( self, values ):
+        ## Find the bin numbers for an array of values like TAxis::FindFixBin
+        #  Values below the range end up in the underflow bin 0, values above the range (and NaN) in the overflow bin nBins+1.
+        #  @param values    array of values
+        #  @return array of bin numbers
+        return findBins( self.edges, values )
+    
         
 class Variable( object ):
     ## Container for attributes of a variable
@@ -248,11 +293,12 @@ class Variable( object ):
     def name( self, name ):
         ## Set the name of bin variable
         # remove the old reference
-        if hasattr( self, '__name' ) and VARIABLES.has_key( self.__name ):
-            del VARIABLES[self.__name]
+        oldName = getattr( self, '_Variable__name', None )
+        if oldName is not None and VARIABLES.get( oldName ) is self:
+            del VARIABLES[oldName]
         self.__name = name
         # register variable
-        if not VARIABLES.has_key( self.__name ):
+        if VARIABLES.get( self.__name ) is None:
             VARIABLES[self.__name] = self
     
     @property